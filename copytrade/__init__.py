@@ -0,0 +1,5 @@
+"""Delta Exchange India copy-trading tools.
+
+Run ``python -m copytrade --help`` for the command line. This package keeps its
+top-level import free of third-party modules; import submodules directly.
+"""
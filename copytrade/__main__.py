@@ -0,0 +1,532 @@
+"""Command line entry point: ``python -m copytrade <command>``.
+
+Only the standard library is imported at module load. Each subcommand imports
+``requests``/``supabase``/``dotenv`` (via the copytrade modules) when it runs,
+so cron sweeps and health probes only pay for what they use.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Modules that must never be imported just to parse arguments
+HEAVY_MODULES = ('requests', 'supabase', 'dotenv', 'urllib3')
+
+DEFAULT_BUDGET_MS = 300
+
+
+def get_key_args(args):
+    """Resolve API credentials from flags or DELTA_API_KEY/DELTA_API_SECRET"""
+    if not args.api_key or not args.api_secret:
+        from .db import load_env
+        load_env()
+    api_key = args.api_key or os.getenv('DELTA_API_KEY')
+    api_secret = args.api_secret or os.getenv('DELTA_API_SECRET')
+    return api_key, api_secret
+
+
+def make_hedger(args):
+    """Build a Hedger when --hedge is set"""
+    if not args.hedge:
+        return None
+    from .hedging import Hedger
+    return Hedger()
+
+
+def print_hedge_stats(hedger):
+    if hedger is None:
+        return
+    stats = hedger.get_stats()
+    print(f"\nHedged reads: {stats['requests']} requests, {stats['hedges_sent']} hedges sent "
+          f"({stats['extra_load'] * 100:.1f}% extra load), {stats['hedge_wins']} won by the hedge")
+    hedger.shutdown()
+
+
+def open_history(args):
+    """Open the HistoryStore when --history is set"""
+    if not args.history:
+        return None
+    from .history import HistoryStore
+    from .timeouts import SHARED
+    history = HistoryStore(args.history)
+    # Start from the latency earlier runs saw instead of the fixed defaults
+    SHARED.seed(history)
+    return history
+
+
+def cmd_validate_key(args):
+    """Run the full API key test suite against one key"""
+    api_key, api_secret = get_key_args(args)
+    if not api_key or not api_secret:
+        print("❌ Provide --api-key/--api-secret or set DELTA_API_KEY/DELTA_API_SECRET")
+        return 2
+
+    from .api import DeltaExchangeAPITester
+    from .fleet import mask_key
+    hedger = make_hedger(args)
+    history = open_history(args)
+    tester = DeltaExchangeAPITester(api_key, api_secret, args.environment, args.transport, hedger=hedger,
+                                    history=history)
+    results = tester.run_all_tests()
+    print_hedge_stats(hedger)
+    if history is not None:
+        history.record_results(mask_key(api_key), results, args.environment)
+        history.close()
+    return 0 if all(results.values()) else 1
+
+
+def cmd_validate_fleet(args):
+    """Validate every broker and follower credential in the database"""
+    if args.workers:
+        return cmd_validate_fleet_queue(args)
+
+    from .db import get_credentials_from_db
+    from .fleet import validate_fleet
+
+    credentials = get_credentials_from_db()
+    if not credentials:
+        print("❌ Could not fetch credentials from database")
+        return 2
+
+    hedger = make_hedger(args)
+    history = open_history(args)
+    all_results = validate_fleet(credentials, args.environment, args.transport, hedger, history)
+    print_hedge_stats(hedger)
+    if history is not None:
+        history.close()
+    working = sum(1 for group in all_results.values() for r in group.values() if r['working'])
+    return 0 if working else 1
+
+
+def cmd_validate_fleet_queue(args):
+    """Validate the fleet with worker processes over a resumable local queue"""
+    from .fleet import print_fleet_summary, record_outcomes
+    from .fleetqueue import run_fleet_queue
+
+    try:
+        all_results = run_fleet_queue(args.queue, args.environment, args.transport, args.workers, args.fresh,
+                                      history_path=args.history, quiet=not args.verbose)
+    except RuntimeError as e:
+        print(f"❌ {str(e)}")
+        return 2
+    except KeyboardInterrupt:
+        # run_fleet_queue has already stopped the workers and said how to resume
+        return 130
+    if all_results is None:
+        print("❌ Could not fetch credentials from database")
+        return 2
+    record_outcomes(all_results)
+    print_fleet_summary(all_results)
+    working = sum(1 for group in all_results.values() for r in group.values() if r['working'])
+    return 0 if working else 1
+
+
+def cmd_watch_followers(args):
+    """Follow follower config changes incrementally and print each diff"""
+    from .db import get_client
+    from .engine import get_follower_name
+    from .sync import FollowerSync
+
+    client = get_client()
+    if client is None:
+        return 2
+
+    def show(added, updated, removed):
+        for label, rows in (('+', added), ('~', updated), ('-', removed)):
+            for row in rows:
+                print(f"   {label} {get_follower_name(row)} "
+                      f"({row.get('copy_mode', 'N/A')}, multiplier {row.get('multiplier', 'N/A')})")
+
+    sync = FollowerSync(client, on_change=show, interval=args.interval, reconcile_every=args.reconcile_every)
+    sync.full_load()
+    print(f"👥 Watching {len(sync.followers)} active follower(s) from watermark {sync.watermark}")
+    sync.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sync.stop()
+    return 0
+
+
+def cmd_export_fills(args):
+    """Export fills for one key to CSV or JSON lines"""
+    api_key, api_secret = get_key_args(args)
+    if not api_key or not api_secret:
+        print("❌ Provide --api-key/--api-secret or set DELTA_API_KEY/DELTA_API_SECRET")
+        return 2
+
+    from .api import DeltaExchangeAPITester
+    from .fills import export_fills
+
+    tester = DeltaExchangeAPITester(api_key, api_secret, args.environment, args.transport)
+    filters = {
+        'symbol': args.symbol,
+        'start_time': args.start_time,
+        'end_time': args.end_time
+    }
+
+    if args.output == '-':
+        count = export_fills(tester, sys.stdout, args.format, **filters)
+    else:
+        with open(args.output, 'w', newline='') as out:
+            count = export_fills(tester, out, args.format, **filters)
+    print(f"✅ Exported {count} fills", file=sys.stderr)
+    return 0
+
+
+def cmd_probe_env(args):
+    """Check which environments are reachable (and accept the key, if given)"""
+    api_key, api_secret = get_key_args(args)
+
+    if api_key and api_secret:
+        from .api import DeltaExchangeAPITester
+        tester = DeltaExchangeAPITester(api_key, api_secret, args.environment, args.transport)
+        return 0 if tester.test_environment_mismatch() else 1
+
+    from .api import ENVIRONMENTS, PROBE_TIMEOUT, DeltaExchangeAPITester
+
+    reachable = 0
+    for env_name, env_url in ENVIRONMENTS.items():
+        # Keyless, but sent like any other request so the probe feeds and uses the adaptive deadlines
+        tester = DeltaExchangeAPITester(None, None, env_name, args.transport)
+        started = time.perf_counter()
+        try:
+            response = tester.send('GET', f"{env_url}/v2/products", default_timeout=PROBE_TIMEOUT,
+                                   params={'page_size': 1})
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if response.status_code == 200:
+                reachable += 1
+                print(f"✅ {env_name}: {env_url} ({elapsed_ms:.0f} ms)")
+            else:
+                print(f"❌ {env_name}: HTTP {response.status_code} ({elapsed_ms:.0f} ms)")
+        except Exception as e:
+            print(f"❌ {env_name}: {str(e)}")
+    return 0 if reachable == len(ENVIRONMENTS) else 1
+
+
+def cmd_products(args):
+    """Seed, refresh or query the memory-mapped product index"""
+    from . import products
+
+    if args.action == 'seed':
+        products.seed_from_symbol_mapping(args.index, args.mapping)
+        print(f"✅ Seeded {args.index} from {args.mapping}")
+        return 0
+
+    if args.action == 'refresh':
+        from .api import ENVIRONMENTS
+        try:
+            index, changes = products.refresh_index(args.index, ENVIRONMENTS[args.environment])
+        except Exception as e:
+            print(f"❌ Product refresh failed: {str(e)}")
+            return 1
+        print(f"✅ {len(index)} products: {changes['added']} added, "
+              f"{changes['updated']} updated, {changes['delisted']} delisted")
+        index.close()
+        return 0
+
+    index = products.ProductIndex.load(args.index)
+    try:
+        for symbol in args.symbols:
+            if symbol in index:
+                print(json.dumps(index.get(symbol)))
+            else:
+                print(f"❌ {symbol}: not in index")
+    finally:
+        index.close()
+    return 0
+
+
+def cmd_bench(args):
+    """Run offline benchmarks against the local stand-in exchange"""
+    if args.suite == 'transport':
+        from .bench import run_transport_benchmark
+
+        run_transport_benchmark(args.accounts, args.concurrency, args.latency_ms / 1000)
+        return 0
+
+    from .bench import (baseline_for, find_regressions, git_commit, load_results, print_core_results,
+                        record_results, run_core_benchmark)
+
+    commit = git_commit() or 'unknown'
+    profile = 'quick' if args.quick else 'full'
+    print(f"⏱️ Core benchmarks at {commit} ({profile})")
+    results = run_core_benchmark(args.followers, args.fills, quick=args.quick)
+    baseline = baseline_for(load_results(args.results), commit, args.baseline, profile)
+    print_core_results(results, baseline['results'] if baseline else None)
+    if not args.no_record:
+        record_results(results, args.results, commit, profile)
+        print(f"📋 Recorded in {args.results}")
+    if baseline is None:
+        print(f"⚠️ No {profile} run of {args.baseline or 'an earlier commit'} in {args.results} to compare against")
+        return 0
+    regressions = find_regressions(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.threshold * 100:.0f}% vs {baseline['commit']}:")
+        for metric, old, new, change in regressions:
+            print(f"   {metric}: {old:,.1f} -> {new:,.1f} ({change * 100:+.1f}%)")
+        return 1
+    print(f"✅ No regressions beyond {args.threshold * 100:.0f}% vs {baseline['commit']}")
+    return 0
+
+
+def cmd_history(args):
+    """Trend queries and compaction over the local history store"""
+    from .history import DAY, HistoryStore
+
+    history = HistoryStore(args.history or args.path)
+    since = time.time() - args.days * DAY
+    try:
+        if args.action == 'failing':
+            rows = history.newly_failing(since)
+            print(f"🔍 {len(rows)} check(s) started failing in the last {args.days:g} day(s)")
+            for row in rows:
+                started = time.strftime('%Y-%m-%d %H:%M', time.localtime(row['failing_since']))
+                print(f"   {row['account']} ({row['account_group']}): {row['check_name']} failing since "
+                      f"{started}, {row['failures']} failure(s)")
+        elif args.action == 'pass-rate':
+            for row in history.pass_rate(since, args.check):
+                day = time.strftime('%Y-%m-%d', time.localtime(row['bucket']))
+                print(f"   {day} {row['check_name']}: {row['pass_rate'] * 100:.1f}% of {row['results']}")
+        elif args.action == 'latency':
+            history.rollup()
+            for row in history.latency_trend(since, args.endpoint):
+                day = time.strftime('%Y-%m-%d', time.localtime(row['bucket']))
+                print(f"   {day} {row['endpoint']}: {row['requests']} requests, {row['errors']} errors, "
+                      f"p50 {row['p50'] * 1000:.0f} ms, p95 {row['p95'] * 1000:.0f} ms, "
+                      f"max {row['max'] * 1000:.0f} ms")
+        elif args.action == 'compact':
+            changed = history.compact()
+            history.vacuum()
+            print(f"🔄 Rolled up {changed['hours_rolled_up']} endpoint-hour(s), deleted "
+                  f"{changed['latency_deleted']} raw sample(s), thinned {changed['checks_thinned']} check row(s)")
+            print(json.dumps(history.get_status()))
+    finally:
+        history.close()
+    return 0
+
+
+def cmd_shadow(args):
+    """Replay broker fills through a shadow engine and compare with what was sent"""
+    from .db import get_credentials_from_db
+    from .fills import iter_fills
+    from .shadow import ShadowEngine, compare, fills_to_trades, load_records, print_report
+
+    credentials = get_credentials_from_db()
+    if not credentials:
+        print("❌ Could not fetch credentials from database")
+        return 2
+
+    products = exposure = risk = None
+    if args.risk:
+        from .exposure import ExposureMatrix
+        from .products import ProductIndex
+        from .risk import RiskGate
+        products = ProductIndex.load(args.index) if os.path.exists(args.index) else None
+        exposure = ExposureMatrix(products)
+        risk = RiskGate(exposure, products=products)
+
+    brokers = credentials['brokers']
+    engine = ShadowEngine(brokers[0], credentials['followers'], args.environment, transport=args.transport,
+                          record_path=args.records, products=products, exposure=exposure, risk=risk)
+    for broker in brokers[1:]:
+        engine.add_master(broker)
+    # Without a start, replay a bounded recent window rather than the whole fill history
+    start_time = args.start_time or int((time.time() - args.hours * 3600) * 1e6)
+    # Size the replay against the positions followers held when it starts, not their live ones
+    for future in engine.resync_exposure():
+        future.result()
+    for future in engine.rewind_exposure(start_time):
+        future.result()
+    futures = []
+    for master_id, client in engine.master_clients.items():
+        fills = sorted(iter_fills(client, start_time=start_time, end_time=args.end_time),
+                       key=lambda fill: fill.get('created_at') or '')
+        trades = fills_to_trades(fills, master_id)
+        print(f"🔍 {engine.masters[master_id]}: {len(fills)} fill(s), {len(trades)} order(s)")
+        futures.extend(engine.process_broker_trades(trades))
+    for future in futures:
+        future.result()
+
+    records = list(engine.records)
+    print(f"🚫 {len(records)} would-be order(s), none sent")
+    stages = engine.stage_summary()
+    if args.sent:
+        print_report(compare(records, load_records(args.sent)), stages)
+    else:
+        print_report(compare(records, []), stages)
+    engine.stop()
+    return 0
+
+
+def measure_startup(argv):
+    """Run ``python -X importtime -m copytrade argv`` and total its imports"""
+    import subprocess
+
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'copytrade'] + list(argv),
+        capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    import_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        import_us += int(self_us)
+        modules.add(name.strip())
+
+    return {
+        'wall_ms': wall_ms,
+        'import_ms': import_us / 1000,
+        'heavy': sorted(m for m in modules if m in HEAVY_MODULES)
+    }
+
+
+def cmd_startup_budget(args):
+    """Fail if a short invocation imports heavy modules or exceeds the budget"""
+    argv = args.argv or ['--help']
+    result = measure_startup(argv)
+
+    print(f"Command: python -m copytrade {' '.join(argv)}")
+    print(f"Import time: {result['import_ms']:.1f} ms")
+    print(f"Wall time: {result['wall_ms']:.1f} ms (budget {args.budget_ms} ms)")
+
+    ok = True
+    if result['heavy']:
+        print(f"❌ Heavy modules imported: {', '.join(result['heavy'])}")
+        ok = False
+    if result['wall_ms'] > args.budget_ms:
+        print("❌ Startup budget exceeded")
+        ok = False
+    if ok:
+        print("✅ Startup within budget")
+    return 0 if ok else 1
+
+
+def add_key_arguments(parser):
+    parser.add_argument('--api-key', help='API key (default: $DELTA_API_KEY)')
+    parser.add_argument('--api-secret', help='API secret (default: $DELTA_API_SECRET)')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m copytrade',
+        description='Delta Exchange India copy-trading tools'
+    )
+    parser.add_argument('--environment', choices=['production', 'testnet'], default='production')
+    parser.add_argument('--transport', choices=['http1', 'http2'], default='http1',
+                        help='http2 multiplexes all accounts over shared connections (needs httpx[http2])')
+    parser.add_argument('--hedge', action='store_true',
+                        help='hedge slow balance/position/order reads with a duplicate request')
+    parser.add_argument('--metrics-port', type=int,
+                        help='serve Prometheus metrics on this local port while the command runs')
+    parser.add_argument('--history', metavar='PATH',
+                        help='append validation results and request latency to this SQLite file')
+    parser.add_argument('--profile', choices=['cprofile', 'sample'],
+                        help='profile the whole run (deterministic or sampling)')
+    parser.add_argument('--profile-output', default='copytrade-profile',
+                        help='file prefix for .pstats/.folded/.phases.json output')
+    parser.add_argument('--sample-interval', type=float, default=0.005,
+                        help='seconds between stack samples in sample mode')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    validate_key = subparsers.add_parser('validate-key', help='test one API key')
+    add_key_arguments(validate_key)
+    validate_key.set_defaults(func=cmd_validate_key)
+
+    validate_fleet = subparsers.add_parser('validate-fleet', help='test every key in the database')
+    validate_fleet.add_argument('--workers', type=int,
+                                help='validate with this many processes over a resumable queue file')
+    validate_fleet.add_argument('--queue', default='fleet-queue.db', help='queue file for --workers')
+    validate_fleet.add_argument('--fresh', action='store_true', help='start a new run instead of resuming')
+    validate_fleet.add_argument('--verbose', action='store_true', help="show each worker's test output")
+    validate_fleet.set_defaults(func=cmd_validate_fleet)
+
+    watch = subparsers.add_parser('watch-followers', help='sync follower config changes incrementally')
+    watch.add_argument('--interval', type=float, default=5.0, help='seconds between polls')
+    watch.add_argument('--reconcile-every', type=int, default=60, help='full reload every N polls')
+    watch.set_defaults(func=cmd_watch_followers)
+
+    export = subparsers.add_parser('export-fills', help='export fill history')
+    add_key_arguments(export)
+    export.add_argument('--symbol')
+    export.add_argument('--start-time', type=int, help='microseconds since epoch')
+    export.add_argument('--end-time', type=int, help='microseconds since epoch')
+    export.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    export.add_argument('--output', default='-', help="output file (default: stdout)")
+    export.set_defaults(func=cmd_export_fills)
+
+    probe = subparsers.add_parser('probe-env', help='check production/testnet reachability')
+    add_key_arguments(probe)
+    probe.set_defaults(func=cmd_probe_env)
+
+    product_index = subparsers.add_parser('products', help='manage the product metadata index')
+    product_index.add_argument('action', choices=['seed', 'refresh', 'show'])
+    product_index.add_argument('symbols', nargs='*', help='symbols to show')
+    product_index.add_argument('--index', default='product-index.bin')
+    product_index.add_argument('--mapping', default='product-ids.json')
+    product_index.set_defaults(func=cmd_products)
+
+    shadow = subparsers.add_parser('shadow', help='run broker fills through a dry-run engine')
+    shadow.add_argument('--start-time', type=int, help='microseconds since epoch (default: --hours ago)')
+    shadow.add_argument('--hours', type=float, default=24, help='window to replay when --start-time is not set')
+    shadow.add_argument('--end-time', type=int, help='microseconds since epoch')
+    shadow.add_argument('--risk', action='store_true', help="apply each follower's risk limits")
+    shadow.add_argument('--index', default='product-index.bin', help='product index for --risk')
+    shadow.add_argument('--records', default='shadow-orders.jsonl', help='where to append would-be orders')
+    shadow.add_argument('--sent', help="production engine's SentOrderLog to compare against")
+    shadow.set_defaults(func=cmd_shadow)
+
+    history = subparsers.add_parser('history', help='query or compact the validation history store')
+    history.add_argument('action', choices=['failing', 'pass-rate', 'latency', 'compact'])
+    history.add_argument('--path', default='copytrade-history.db', help='store to read when --history is not set')
+    history.add_argument('--days', type=float, default=7, help='how far back to look')
+    history.add_argument('--check', help='limit pass-rate to one check')
+    history.add_argument('--endpoint', help='limit latency to endpoints containing this text')
+    history.set_defaults(func=cmd_history)
+
+    bench = subparsers.add_parser('bench', help='offline benchmarks against a local stand-in exchange')
+    bench.add_argument('suite', choices=['transport', 'core'])
+    bench.add_argument('--accounts', type=int, default=200)
+    bench.add_argument('--concurrency', type=int, default=50)
+    bench.add_argument('--latency-ms', type=float, default=20, help='stand-in server latency')
+    bench.add_argument('--followers', type=int, default=50, help='core: followers in the end-to-end run')
+    bench.add_argument('--fills', type=int, default=20, help='core: fills in the end-to-end run')
+    bench.add_argument('--quick', action='store_true', help='core: smaller iteration counts')
+    bench.add_argument('--results', default='bench-results.jsonl', help='core: per-commit results file')
+    bench.add_argument('--baseline', help='core: commit to compare with (default: latest other commit)')
+    bench.add_argument('--threshold', type=float, default=0.2, help='core: relative change that fails the run')
+    bench.add_argument('--no-record', action='store_true', help='core: compare without storing this run')
+    bench.set_defaults(func=cmd_bench)
+
+    budget = subparsers.add_parser('startup-budget', help='measure CLI import time')
+    budget.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    budget.add_argument('argv', nargs=argparse.REMAINDER, help='arguments to time (default: --help)')
+    budget.set_defaults(func=cmd_startup_budget)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.metrics_port:
+        from .metrics import serve
+        serve(args.metrics_port)
+        print(f"📈 Metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    if not args.profile:
+        return args.func(args)
+
+    from .profiling import profiled
+    with profiled(args.profile, args.profile_output, args.sample_interval):
+        return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,526 @@
+"""Delta Exchange India REST client and API key tester."""
+
+import hashlib
+import hmac
+import requests
+import time
+import json
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+from . import metrics
+from .jsonstream import count_results, stream_result
+from .profiling import is_active, phase
+from .timeouts import SHARED as SHARED_TIMEOUTS, timeout_key
+from .transport import Http2Session
+
+# Base URLs for the India platform, keyed by environment name
+ENVIRONMENTS = {
+    'production': 'https://api.india.delta.exchange',
+    'testnet': 'https://cdn-ind.testnet.deltaex.org'
+}
+
+# Exchange rules for /v2/orders/batch: one product per batch, at most 50
+# orders, and only limit orders
+BATCH_ORDER_LIMIT = 50
+BATCH_ORDER_TYPES = ('limit_order',)
+PROBE_TIMEOUT = 5.0  # reachability probes give up sooner than the 10 s default until latency is known
+
+
+class TimedSession(requests.Session):
+    """requests.Session that reports network and JSON decode time per endpoint"""
+    
+    def request(self, method, url, *args, **kwargs):
+        if not is_active():
+            return super().request(method, url, *args, **kwargs)
+        
+        parts = urlsplit(url)
+        endpoint = f"{method} {parts.path if parts.path not in ('', '/') else parts.netloc}"
+        with phase('network', endpoint):
+            response = super().request(method, url, *args, **kwargs)
+        
+        decode = response.json
+        def timed_json(**json_kwargs):
+            with phase('json_decode', endpoint):
+                return decode(**json_kwargs)
+        response.json = timed_json
+        return response
+
+class DeltaExchangeAPITester:
+    def __init__(self, api_key, api_secret, environment='production', transport='http1',
+                 session=None, base_url=None, hedger=None, timeouts=None, history=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.hedger = hedger  # optional Hedger shared across testers for idempotent reads
+        self.timeouts = timeouts or SHARED_TIMEOUTS  # adaptive per-endpoint deadlines
+        self.history = history  # optional HistoryStore for latency samples
+        
+        # Set base URL based on environment - CORRECTED FOR INDIA
+        self.environment = 'testnet' if environment.lower() == 'testnet' else 'production'
+        self.base_url = base_url or ENVIRONMENTS[self.environment]
+        
+        # An explicit session lets many testers share one connection pool
+        if session is not None:
+            self.session = session
+        elif transport == 'http2':
+            self.session = Http2Session(self.base_url)
+        else:
+            self.session = TimedSession()
+        self.last_request_at = 0.0  # monotonic; lets a keep-alive pinger skip busy accounts
+        
+    def generate_signature(self, secret, message):
+        """Generate HMAC SHA256 signature"""
+        message = bytes(message, 'utf-8')
+        secret = bytes(secret, 'utf-8')
+        hash = hmac.new(secret, message, hashlib.sha256)
+        return hash.hexdigest()
+    
+    def get_headers(self, method, path, query_string='', payload=''):
+        """Generate authentication headers"""
+        with phase('signing', path):
+            timestamp = str(int(time.time()))
+            signature_data = method + timestamp + path + query_string + payload
+            signature = self.generate_signature(self.api_secret, signature_data)
+        
+        return {
+            'api-key': self.api_key,
+            'timestamp': timestamp,
+            'signature': signature,
+            'User-Agent': 'python-api-tester',
+            'Content-Type': 'application/json'
+        }
+    
+    def request(self, method, path, params=None, payload=None, timeout=None, stream=False):
+        """Send a signed request; params and payload are signed as sent
+
+        Without an explicit timeout the endpoint's adaptive deadline is used.
+        """
+        query_string = '?' + urlencode(params) if params else ''
+        body = json.dumps(payload, separators=(',', ':')) if payload is not None else ''
+        
+        headers = self.get_headers(method, path, query_string, body)
+        url = f"{self.base_url}{path}{query_string}"
+        self.last_request_at = time.monotonic()
+        return self.send(method, url, headers=headers, data=body or None, timeout=timeout, stream=stream)
+    
+    def send(self, method, url, timeout=None, default_timeout=None, **kwargs):
+        """Send on this tester's session with an adaptive deadline, recording latency
+
+        ``default_timeout`` replaces the adaptive default until the endpoint has enough samples.
+        """
+        key = timeout_key(method, url)
+        if timeout is None:
+            timeout = self.timeouts.timeout_for(key, method, default_timeout)
+        
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except Exception:
+            elapsed = time.perf_counter() - started
+            self.timeouts.record_failure(key, elapsed, timeout)
+            if self.history is not None:
+                self.history.record_latency(key, elapsed)
+            if metrics.is_enabled():
+                metrics.http_requests.inc(self.environment, method, urlsplit(url).path, 'error')
+            raise
+        elapsed = time.perf_counter() - started
+        self.timeouts.record(key, elapsed)
+        if self.history is not None:
+            self.history.record_latency(key, elapsed, response.status_code)
+        if metrics.is_enabled():
+            path = urlsplit(url).path
+            metrics.http_requests.inc(self.environment, method, path, str(response.status_code))
+            metrics.http_latency.observe(self.environment, method, path, value=elapsed)
+        return response
+    
+    def get(self, path, params=None, timeout=None, stream=False):
+        """Signed GET; hedged against stalls when a Hedger is configured"""
+        if self.hedger is None:
+            return self.request('GET', path, params, timeout=timeout, stream=stream)
+        return self.hedger.call(
+            f"{self.environment} GET {path}",
+            lambda: self.request('GET', path, params, timeout=timeout, stream=stream)
+        )
+    
+    def _fills_params(self, symbol, start_time, end_time, page_size, after):
+        params = {'page_size': str(page_size)}
+        if symbol:
+            params['symbol'] = symbol
+        if start_time:
+            params['start_time'] = str(start_time)
+        if end_time:
+            params['end_time'] = str(end_time)
+        if after:
+            params['after'] = after
+        return params
+    
+    def get_fills(self, symbol=None, start_time=None, end_time=None, page_size=100, after=None):
+        """Fetch one page of user fills, following the 'after' cursor"""
+        response = self.get('/v2/fills', self._fills_params(symbol, start_time, end_time, page_size, after))
+        response.raise_for_status()
+        return response.json()
+    
+    def stream_fills(self, symbol=None, start_time=None, end_time=None, page_size=100, after=None,
+                     fields=None):
+        """One page of fills as a ResultStream; the page's meta is in .extras once iterated"""
+        response = self.get('/v2/fills', self._fills_params(symbol, start_time, end_time, page_size, after),
+                            stream=True)
+        response.raise_for_status()
+        return stream_result(response, fields)
+    
+    def get_positions(self):
+        """Fetch open margined positions"""
+        return self.get('/v2/positions/margined')
+    
+    def get_balances(self):
+        """Fetch wallet balances"""
+        return self.get('/v2/wallet/balances')
+    
+    def get_open_orders(self):
+        """Fetch open orders"""
+        return self.get('/v2/orders', {'state': 'open'})
+    
+    def place_order(self, symbol, side, size, order_type='market_order', limit_price=None,
+                    reduce_only=False, client_order_id=None):
+        """Place a single order; returns the raw response"""
+        order_data = {
+            'product_symbol': symbol,
+            'size': abs(size),
+            'side': side,
+            'order_type': order_type,
+            'reduce_only': str(reduce_only).lower()
+        }
+        if order_type == 'limit_order' and limit_price:
+            order_data['limit_price'] = str(limit_price)
+        if client_order_id:
+            order_data['client_order_id'] = client_order_id
+        
+        return self.request('POST', '/v2/orders', payload=order_data)
+
+    def place_batch_orders(self, symbol, orders, product_id=None):
+        """Place up to BATCH_ORDER_LIMIT orders for one product in one request; returns the raw response"""
+        batch = []
+        for order in orders:
+            order_data = {
+                'size': abs(order['size']),
+                'side': order['side'],
+                'order_type': order.get('order_type', 'limit_order'),
+                'reduce_only': str(bool(order.get('reduce_only'))).lower()
+            }
+            if order.get('limit_price'):
+                order_data['limit_price'] = str(order['limit_price'])
+            if order.get('client_order_id'):
+                order_data['client_order_id'] = order['client_order_id']
+            batch.append(order_data)
+
+        payload = {'product_symbol': symbol, 'orders': batch}
+        if product_id is not None:
+            payload['product_id'] = product_id
+        return self.request('POST', '/v2/orders/batch', payload=payload)
+    
+    def test_public_endpoint(self):
+        """Test public endpoint (no authentication required)"""
+        print("=" * 60)
+        print("1. TESTING PUBLIC ENDPOINT (No Authentication)")
+        print("=" * 60)
+        
+        try:
+            url = f"{self.base_url}/v2/products"
+            response = self.send('GET', url, stream=True)
+            
+            print(f"URL: {url}")
+            print(f"Status Code: {response.status_code}")
+            
+            if response.status_code == 200:
+                # Only the count is needed, so stream the catalog instead of decoding it whole
+                count = count_results(response)
+                print("✅ PUBLIC ENDPOINT SUCCESS")
+                print(f"Found {count} products")
+                return True
+            else:
+                print("❌ PUBLIC ENDPOINT FAILED")
+                print(f"Response: {response.text}")
+                return False
+                
+        except Exception as e:
+            print(f"❌ PUBLIC ENDPOINT ERROR: {str(e)}")
+            return False
+    
+    def test_authentication(self):
+        """Test basic authentication with wallet endpoint"""
+        print("\n" + "=" * 60)
+        print("2. TESTING AUTHENTICATION")
+        print("=" * 60)
+        
+        try:
+            method = 'GET'
+            path = '/v2/wallet/balances'
+            url = f"{self.base_url}{path}"
+            
+            headers = self.get_headers(method, path)
+            
+            print(f"URL: {url}")
+            print(f"API Key: {self.api_key[:8]}...{self.api_key[-4:]}")
+            print(f"Timestamp: {headers['timestamp']}")
+            print(f"Signature: {headers['signature'][:16]}...")
+            
+            response = self.get_balances()
+            
+            print(f"Status Code: {response.status_code}")
+            
+            if response.status_code == 200:
+                print("✅ AUTHENTICATION SUCCESS")
+                data = response.json()
+                print(f"Wallet balances retrieved successfully")
+                return True
+            else:
+                print("❌ AUTHENTICATION FAILED")
+                try:
+                    error_data = response.json()
+                    print(f"Error: {json.dumps(error_data, indent=2)}")
+                except:
+                    print(f"Response: {response.text}")
+                return False
+                
+        except Exception as e:
+            print(f"❌ AUTHENTICATION ERROR: {str(e)}")
+            return False
+    
+    def test_trading_permissions(self):
+        """Test trading permissions by fetching open orders"""
+        print("\n" + "=" * 60)
+        print("3. TESTING TRADING PERMISSIONS")
+        print("=" * 60)
+        
+        try:
+            path = '/v2/orders'
+            query_string = '?state=open'
+            url = f"{self.base_url}{path}"
+            
+            print(f"URL: {url}")
+            print(f"Query: {query_string}")
+            
+            response = self.get_open_orders()
+            
+            print(f"Status Code: {response.status_code}")
+            
+            if response.status_code == 200:
+                print("✅ TRADING PERMISSIONS SUCCESS")
+                data = response.json()
+                orders = data.get('result', [])
+                print(f"Found {len(orders)} open orders")
+                return True
+            else:
+                print("❌ TRADING PERMISSIONS FAILED")
+                try:
+                    error_data = response.json()
+                    print(f"Error: {json.dumps(error_data, indent=2)}")
+                except:
+                    print(f"Response: {response.text}")
+                return False
+                
+        except Exception as e:
+            print(f"❌ TRADING PERMISSIONS ERROR: {str(e)}")
+            return False
+    
+    def test_ip_whitelist(self):
+        """Test if IP is properly whitelisted"""
+        print("\n" + "=" * 60)
+        print("4. TESTING IP WHITELIST")
+        print("=" * 60)
+        
+        try:
+            # Get public IP
+            ip_response = self.send('GET', 'https://api.ipify.org', default_timeout=PROBE_TIMEOUT)
+            public_ip = ip_response.text
+            print(f"Your Public IP: {public_ip}")
+            
+            # Test with a simple authenticated endpoint
+            method = 'GET'
+            path = '/v2/profile'
+            url = f"{self.base_url}{path}"
+            
+            headers = self.get_headers(method, path)
+            response = self.send('GET', url, headers=headers)
+            
+            if response.status_code == 200:
+                print("✅ IP WHITELIST SUCCESS")
+                return True
+            elif 'ip_blocked' in response.text.lower():
+                print("❌ IP NOT WHITELISTED")
+                print(f"Your IP {public_ip} is not whitelisted for this API key")
+                print("Add this IP to your API key whitelist at:")
+                print("https://www.delta.exchange/app/account/manageapikeys")
+                return False
+            else:
+                print("❌ IP WHITELIST TEST INCONCLUSIVE")
+                try:
+                    error_data = response.json()
+                    print(f"Error: {json.dumps(error_data, indent=2)}")
+                except:
+                    print(f"Response: {response.text}")
+                return False
+                
+        except Exception as e:
+            print(f"❌ IP WHITELIST ERROR: {str(e)}")
+            return False
+    
+    def test_signature_generation(self):
+        """Test signature generation with known values"""
+        print("\n" + "=" * 60)
+        print("5. TESTING SIGNATURE GENERATION")
+        print("=" * 60)
+        
+        # Test with known values
+        test_secret = "test_secret"
+        test_message = "GET1234567890/v2/wallet/balances"
+        expected_signature = hmac.new(
+            test_secret.encode('utf-8'), 
+            test_message.encode('utf-8'), 
+            hashlib.sha256
+        ).hexdigest()
+        
+        generated_signature = self.generate_signature(test_secret, test_message)
+        
+        print(f"Test Message: {test_message}")
+        print(f"Expected: {expected_signature}")
+        print(f"Generated: {generated_signature}")
+        
+        if expected_signature == generated_signature:
+            print("✅ SIGNATURE GENERATION SUCCESS")
+            return True
+        else:
+            print("❌ SIGNATURE GENERATION FAILED")
+            return False
+    
+    def test_environment_mismatch(self):
+        """Test for common environment mismatch issues"""
+        print("\n" + "=" * 60)
+        print("6. TESTING ENVIRONMENT MISMATCH")
+        print("=" * 60)
+        
+        print(f"Current Environment: {self.base_url}")
+        
+        # Test both environments to see which one works
+        environments = {
+            'Production (India)': 'https://api.india.delta.exchange',
+            'Testnet': 'https://cdn-ind.testnet.deltaex.org'
+        }
+        
+        working_env = None
+        
+        for env_name, env_url in environments.items():
+            try:
+                print(f"\nTesting {env_name}: {env_url}")
+                
+                # Test public endpoint first
+                response = self.send('GET', f"{env_url}/v2/products", default_timeout=PROBE_TIMEOUT)
+                if response.status_code != 200:
+                    print(f"  ❌ {env_name} - Public endpoint failed")
+                    continue
+                
+                # Test authentication
+                method = 'GET'
+                path = '/v2/profile'
+                timestamp = str(int(time.time()))
+                signature_data = method + timestamp + path
+                signature = self.generate_signature(self.api_secret, signature_data)
+                
+                headers = {
+                    'api-key': self.api_key,
+                    'timestamp': timestamp,
+                    'signature': signature,
+                    'User-Agent': 'python-api-tester',
+                    'Content-Type': 'application/json'
+                }
+                
+                auth_response = self.send('GET', f"{env_url}{path}", headers=headers, default_timeout=PROBE_TIMEOUT)
+                
+                if auth_response.status_code == 200:
+                    print(f"  ✅ {env_name} - Authentication SUCCESS")
+                    working_env = env_name
+                elif auth_response.status_code == 401:
+                    error_data = auth_response.json() if auth_response.content else {}
+                    if 'InvalidApiKey' in str(error_data):
+                        print(f"  ❌ {env_name} - Invalid API Key (wrong environment)")
+                    else:
+                        print(f"  ❌ {env_name} - Authentication failed: {error_data}")
+                else:
+                    print(f"  ❌ {env_name} - HTTP {auth_response.status_code}")
+                    
+            except Exception as e:
+                print(f"  ❌ {env_name} - Error: {str(e)}")
+        
+        if working_env:
+            print(f"\n✅ ENVIRONMENT CHECK: Your API key works with {working_env}")
+            if working_env.lower() != ('production (india)' if 'india' in self.base_url else 'testnet'):
+                print("⚠️  WARNING: You're using the wrong environment!")
+                print(f"   Your API key works with {working_env}")
+                print(f"   But you're connecting to {self.base_url}")
+            return True
+        else:
+            print("\n❌ ENVIRONMENT CHECK: API key doesn't work with any environment")
+            return False
+    
+    def run_all_tests(self):
+        """Run all tests and provide summary"""
+        print(f"DELTA EXCHANGE API TESTER (INDIA)")
+        print(f"Environment: {self.base_url}")
+        print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        results = {
+            'public_endpoint': self.test_public_endpoint(),
+            'signature_generation': self.test_signature_generation(),
+            'environment_mismatch': self.test_environment_mismatch(),
+            'ip_whitelist': self.test_ip_whitelist(),
+            'authentication': self.test_authentication(),
+            'trading_permissions': self.test_trading_permissions()
+        }
+        
+        # Summary
+        print("\n" + "=" * 60)
+        print("TEST SUMMARY")
+        print("=" * 60)
+        
+        passed = sum(results.values())
+        total = len(results)
+        
+        for test_name, result in results.items():
+            status = "✅ PASS" if result else "❌ FAIL"
+            print(f"{test_name.replace('_', ' ').title()}: {status}")
+        
+        print(f"\nOverall: {passed}/{total} tests passed")
+        
+        # Recommendations
+        print("\n" + "=" * 60)
+        print("RECOMMENDATIONS")
+        print("=" * 60)
+        
+        if not results['public_endpoint']:
+            print("❌ Network connectivity issue. Check your internet connection.")
+        
+        if not results['signature_generation']:
+            print("❌ Signature generation issue. Check your HMAC implementation.")
+        
+        if not results['environment_mismatch']:
+            print("❌ Environment mismatch. Your API key may be for a different environment.")
+            print("   - Production keys: Created at https://www.delta.exchange/")
+            print("   - Testnet keys: Created at testnet environment")
+        
+        if not results['ip_whitelist']:
+            print("❌ IP not whitelisted. Add your IP to the API key whitelist.")
+            print("   - Go to: https://www.delta.exchange/app/account/manageapikeys")
+        
+        if not results['authentication']:
+            print("❌ Authentication failed. Check API key, secret, and environment.")
+            print("   - Verify you're using the correct India API URL")
+            print("   - Ensure API key and secret are correct")
+            print("   - Check system time synchronization")
+        
+        if not results['trading_permissions']:
+            print("❌ Trading permissions issue. Ensure API key has trading permissions.")
+        
+        if all(results.values()):
+            print("✅ All tests passed! Your API key is working correctly with India API.")
+        
+        return results
@@ -0,0 +1,155 @@
+"""Cached wallet-balance snapshots for balance-proportional copying.
+
+``BalanceService`` refreshes every account's ``/v2/wallet/balances``
+concurrently on a schedule and keeps the latest snapshot per account in
+memory. Fills adjust a snapshot in between refreshes, so sizing reads equity
+from memory and never waits on a REST call. Every snapshot carries its
+age, so callers can decide how stale is too stale.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BalanceSnapshot:
+    __slots__ = ('account', 'asset', 'equity', 'available', 'fetched_at', 'updated_at', 'source')
+
+    def __init__(self, account, asset, equity, available, fetched_at, updated_at=None, source='rest'):
+        self.account = account
+        self.asset = asset
+        self.equity = equity
+        self.available = available
+        self.fetched_at = fetched_at  # last REST refresh
+        self.updated_at = updated_at or fetched_at  # last change from any source
+        self.source = source
+
+    @property
+    def age(self):
+        """Seconds since the balance was last confirmed over REST"""
+        return time.time() - self.fetched_at
+
+    def to_dict(self):
+        return {
+            'account': self.account,
+            'asset': self.asset,
+            'equity': self.equity,
+            'available': self.available,
+            'fetched_at': self.fetched_at,
+            'updated_at': self.updated_at,
+            'source': self.source,
+            'age': self.age
+        }
+
+
+def parse_balance(result, asset):
+    """Pick one asset out of a /v2/wallet/balances result list"""
+    for row in result or []:
+        if row.get('asset_symbol') == asset:
+            equity = float(row.get('balance') or 0)
+            # A fully used account reports available_balance 0; only a missing field falls back to equity
+            available = row.get('available_balance')
+            available = equity if available is None or available == '' else float(available)
+            return equity, available
+    return None
+
+
+class BalanceService:
+    def __init__(self, clients=None, asset='USD', interval=30.0, max_workers=16):
+        self.clients = dict(clients or {})  # account name -> DeltaExchangeAPITester
+        self.asset = asset
+        self.interval = interval
+        self.snapshots = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='balances')
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_account(self, name, client):
+        self.clients[name] = client
+
+    def remove_account(self, name):
+        self.clients.pop(name, None)
+        with self.lock:
+            self.snapshots.pop(name, None)
+
+    def _fetch(self, name, client):
+        response = client.get_balances()
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        parsed = parse_balance(response.json().get('result'), self.asset)
+        if parsed is None:
+            raise RuntimeError(f"no {self.asset} balance")
+        return parsed
+
+    def refresh_all(self):
+        """Refresh every account concurrently; returns the number refreshed"""
+        futures = {
+            name: self.pool.submit(self._fetch, name, client)
+            for name, client in list(self.clients.items())
+            if client is not None
+        }
+        refreshed = 0
+        for name, future in futures.items():
+            try:
+                equity, available = future.result()
+            except Exception as e:
+                self.errors[name] = str(e)
+                continue
+            now = time.time()
+            with self.lock:
+                self.snapshots[name] = BalanceSnapshot(name, self.asset, equity, available, now)
+            self.errors.pop(name, None)
+            refreshed += 1
+        return refreshed
+
+    def apply_fill(self, name, commission=0.0, realized_pnl=0.0, margin_delta=0.0):
+        """Adjust a snapshot from a fill instead of waiting for the next refresh"""
+        with self.lock:
+            snapshot = self.snapshots.get(name)
+            if snapshot is None:
+                return None
+            equity = snapshot.equity + float(realized_pnl or 0) - float(commission or 0)
+            available = snapshot.available + float(realized_pnl or 0) - float(commission or 0) - float(margin_delta or 0)
+            # Snapshots are replaced, never mutated, so readers never see a half update
+            self.snapshots[name] = BalanceSnapshot(
+                name, snapshot.asset, equity, available, snapshot.fetched_at, time.time(), 'fill'
+            )
+            return self.snapshots[name]
+
+    def get(self, name):
+        """Latest snapshot for an account, or None; never blocks on the network"""
+        return self.snapshots.get(name)
+
+    def get_equity(self, name, max_age=None):
+        snapshot = self.snapshots.get(name)
+        if snapshot is None or (max_age is not None and snapshot.age > max_age):
+            return None
+        return snapshot.equity
+
+    def get_status(self):
+        return {
+            'accounts': len(self.clients),
+            'snapshots': {name: s.to_dict() for name, s in list(self.snapshots.items())},
+            'errors': dict(self.errors)
+        }
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='balance-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.pool.shutdown(wait=False)
+
+    def _run(self):
+        self.refresh_all()
+        while not self._stop.wait(self.interval):
+            self.refresh_all()
@@ -0,0 +1,345 @@
+"""Offline benchmarks against the local stand-in exchange.
+
+``run_transport_benchmark`` compares HTTP transports. ``run_core_benchmark``
+times the hot paths one by one:
+
+- HMAC signing, and signing plus header building (``get_headers``)
+- follower sizing for 1k, 10k and 100k followers
+- order payload serialization, single and batch
+- parsing a product catalog into index rows
+- fill-to-last-ack latency of a ``CopyEngine`` fanning out to the stand-in
+
+Micro benchmarks report the best of several rounds, which is the least
+noisy figure. ``record_results`` appends each run to a JSON-lines file keyed
+by git commit, and ``find_regressions`` compares a run with the latest run
+of another commit, with a relative threshold per metric.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .api import DeltaExchangeAPITester
+from .standin import StandInExchange
+
+TRANSPORT_MODES = ('http1', 'http1-pooled', 'http2')
+DEFAULT_RESULTS_PATH = 'bench-results.jsonl'
+DEFAULT_THRESHOLD = 0.2
+SIZING_SCALES = (1000, 10000, 100000)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def make_testers(mode, base_url, accounts, concurrency):
+    """One tester per account, wired to the transport under test"""
+    shared_session = None
+    if mode == 'http1-pooled':
+        import requests
+        from .api import TimedSession
+        shared_session = TimedSession()
+        shared_session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+
+    transport = 'http2' if mode == 'http2' else 'http1'
+    return [
+        DeltaExchangeAPITester(f"bench-key-{i:06d}", f"bench-secret-{i}", transport=transport,
+                               session=shared_session, base_url=base_url)
+        for i in range(accounts)
+    ]
+
+
+def bench_transport(mode, exchange, accounts=200, concurrency=50, requests_per_account=2,
+                    path='/v2/wallet/balances'):
+    """Fan signed GETs for many accounts out over one transport"""
+    testers = make_testers(mode, exchange.url, accounts, concurrency)
+    latencies = []
+
+    def call(tester):
+        started = time.perf_counter()
+        response = tester.request('GET', path)
+        latencies.append(time.perf_counter() - started)
+        return response.status_code
+
+    exchange.reset_stats()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(call, testers * requests_per_account))
+    wall = time.perf_counter() - started
+
+    for tester in testers:
+        tester.session.close()
+
+    return {
+        'mode': mode,
+        'requests': len(statuses),
+        'errors': sum(1 for status in statuses if status != 200),
+        'wall_s': wall,
+        'rps': len(statuses) / wall,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'connections': exchange.stats['connections']
+    }
+
+
+def run_transport_benchmark(accounts=200, concurrency=50, latency=0.02, modes=TRANSPORT_MODES):
+    """Compare transports against a stand-in server and print a table"""
+    from .transport import close_shared_clients
+
+    rows = []
+    with StandInExchange(latency=latency) as exchange:
+        for mode in modes:
+            rows.append(bench_transport(mode, exchange, accounts, concurrency))
+            close_shared_clients()
+
+    print(f"TRANSPORT BENCHMARK: {accounts} accounts, concurrency {concurrency}, "
+          f"server latency {latency * 1000:.0f} ms")
+    print(f"{'mode':<14} {'reqs':>6} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sockets':>8}")
+    for row in rows:
+        print(f"{row['mode']:<14} {row['requests']:>6} {row['errors']:>6} {row['rps']:>8.0f} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['connections']:>8}")
+    return rows
+
+
+# Core hot paths
+
+def best_of(fn, rounds=5):
+    """Fastest of several timed calls of fn, in seconds"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_signing(iterations=20000, rounds=5):
+    tester = DeltaExchangeAPITester('bench-key', 'bench-secret', base_url='http://127.0.0.1:1')
+    payload = json.dumps({'product_symbol': 'BTCUSD', 'size': 1, 'side': 'buy', 'order_type': 'market_order'})
+    message = 'POST' + str(int(time.time())) + '/v2/orders' + payload
+
+    def sign():
+        for _ in range(iterations):
+            tester.generate_signature('bench-secret', message)
+
+    def headers():
+        for _ in range(iterations):
+            tester.get_headers('POST', '/v2/orders', '', payload)
+
+    return {
+        'signatures_per_s': iterations / best_of(sign, rounds),
+        'headers_per_s': iterations / best_of(headers, rounds)
+    }
+
+
+def bench_configs(count):
+    """Follower configs cycling through the copy modes"""
+    modes = [
+        {'copy_mode': 'multiplier', 'multiplier': 0.5},
+        {'copy_mode': 'fixed_amount', 'fixed_amount': 50},
+        {'copy_mode': 'fixed_lot', 'fixed_lot': 0.01},
+        {'copy_mode': '% balance', 'percentage': 25}
+    ]
+    return [dict(modes[i % len(modes)], follower_name=f"bench-{i}", max_lot_size=100) for i in range(count)]
+
+
+def bench_sizing(scales=SIZING_SCALES, rounds=5):
+    """Size one broker fill for every follower, as one fan-out does"""
+    from .engine import calculate_follower_size
+
+    results = {}
+    for count in scales:
+        configs = bench_configs(count)
+        passes = max(1, 100000 // count)  # keep small fan-outs long enough to time
+
+        def size_all():
+            for _ in range(passes):
+                for config in configs:
+                    calculate_follower_size(2.0, config, 65000.0, 0.5)
+
+        results[f"followers_per_s_{count // 1000}k"] = passes * count / best_of(size_all, rounds)
+    return results
+
+
+def bench_serialization(iterations=20000, batch_size=50, rounds=5):
+    """Order payloads to JSON the way DeltaExchangeAPITester.request encodes them"""
+    order = {'product_symbol': 'BTCUSD', 'size': 3, 'side': 'buy', 'order_type': 'limit_order',
+             'reduce_only': 'false', 'limit_price': '65000.5', 'client_order_id': 'bench-0001'}
+    batch = {'product_symbol': 'BTCUSD', 'product_id': 27,
+             'orders': [dict(order, size=i + 1, client_order_id=f"bench-{i:04d}") for i in range(batch_size)]}
+
+    def single():
+        for _ in range(iterations):
+            json.dumps(order, separators=(',', ':'))
+
+    def batched():
+        for _ in range(iterations // batch_size):
+            json.dumps(batch, separators=(',', ':'))
+
+    return {
+        'orders_per_s': iterations / best_of(single, rounds),
+        'batch_orders_per_s': (iterations // batch_size) * batch_size / best_of(batched, rounds)
+    }
+
+
+def bench_catalog(products=2000, rounds=7):
+    """Stream-parse a /v2/products body and build index rows"""
+    from .jsonstream import ResultStream
+    from .products import PRODUCT_FIELDS, product_row
+
+    catalog = [
+        {'id': i, 'symbol': f"C{i}USD", 'contract_type': 'perpetual_futures', 'contract_value': '0.001',
+         'tick_size': '0.5', 'min_size': 1, 'position_size_limit': 100000, 'state': 'live',
+         'description': f"Coin {i} perpetual", 'settling_asset': {'symbol': 'USD', 'precision': 8},
+         'underlying_asset': {'symbol': f"C{i}", 'precision': 8}, 'maker_commission_rate': '0.0002',
+         'taker_commission_rate': '0.0005', 'initial_margin': '1', 'maintenance_margin': '0.5'}
+        for i in range(products)
+    ]
+    body = json.dumps({'success': True, 'result': catalog}).encode()
+    chunks = [body[start:start + 65536] for start in range(0, len(body), 65536)]
+
+    def parse():
+        [product_row(product) for product in ResultStream(chunks, PRODUCT_FIELDS)]
+
+    return {'parse_ms': best_of(parse, rounds) * 1000, 'products': products, 'bytes': len(body)}
+
+
+def bench_end_to_end(followers=50, fills=20, latency=0.0):
+    """Fill-to-last-ack time for a CopyEngine fanning each fill out over the stand-in"""
+    from .engine import CopyEngine
+
+    with StandInExchange(latency=latency) as exchange:
+        class StandInEngine(CopyEngine):
+            def make_client(self, config):
+                client = super().make_client(config)
+                client.base_url = exchange.url
+                return client
+
+        configs = [dict(config, api_key=f"bench-key-{i}", api_secret='bench-secret')
+                   for i, config in enumerate(bench_configs(followers))]
+        engine = StandInEngine({'id': 'bench-master', 'name': 'bench'}, configs, transport='http1')
+        engine.warm_up()
+        samples = []
+        for i in range(fills):
+            started = time.perf_counter()
+            futures = engine.process_broker_trades([{'order_id': f"bench-{i}", 'symbol': 'BTCUSD', 'side': 'buy',
+                                                     'size': 1, 'average_fill_price': 65000}])
+            for future in futures:
+                future.result()
+            samples.append(time.perf_counter() - started)
+        engine.stop()
+    return {
+        'followers': followers,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000
+    }
+
+
+# Metric -> (higher is better, threshold multiplier); metrics not listed are informational.
+# End-to-end latency goes through sockets and thread scheduling, so it gets more slack.
+CHECKED_METRICS = {
+    'signing.signatures_per_s': (True, 1),
+    'signing.headers_per_s': (True, 1),
+    **{f"sizing.followers_per_s_{count // 1000}k": (True, 1) for count in SIZING_SCALES},
+    'serialization.orders_per_s': (True, 1),
+    'serialization.batch_orders_per_s': (True, 1),
+    'catalog.parse_ms': (False, 1),
+    'end_to_end.p50_ms': (False, 2),
+    'end_to_end.p95_ms': (False, 2)
+}
+
+
+def run_core_benchmark(followers=50, fills=20, quick=False):
+    """Time every core hot path; returns {'group.metric': value}"""
+    scale = 10 if quick else 1
+    suites = {
+        'signing': lambda: bench_signing(20000 // scale),
+        'sizing': lambda: bench_sizing(SIZING_SCALES[:2] if quick else SIZING_SCALES),
+        'serialization': lambda: bench_serialization(20000 // scale),
+        'catalog': lambda: bench_catalog(2000 // scale),
+        'end_to_end': lambda: bench_end_to_end(followers, fills)
+    }
+    results = {}
+    for group, suite in suites.items():
+        for metric, value in suite().items():
+            results[f"{group}.{metric}"] = value
+    return results
+
+
+def git_commit():
+    """Short HEAD commit, suffixed with -dirty for uncommitted changes; None outside a checkout"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def load_results(path=DEFAULT_RESULTS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_results(results, path=DEFAULT_RESULTS_PATH, commit=None, profile='full'):
+    """Append one run to the results file; returns the stored entry"""
+    entry = {
+        'commit': commit or git_commit() or 'unknown',
+        'profile': profile,
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'results': results
+    }
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+    return entry
+
+
+def baseline_for(history, commit, baseline=None, profile='full'):
+    """Latest run of the baseline commit, or of the most recent other commit, with the same profile"""
+    for entry in reversed(history):
+        if entry.get('profile', 'full') != profile:
+            continue
+        if baseline is not None:
+            if entry['commit'] == baseline or entry['commit'].startswith(baseline):
+                return entry
+        elif entry['commit'] != commit:
+            return entry
+    return None
+
+
+def find_regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """[(metric, baseline value, new value, relative change)] for metrics worse than threshold"""
+    regressions = []
+    for metric, (higher_is_better, slack) in CHECKED_METRICS.items():
+        old, new = baseline.get(metric), results.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > threshold * slack:
+            regressions.append((metric, old, new, change))
+    return regressions
+
+
+def print_core_results(results, baseline=None):
+    print(f"{'metric':<36} {'value':>14} {'baseline':>14} {'change':>8}")
+    for metric, value in results.items():
+        old = (baseline or {}).get(metric)
+        old_text = f"{old:,.1f}" if old is not None else ''
+        change = f"{(value - old) / old * 100:+.1f}%" if old else ''
+        print(f"{metric:<36} {value:>14,.1f} {old_text:>14} {change:>8}")
@@ -0,0 +1,171 @@
+"""Per-credential circuit breakers for the follower fan-out path.
+
+A follower whose key is rejected (invalid key, IP not whitelisted, missing
+credentials) is quarantined after ``threshold`` consecutive credential failures.
+Quarantined followers are skipped by the engine until a background probe
+authenticates successfully. Transient errors (timeouts, 5xx, margin rejects)
+neither trip nor reset a breaker's failure count.
+"""
+
+import threading
+import time
+
+from . import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+
+# Response fragments that mean the credential itself is unusable
+AUTH_ERRORS = ('invalidapikey', 'unauthorizedapiaccess', 'invalid_api_key', 'unauthorized')
+IP_ERRORS = ('ip_blocked', 'ip_not_whitelisted')
+
+
+def classify_failure(status_code, body=''):
+    """Return 'ip_whitelist', 'auth' or None (not a credential failure)"""
+    text = (body or '').lower()
+    if any(code in text for code in IP_ERRORS):
+        return 'ip_whitelist'
+    if status_code in (401, 403) or any(code in text for code in AUTH_ERRORS):
+        return 'auth'
+    return None
+
+
+class CredentialBreaker:
+    def __init__(self, key, threshold=3):
+        self.key = key
+        self.threshold = threshold
+        self.state = CLOSED
+        self.failures = 0
+        self.reason = None
+        self.opened_at = None
+        self.last_probe = None
+        self.lock = threading.Lock()  # fan-out workers report the same credential concurrently
+
+    def allow(self):
+        """True while the credential may be used for orders"""
+        return self.state == CLOSED
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.state = CLOSED
+            self.reason = None
+            self.opened_at = None
+
+    def record_failure(self, reason):
+        """Count a credential failure; True if this one tripped the breaker"""
+        with self.lock:
+            self.failures += 1
+            if self.failures < self.threshold:
+                return False
+            return self._trip(reason)
+
+    def trip(self, reason):
+        with self.lock:
+            return self._trip(reason)
+
+    def _trip(self, reason):
+        opened = self.state != OPEN
+        if opened:
+            self.opened_at = time.time()
+        self.state = OPEN
+        self.reason = reason
+        return opened
+
+    def get_status(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'reason': self.reason,
+                'failures': self.failures,
+                'opened_at': self.opened_at
+            }
+
+
+class BreakerRegistry:
+    """Holds one breaker per credential and probes the open ones in the background"""
+
+    def __init__(self, probe=None, threshold=3, probe_interval=30.0):
+        self.probe = probe
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self.breakers = {}
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self, key):
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            with self.lock:
+                breaker = self.breakers.setdefault(key, CredentialBreaker(key, self.threshold))
+        return breaker
+
+    def allow(self, key):
+        breaker = self.breakers.get(key)
+        return breaker is None or breaker.allow()
+
+    def record_response(self, key, status_code, body=''):
+        """Update a breaker from an HTTP response to a signed request"""
+        breaker = self.get(key)
+        if 200 <= status_code < 300:
+            breaker.record_success()
+            return
+        reason = classify_failure(status_code, body)
+        if reason:
+            metrics.auth_failures.inc(reason)
+            if breaker.record_failure(reason):
+                print(f"🚫 Quarantined {key}: {reason} ({breaker.failures} consecutive failures)")
+
+    def trip(self, key, reason):
+        self.get(key).trip(reason)
+
+    def seed_from_validation(self, results):
+        """Quarantine accounts that failed a fleet validation run up front"""
+        for key, result in results.items():
+            if result['status'] == 'NO_CREDENTIALS':
+                self.trip(key, 'no_credentials')
+            elif not result['working']:
+                self.trip(key, 'auth')
+
+    def open_keys(self):
+        return [key for key, breaker in list(self.breakers.items()) if not breaker.allow()]
+
+    def probe_open(self):
+        """Probe each quarantined credential once and close the ones that recover"""
+        recovered = []
+        for key in self.open_keys():
+            breaker = self.breakers[key]
+            if breaker.reason == 'no_credentials' or self.probe is None:
+                continue
+            breaker.last_probe = time.time()
+            try:
+                ok = self.probe(key)
+            except Exception as e:
+                print(f"⚠️ Probe error for {key}: {str(e)}")
+                ok = False
+            if ok:
+                breaker.record_success()
+                recovered.append(key)
+                print(f"✅ {key} passed probe - back in fan-out")
+        return recovered
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='breaker-probe', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.probe_interval):
+            self.probe_open()
+
+    def get_status(self):
+        return {key: breaker.get_status() for key, breaker in list(self.breakers.items())}
@@ -0,0 +1,208 @@
+"""Micro-batching of partial broker fills.
+
+A large broker order can fill in many partials. Copying each one on its own
+means a round of follower orders per partial, and lot-size rounding on each
+small piece often clamps it up to the minimum lot. ``FillCoalescer`` holds
+the partials of one broker order for a short window (a few milliseconds)
+from the first one, then passes them on as a single trade: the summed size
+at the size-weighted average price. Rounding then happens once per window
+instead of once per partial.
+
+Each broker order id has its own window, and every window that is due is
+handed to the sink in one call. A fill that reports nothing left unfilled
+closes its window at once. A merged trade carries the earliest
+``received_at`` of its partials, so the staleness budget still counts from
+the first one.
+
+Partials are deduplicated on their own ``fill_id`` before they are merged,
+through ``seen`` (the engine's dedup window, which is also snapshotted), so a
+fill redelivered after a reconnect or a restart is dropped however the replay
+groups the partials into windows. The engine dedups merged trades on
+(master id, order id, fill id), so each window's ``fill_id`` is derived from
+the partials in it: the partial's own id for a single fill, otherwise a hash
+of the partials' ids (or of time, size and price for partials without one).
+The same window therefore gets the same id every time it is built; two
+windows whose partials have neither a fill id nor a timestamp cannot be told
+from a redelivery and are copied once.
+
+Windows reach the sink one at a time and in the order they closed, so two
+windows of one order are never copied out of order.
+"""
+
+import hashlib
+import heapq
+import threading
+import time
+
+
+def partial_id(trade_data):
+    """Identity of one partial for the window id"""
+    if trade_data.get('fill_id') is not None:
+        return str(trade_data['fill_id'])
+    stamp = trade_data.get('created_at') or trade_data.get('timestamp')
+    price = trade_data.get('average_fill_price') or trade_data.get('price')
+    return f"{stamp}:{trade_data['size']}:{price}"
+
+
+def window_id(partial_ids):
+    if len(partial_ids) == 1:
+        return partial_ids[0]
+    return 'window-' + hashlib.sha1('|'.join(sorted(partial_ids)).encode()).hexdigest()[:16]
+
+
+class FillCoalescer:
+    def __init__(self, sink, window=0.005, max_fills=100, seen=None, max_seen=100000):
+        self.sink = sink  # callable taking a list of merged trades, e.g. CopyEngine.process_broker_trades
+        self.window = window
+        self.max_fills = max_fills  # a window with this many partials is flushed without waiting
+        self.seen = seen or self._mark_seen  # callable taking a partial's dedup key; False for a duplicate
+        self.max_seen = max_seen
+        self.seen_fills = {}  # (master id, order id, fill id) -> None, oldest first, without an engine
+        self.pending = {}  # (master id, order id) -> (due, merged trade, partial ids)
+        self.deadlines = []  # heap of (due, key)
+        self.stats = {'fills': 0, 'duplicates': 0, 'trades': 0, 'flushes': 0}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.tickets = 0  # handed out under lock as windows close
+        self.serving = 0  # ticket whose windows go to the sink next
+        self.turn = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _mark_seen(self, key):
+        if key in self.seen_fills:
+            return False
+        self.seen_fills[key] = None
+        while len(self.seen_fills) > self.max_seen:
+            del self.seen_fills[next(iter(self.seen_fills))]
+        return True
+
+    def add(self, trade_data):
+        """Buffer one fill; flushes at once if it completes its broker order"""
+        order_id = trade_data.get('order_id')
+        if order_id is None:
+            self.sink([trade_data])  # nothing to merge on
+            return
+        key = (trade_data.get('master_id'), order_id)
+        size = float(trade_data['size'])
+        price = float(trade_data.get('average_fill_price') or trade_data.get('price') or 0)
+        received_at = trade_data.get('received_at') or time.time()
+        with self.lock:
+            self.stats['fills'] += 1
+            if trade_data.get('fill_id') is not None and not self.seen(key + (trade_data['fill_id'],)):
+                self.stats['duplicates'] += 1
+                return
+            entry = self.pending.get(key)
+            if entry is None:
+                merged = dict(trade_data, size=size, average_fill_price=price, received_at=received_at,
+                              fill_count=1)
+                merged.pop('fill_id', None)
+                due = time.monotonic() + self.window
+                entry = self.pending[key] = (due, merged, [])
+                heapq.heappush(self.deadlines, (due, key))
+                self.wakeup.notify()
+            else:
+                merged = entry[1]
+                total = merged['size'] + size
+                if total:
+                    merged['average_fill_price'] = (merged['average_fill_price'] * merged['size']
+                                                    + price * size) / total
+                merged['size'] = total
+                merged['fill_count'] += 1
+                merged['received_at'] = min(merged['received_at'], received_at)
+                for field in ('unfilled_size', 'created_at', 'timestamp'):
+                    if trade_data.get(field) is not None:
+                        merged[field] = trade_data[field]
+            entry[2].append(partial_id(trade_data))
+            done = trade_data.get('unfilled_size') is not None and float(trade_data['unfilled_size']) == 0
+            if not done and merged['fill_count'] < self.max_fills:
+                return
+            trades = [self._close(key)]
+            ticket = self._ticket()
+        self._emit(trades, ticket)
+
+    def _close(self, key):
+        """Take a window out of pending with its id set; caller holds the lock"""
+        _, merged, partial_ids = self.pending.pop(key)
+        merged['fill_id'] = window_id(partial_ids)
+        return merged
+
+    def _due(self, now):
+        """Pop every window due by now; caller holds the lock"""
+        due = []
+        while self.deadlines and self.deadlines[0][0] <= now:
+            deadline, key = heapq.heappop(self.deadlines)
+            entry = self.pending.get(key)
+            # A window closed early leaves its deadline behind; it must not cut a newer window short
+            if entry is not None and entry[0] == deadline:
+                due.append(self._close(key))
+        return due
+
+    def _ticket(self):
+        """Place in the sink order for windows just taken out of pending; caller holds the lock"""
+        ticket = self.tickets
+        self.tickets += 1
+        return ticket
+
+    def _emit(self, trades, ticket):
+        """Hand windows to the sink once every earlier ticket has been served"""
+        with self.turn:
+            while self.serving != ticket:
+                self.turn.wait()
+        try:
+            with self.lock:
+                self.stats['trades'] += len(trades)
+                self.stats['flushes'] += 1
+            self.sink(trades)
+        finally:
+            with self.turn:
+                self.serving += 1
+                self.turn.notify_all()
+
+    def flush(self):
+        """Hand every buffered window to the sink now; returns the number of trades"""
+        with self.lock:
+            trades = [self._close(key) for key in list(self.pending)]
+            self.deadlines = []
+            if not trades:
+                return 0
+            ticket = self._ticket()
+        self._emit(trades, ticket)
+        return len(trades)
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, pending=len(self.pending))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='coalesce', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self.lock:
+            self.wakeup.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self.lock:
+                if self._stop.is_set():
+                    break
+                now = time.monotonic()
+                due = self._due(now)
+                if not due:
+                    timeout = self.deadlines[0][0] - now if self.deadlines else None
+                    self.wakeup.wait(timeout)
+                    continue
+                ticket = self._ticket()
+            try:
+                self._emit(due, ticket)
+            except Exception as e:
+                print(f"⚠️ Coalesced fill dispatch failed: {str(e)}")
@@ -0,0 +1,81 @@
+"""Supabase access for broker and follower credentials.
+
+``supabase`` and ``dotenv`` are imported inside the functions that need them so
+commands that never touch the database do not pay for their import.
+"""
+
+import os
+
+from .profiling import phase
+
+DEFAULT_SUPABASE_URL = 'https://urjgxetnqogwryhpafma.supabase.co'
+
+
+def load_env():
+    """Load variables from a local .env file if python-dotenv is available"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def get_client():
+    """Create a Supabase client from the service role key"""
+    load_env()
+
+    supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL', DEFAULT_SUPABASE_URL)
+    supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+
+    if not supabase_key:
+        print("❌ SUPABASE_SERVICE_ROLE_KEY not found in environment")
+        return None
+
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+
+def get_credentials_from_db():
+    """Fetch API credentials from Supabase database"""
+    print("🔍 Fetching API credentials from database...")
+
+    try:
+        supabase = get_client()
+        if supabase is None:
+            return None
+
+        # Get broker accounts
+        print("📊 Getting broker accounts...")
+        try:
+            with phase('db_io', 'broker_accounts'):
+                response = supabase.table('broker_accounts').select('*').eq('is_active', True).eq('is_verified', True).execute()
+            broker_accounts = response.data
+        except Exception as e:
+            print(f"❌ Error fetching broker accounts: {e}")
+            return None
+
+        if not broker_accounts or len(broker_accounts) == 0:
+            print("⚠️ No active broker accounts found")
+            return None
+
+        # Get followers
+        print("👥 Getting followers...")
+        try:
+            with phase('db_io', 'followers'):
+                response = supabase.table('followers').select('*').eq('account_status', 'active').execute()
+            followers = response.data
+        except Exception as e:
+            print(f"❌ Error fetching followers: {e}")
+            return None
+
+        credentials = {
+            'brokers': broker_accounts,
+            'followers': followers or []
+        }
+
+        print(f"✅ Found {len(broker_accounts)} broker account(s) and {len(followers or [])} follower(s)")
+        return credentials
+
+    except Exception as e:
+        print(f"❌ Error connecting to database: {str(e)}")
+        return None
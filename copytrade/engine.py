@@ -0,0 +1,899 @@
+"""Python copy engine: fans broker fills out to follower accounts.
+
+This mirrors ``services/DeltaExchangeCopyTrader.js`` (dedup by broker order id,
+broker position tracking, follower sizing, reduce-only closes) without the
+WebSocket layer; whatever feeds fills calls ``process_broker_trade`` and
+``process_position_change``. Follower orders run on keyed serial lanes: each
+follower (or each follower and symbol, with ``lane_by='symbol'``) keeps its
+orders in FIFO order while different lanes run in parallel up to
+``max_workers``. Lanes holding closes or reduce-only orders get a worker
+before lanes holding only opening orders, and position resyncs come last.
+Followers whose credentials are quarantined by their circuit breaker are
+skipped instead of occupying a slot. With a ``StalenessBudget``,
+signals older than its budget are dropped, converted to limit orders or
+flagged just before they are sent. ``warm_up()`` opens every follower
+connection before the first fill, and ``keepalive_interval`` keeps idle ones
+open.
+
+The follower dict is replaced rather than mutated once the engine is running,
+so ``apply_follower_changes`` (fed by ``FollowerSync``) can swap configs in
+while trades are being fanned out.
+
+One engine can serve several masters. Trades and position updates carry a
+``master_id`` (defaulting to the engine's own broker), and a
+``RelationshipIndex`` maps each master straight to its followers, so fan-out
+cost follows that master's follower count rather than the whole book.
+
+With an ``ExposureMatrix``, the filled part of every copied order updates
+the follower x product exposure it keeps, so cross-follower totals need no
+REST calls. Fills of resting orders are not reported back, so with an
+``exposure_resync_interval`` the followers' positions are reloaded into it
+that often. A
+``RiskGate`` checks each fan-out against per-follower limits in one pass
+before anything is queued, accepting, clipping or rejecting each order.
+Fills fed through ``process_broker_fill`` with a ``coalesce_window`` are
+merged per broker order id for that window, so an order that fills in many
+partials is copied a few times rather than once per partial.
+
+Trades are deduplicated on (master id, broker order id), or on (master id,
+broker order id, fill id) when they carry a fill id. With coalescing, each
+partial is first checked against the same dedup window by its own fill id,
+and every merged window carries an id derived from its partials, so a
+redelivered fill is dropped however the replay groups it.
+
+``export_state``/``restore_state`` capture what a restart would otherwise lose
+(broker positions, the dedup window, orders still queued in lanes) for
+``copytrade.snapshot``; ``reconcile_positions`` checks restored positions with
+one REST read per master.
+"""
+
+import threading
+import time
+
+from . import metrics
+from .api import BATCH_ORDER_LIMIT, BATCH_ORDER_TYPES, DeltaExchangeAPITester
+from .breaker import BreakerRegistry
+from .coalesce import FillCoalescer
+from .lanes import CLOSE, MAINTENANCE, OPEN, KeyedExecutor
+from .relationships import RelationshipIndex
+from .staleness import event_timestamp
+from .warmup import KeepAlivePinger, warm_clients
+
+
+def get_follower_name(config):
+    return config.get('follower_name') or config.get('name')
+
+
+def get_broker_name(config):
+    return config.get('broker_name') or config.get('account_name') or config.get('name') or 'broker'
+
+
+def get_master_id(config):
+    """Identifier trades from this broker account are routed by"""
+    return config.get('id') or get_broker_name(config)
+
+
+def calculate_follower_size(broker_size, follower_config, price=None, balance_ratio=None):
+    """Size a follower order from a broker fill
+
+    ``balance_ratio`` is follower equity / broker equity, used by '% balance'.
+    """
+    copy_mode = follower_config.get('copy_mode') or 'multiplier'
+
+    if copy_mode == 'multiplier':
+        follower_size = broker_size * float(follower_config.get('multiplier') or 1.0)
+    elif copy_mode == 'fixed_amount':
+        fixed_amount = float(follower_config.get('fixed_amount') or 10)
+        follower_size = fixed_amount / float(price or 1)
+    elif copy_mode in ('fixed_lot', 'fixed lot'):
+        follower_size = float(follower_config.get('fixed_lot') or 0.001)
+    elif copy_mode in ('% balance', 'percentage') and balance_ratio is not None:
+        percentage = float(follower_config.get('percentage') or 100)
+        follower_size = broker_size * balance_ratio * percentage / 100
+    else:
+        # Default to very small fixed lot for safety
+        follower_size = 0.001
+
+    # Apply minimum and maximum constraints
+    min_lot_size = float(follower_config.get('min_lot_size') or 0.001)
+    max_lot_size = float(follower_config.get('max_lot_size') or 1.0)
+    return max(min_lot_size, min(max_lot_size, follower_size))
+
+
+def filled_size(order, placed):
+    """How much of a placed order has filled, from the exchange's response
+
+    A resting limit order with no fill report counts as unfilled; the
+    periodic exposure resync picks it up once it fills.
+    """
+    unfilled = placed.get('unfilled_size')
+    if unfilled is not None and unfilled != '':
+        return max(0.0, float(placed.get('size') or order['size']) - float(unfilled))
+    if placed.get('state') == 'closed' or order['order_type'] == 'market_order':
+        return order['size']
+    return 0.0
+
+
+class CopyEngine:
+    def __init__(self, broker_config, follower_configs, environment='production',
+                 max_workers=8, breakers=None, products=None, transport='http1', hedger=None,
+                 balances=None, max_balance_age=300, lane_by='follower', staleness=None,
+                 keepalive_interval=None, max_processed=100000, exposure=None, risk=None,
+                 coalesce_window=None, exposure_resync_interval=None):
+        self.broker_config = broker_config
+        self.environment = environment
+        self.transport = transport
+        self.hedger = hedger  # optional Hedger for position/balance reads
+        self.balances = balances  # optional BalanceService for '% balance' sizing
+        self.max_balance_age = max_balance_age
+        self.broker_name = get_broker_name(broker_config)
+        self.master_id = get_master_id(broker_config)  # default master for trades without one
+        self.masters = {}  # master id -> broker name
+        self.master_clients = {}  # master id -> DeltaExchangeAPITester, when credentials are known
+        self.products = products  # optional ProductIndex for exchange lot bounds
+        self.staleness = staleness  # optional StalenessBudget for old signals
+        self.exposure = exposure  # optional ExposureMatrix updated from copied fills
+        self.exposure_resync_interval = exposure_resync_interval  # seconds between position reloads into it
+        self.risk = risk  # optional RiskGate applied to each fan-out before dispatch
+        self.coalescer = None
+        if coalesce_window:
+            self.coalescer = FillCoalescer(self.process_broker_trades, window=coalesce_window,
+                                           seen=self._mark_partial)
+        self._stop = threading.Event()
+        self._resync_thread = None
+        self.pinger = None
+        if keepalive_interval:
+            self.pinger = KeepAlivePinger(self.get_clients, interval=keepalive_interval,
+                                          on_response=self._record_ping)
+
+        # Trading state tracking
+        self.followers = {}  # follower name -> {'config': row, 'client': DeltaExchangeAPITester}
+        self.relationships = RelationshipIndex()
+        self.broker_positions = {}  # master id -> {symbol: size}
+        self.processed_orders = {}  # (master id, broker order id) -> None, oldest first
+        self.max_processed = max_processed
+        self.state_lock = threading.RLock()  # guards positions, the dedup window and fan-out for snapshots
+
+        self.handlers = {}
+        self.stats = {
+            'total_trades': 0,
+            'successful_copies': 0,
+            'failed_copies': 0,
+            'skipped_quarantined': 0,
+            'batched_orders': 0,
+            'risk_rejected': 0,
+            'total_volume': 0.0,
+            'start_time': time.time()
+        }
+        self.stats_lock = threading.Lock()
+
+        self.lane_by = lane_by  # 'follower' or 'symbol' (one lane per follower and symbol)
+        self.pool = KeyedExecutor(max_workers=max_workers, thread_name_prefix='copy')
+        self.breakers = breakers or BreakerRegistry(probe=self.probe_follower)
+
+        self.add_master(broker_config)
+        for config in follower_configs:
+            self.add_follower(config)
+
+        # Read at scrape time, so they cost nothing on the order path
+        metrics.queue_depth.labels(self.broker_name).set_function(self.pool.pending)
+        metrics.followers_active.labels(self.broker_name).set_function(lambda: len(self.followers))
+
+    def add_master(self, broker_config):
+        """Register a broker account whose trades this engine copies"""
+        master_id = get_master_id(broker_config)
+        self.masters[master_id] = get_broker_name(broker_config)
+        if broker_config.get('api_key') and broker_config.get('api_secret'):
+            self.master_clients[master_id] = self.make_client(broker_config)
+            if self.balances is not None:
+                self.balances.add_account(self.masters[master_id], self.master_clients[master_id])
+        return master_id
+
+    def follower_masters(self, config):
+        """Masters a follower row subscribes to; rows without one follow the engine's broker"""
+        masters = config.get('master_ids') or [config.get('master_broker_account_id') or self.master_id]
+        return frozenset(masters)
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def emit(self, event, data):
+        for handler in self.handlers.get(event, []):
+            try:
+                handler(data)
+            except Exception as e:
+                print(f"⚠️ Handler for {event} failed: {str(e)}")
+
+    def make_client(self, config):
+        """Exchange client for an account row with credentials"""
+        return DeltaExchangeAPITester(config['api_key'], config['api_secret'], self.environment,
+                                      self.transport, hedger=self.hedger)
+
+    def _make_follower(self, config, previous=None):
+        name = get_follower_name(config)
+        # Keep the existing client (and its connections) unless the credentials changed
+        if previous is not None and previous['client'] is not None and \
+                previous['config'].get('api_key') == config.get('api_key') and \
+                previous['config'].get('api_secret') == config.get('api_secret'):
+            return {'config': config, 'client': previous['client']}
+
+        client = None
+        if config.get('api_key') and config.get('api_secret'):
+            client = self.make_client(config)
+        else:
+            self.breakers.trip(name, 'no_credentials')
+        if self.balances is not None and client is not None:
+            self.balances.add_account(name, client)
+        return {'config': config, 'client': client}
+
+    def add_follower(self, config):
+        name = get_follower_name(config)
+        followers = dict(self.followers)
+        followers[name] = self._make_follower(config, followers.get(name))
+        if self.risk is not None:
+            self.risk.set_limits(name, config)
+        self.followers = followers
+        self.relationships.set_masters(name, self.follower_masters(config))
+
+    def remove_follower(self, name):
+        followers = dict(self.followers)
+        if followers.pop(name, None) is None:
+            return
+        self.relationships.remove_follower(name)
+        self.followers = followers
+        if self.balances is not None:
+            self.balances.remove_account(name)
+        if self.exposure is not None:
+            self.exposure.remove_follower(name)
+        if self.risk is not None:
+            self.risk.remove(name)
+
+    def apply_follower_changes(self, added, updated, removed):
+        """Apply a follower config diff in one swap; in-flight orders keep the old config"""
+        followers = dict(self.followers)
+        for config in removed:
+            name = get_follower_name(config)
+            self.relationships.remove_follower(name)
+            if followers.pop(name, None) is not None and self.balances is not None:
+                self.balances.remove_account(name)
+            if self.exposure is not None:
+                self.exposure.remove_follower(name)
+            if self.risk is not None:
+                self.risk.remove(name)
+        for config in list(added) + list(updated):
+            name = get_follower_name(config)
+            followers[name] = self._make_follower(config, followers.get(name))
+            if self.risk is not None:
+                self.risk.set_limits(name, config)
+        # New followers are in the dict before they are linked, so fan-out never finds a name without a client
+        self.followers = followers
+        for config in list(added) + list(updated):
+            self.relationships.set_masters(get_follower_name(config), self.follower_masters(config))
+        print(f"🔄 Followers synced: +{len(added)} ~{len(updated)} -{len(removed)} ({len(followers)} active)")
+
+    def get_clients(self):
+        return {name: follower['client'] for name, follower in list(self.followers.items())
+                if follower['client'] is not None}
+
+    def _record_ping(self, name, response):
+        self.breakers.record_response(name, response.status_code, response.text)
+
+    def warm_up(self):
+        """Connect and authenticate every follower session; returns {name: (response, seconds)}"""
+        started = time.perf_counter()
+        results = warm_clients(self.get_clients(), on_response=self._record_ping)
+        ok = sum(1 for response, _ in results.values() if response is not None and response.status_code == 200)
+        print(f"🔥 Warmed {ok}/{len(results)} follower sessions in {time.perf_counter() - started:.2f}s")
+        return results
+
+    def probe_follower(self, name):
+        """Cheap authenticated call used to release a quarantined follower"""
+        client = self.followers[name]['client']
+        response = client.request('GET', '/v2/profile')
+        return response.status_code == 200
+
+    def get_balance_ratio(self, name, master_id=None):
+        """Follower equity / broker equity from cached snapshots, or None if unknown or stale"""
+        if self.balances is None:
+            return None
+        broker_name = self.masters.get(master_id or self.master_id, self.broker_name)
+        broker_equity = self.balances.get_equity(broker_name, self.max_balance_age)
+        follower_equity = self.balances.get_equity(name, self.max_balance_age)
+        if not broker_equity or follower_equity is None:
+            metrics.cache_lookups.inc('balances', 'miss')
+            return None
+        metrics.cache_lookups.inc('balances', 'hit')
+        return follower_equity / broker_equity
+
+    def lane_key(self, name, symbol):
+        """Orders sharing a lane key are placed strictly in submission order"""
+        return (name, symbol) if self.lane_by == 'symbol' else name
+
+    def _bump(self, stat, amount=1):
+        with self.stats_lock:
+            self.stats[stat] += amount
+
+    def process_broker_trade(self, trade_data):
+        """Queue follower orders for a broker fill; returns the submitted futures"""
+        return self.process_broker_trades([trade_data])
+
+    def process_broker_fill(self, trade_data):
+        """Feed one (possibly partial) broker fill; with coalesce_window, partials of one order are merged first"""
+        if self.coalescer is None:
+            return self.process_broker_trades([trade_data])
+        self.coalescer.add(trade_data)
+        return []
+
+    def process_broker_trades(self, trades):
+        """Queue follower orders for fills that arrived together; returns the submitted futures
+
+        Each follower's orders for one lane go out as one task, so orders for
+        the same product can share a batch request.
+        """
+        # Held through to the submit, so a snapshot never sees a fill marked processed but not yet queued
+        with self.state_lock:
+            return self._fan_out(trades)
+
+    def _fan_out(self, trades):
+        fanout_started = time.perf_counter()
+        fresh = []
+        received_at = time.time()
+        for trade_data in trades:
+            master_id = trade_data.get('master_id') or self.master_id
+            trade_data = dict(trade_data, master_id=master_id,
+                              received_at=trade_data.get('received_at') or received_at,
+                              exchange_ts=event_timestamp(trade_data))
+            order_id = trade_data.get('order_id')
+            symbol = trade_data['symbol']
+            side = trade_data['side']
+            size = float(trade_data['size'])
+            # Fills of one broker order that arrive separately carry their own fill id
+            fill_id = trade_data.get('fill_id')
+            key = (master_id, order_id) if fill_id is None else (master_id, order_id, fill_id)
+
+            with self.state_lock:
+                # Skip if already processed
+                if not self._mark_processed(key):
+                    continue
+
+                # Update broker position tracking
+                positions = self.broker_positions.setdefault(master_id, {})
+                positions[symbol] = positions.get(symbol, 0) + (size if side == 'buy' else -size)
+            self._bump('total_trades')
+
+            # A backlog of expired signals should not occupy the lanes at all
+            if self.staleness is not None and self.staleness.expired(trade_data):
+                self.emit('signal_stale', {'follower': None, 'symbol': symbol, 'broker_order_id': order_id,
+                                           'age': self.staleness.age(trade_data), 'action': 'drop'})
+                continue
+            fresh.append(trade_data)
+
+        # Only the followers of masters that actually traded are visited
+        by_master = {}
+        for trade_data in fresh:
+            by_master.setdefault(trade_data['master_id'], []).append(trade_data)
+        per_follower = {}
+        for master_id, master_trades in by_master.items():
+            for name in self.relationships.followers_of(master_id):
+                per_follower.setdefault(name, []).extend(master_trades)
+
+        proposed = []
+        followers = self.followers
+        for name, follower_trades in per_follower.items():
+            follower = followers.get(name)
+            if follower is None:
+                continue
+            if not self.breakers.allow(name):
+                self._bump('skipped_quarantined')
+                continue
+            for trade_data in follower_trades:
+                proposed.append((name, self.build_follower_order(name, follower['config'], trade_data)))
+
+        if self.risk is not None and proposed:
+            proposed = self.apply_risk(proposed)
+
+        lanes = {}
+        for name, order in proposed:
+            lanes.setdefault((name, self.lane_key(name, order['symbol'])), []).append(order)
+        futures = []
+        for (name, key), orders in lanes.items():
+            client = followers[name]['client']
+            priority = self.order_priority(name, orders)
+            if len(orders) == 1:
+                futures.append(self.pool.submit_at(priority, key, self.copy_order, name, orders[0], client))
+            else:
+                futures.append(self.pool.submit_at(priority, key, self.copy_orders, name, orders, client))
+        if fresh:
+            metrics.fanout_seconds.observe(self.broker_name, value=time.perf_counter() - fanout_started)
+        return futures
+
+    def order_priority(self, name, orders):
+        """CLOSE when every order is reduce-only or shrinks the follower's tracked position, else OPEN"""
+        for order in orders:
+            if order.get('reduce_only'):
+                continue
+            if self.exposure is None:
+                return OPEN
+            position = self.exposure.position(name, order['symbol'])
+            signed = order['size'] if order['side'] == 'buy' else -order['size']
+            if position * signed >= 0 or abs(signed) > abs(position):
+                return OPEN
+        return CLOSE
+
+    def apply_risk(self, proposed):
+        """Run the risk gate over one fan-out; returns the orders to send, clipped where needed"""
+        allowed = []
+        for (name, order), (decision, size, reason) in zip(proposed, self.risk.evaluate(proposed)):
+            if decision == 'accept':
+                self.risk.reserve(name, order)
+                allowed.append((name, order))
+                continue
+            metrics.copies.inc(self.broker_name, f"risk_{decision}")
+            print(f"🚫 Risk {decision} for {name}: {order['symbol']} {order['side']} "
+                  f"{order['size']} -> {size} ({reason})")
+            self.emit('risk_' + decision, {'follower': name, 'symbol': order['symbol'], 'side': order['side'],
+                                            'size': order['size'], 'allowed_size': size, 'reason': reason,
+                                            'broker_order_id': order.get('broker_order_id')})
+            if decision == 'clip':
+                order = dict(order, size=size, clipped_from=order['size'])
+                self.risk.reserve(name, order)
+                allowed.append((name, order))
+            else:
+                self._bump('risk_rejected')
+        return allowed
+
+    def _mark_processed(self, key):
+        """Record a broker order in the dedup window; False if it was already there"""
+        if key in self.processed_orders:
+            return False
+        self.processed_orders[key] = None
+        while len(self.processed_orders) > self.max_processed:
+            del self.processed_orders[next(iter(self.processed_orders))]
+        return True
+
+    def _mark_partial(self, key):
+        """Dedup one partial fill ahead of coalescing; kept apart from the merged trades' keys"""
+        with self.state_lock:
+            return self._mark_processed(('partial',) + key)
+
+    def build_follower_order(self, name, config, trade_data):
+        symbol = trade_data['symbol']
+        size = float(trade_data['size'])
+        price = trade_data.get('average_fill_price')
+        order_type = trade_data.get('order_type') or 'market_order'
+        return {
+            'symbol': symbol,
+            'side': trade_data['side'],
+            'size': self.apply_lot_bounds(symbol, calculate_follower_size(
+                size, config, price, self.get_balance_ratio(name, trade_data.get('master_id'))
+            )),
+            'order_type': order_type,
+            'limit_price': trade_data.get('limit_price') if order_type == 'limit_order' else None,
+            'reduce_only': bool(trade_data.get('reduce_only')),
+            'broker_order_id': trade_data.get('order_id'),
+            'master_id': trade_data.get('master_id'),
+            'broker_size': size,
+            'broker_price': price,
+            'received_at': trade_data.get('received_at'),
+            'exchange_ts': trade_data.get('exchange_ts')
+        }
+
+    def check_staleness(self, name, order):
+        """Apply the staleness budget at send time; returns the order to send or None"""
+        if self.staleness is None:
+            return order
+        checked = self.staleness.check(order)
+        if checked is None or checked.get('stale'):
+            action = 'drop' if checked is None else ('limit' if checked['order_type'] != order['order_type'] else 'flag')
+            metrics.copies.inc(self.broker_name, f"stale_{action}")
+            print(f"⚠️ Stale signal for {name}: {order['symbol']} {order['side']} "
+                  f"{order['signal_age']:.2f}s old ({action})")
+            self.emit('signal_stale', {'follower': name, 'symbol': order['symbol'],
+                                       'broker_order_id': order.get('broker_order_id'),
+                                       'age': order['signal_age'], 'action': action})
+        return checked
+
+    def apply_lot_bounds(self, symbol, size):
+        """Clamp a size to the exchange's lot bounds when the product is indexed"""
+        if self.products is None:
+            return size
+        if symbol not in self.products:
+            metrics.cache_lookups.inc('products', 'miss')
+            return size
+        metrics.cache_lookups.inc('products', 'hit')
+        # No single order can be larger than the largest position the exchange allows
+        return max(self.products.get_min_lot(symbol), min(self.products.get_position_limit(symbol), size))
+
+    def copy_order(self, name, order, client=None):
+        """Place one follower order and record the outcome"""
+        client = client or self.followers[name]['client']
+        try:
+            checked = self.check_staleness(name, order)
+            if checked is None:
+                return None
+            return self._send_order(name, checked, client)
+        finally:
+            self._release_risk(name, [order])
+
+    def _release_risk(self, name, orders):
+        """Hand back the risk gate's reservations once orders are placed or dropped"""
+        if self.risk is not None:
+            for order in orders:
+                self.risk.release(name, order)
+
+    def _send_order(self, name, order, client):
+        try:
+            response = client.place_order(
+                order['symbol'], order['side'], order['size'], order['order_type'],
+                order['limit_price'], order['reduce_only']
+            )
+        except Exception as e:
+            # Network errors say nothing about the credential; leave the breaker alone
+            print(f"❌ Order failed for {name}: {str(e)}")
+            self._bump('failed_copies')
+            metrics.copies.inc(self.broker_name, 'failed')
+            return None
+
+        self.breakers.record_response(name, response.status_code, response.text)
+        result = response.json() if response.content else {}
+
+        if response.status_code == 200 and result.get('success'):
+            return self._record_copy(name, order, result.get('result') or {})
+
+        print(f"❌ Order failed for {name}: {result.get('error', response.text)}")
+        self._bump('failed_copies')
+        metrics.copies.inc(self.broker_name, 'failed')
+        return None
+
+    def copy_orders(self, name, orders, client=None):
+        """Place several orders for one follower, batching same-product limit orders
+
+        Orders the batch endpoint cannot take go out one by one, as do the
+        items of a batch that failed or came back with an error.
+        """
+        try:
+            return self._copy_orders(name, orders, client or self.followers[name]['client'])
+        finally:
+            self._release_risk(name, orders)
+
+    def _copy_orders(self, name, orders, client):
+        results = [None] * len(orders)
+        groups = {}
+        orders = [self.check_staleness(name, order) for order in orders]
+        for i, order in enumerate(orders):
+            if order is None:
+                continue
+            if order['order_type'] in BATCH_ORDER_TYPES:
+                groups.setdefault(order['symbol'], []).append(i)
+            else:
+                results[i] = self._send_order(name, order, client)
+
+        for symbol, indexes in groups.items():
+            product_id = self.products.get_product_id(symbol) if self.products is not None and symbol in self.products else None
+            for start in range(0, len(indexes), BATCH_ORDER_LIMIT):
+                chunk = indexes[start:start + BATCH_ORDER_LIMIT]
+                if len(chunk) == 1:
+                    results[chunk[0]] = self._send_order(name, orders[chunk[0]], client)
+                    continue
+                for i, result in zip(chunk, self._place_batch(name, client, symbol, product_id,
+                                                              [orders[i] for i in chunk])):
+                    # Items the batch did not accept are retried on their own
+                    results[i] = result if result is not None else self._send_order(name, orders[i], client)
+        return results
+
+    def _place_batch(self, name, client, symbol, product_id, orders):
+        """One batch request; returns per-order results with None for items to retry"""
+        try:
+            response = client.place_batch_orders(symbol, orders, product_id)
+        except Exception as e:
+            print(f"⚠️ Batch of {len(orders)} failed for {name}, retrying singly: {str(e)}")
+            return [None] * len(orders)
+
+        self.breakers.record_response(name, response.status_code, response.text)
+        result = response.json() if response.content else {}
+        items = result.get('result') if response.status_code == 200 and result.get('success') else None
+        if not isinstance(items, list) or len(items) != len(orders):
+            print(f"⚠️ Batch of {len(orders)} failed for {name}, retrying singly: {result.get('error', response.text)}")
+            return [None] * len(orders)
+
+        self._bump('batched_orders', len(orders))
+        results = []
+        for order, item in zip(orders, items):
+            if not item or item.get('error') or item.get('success') is False or not item.get('id'):
+                results.append(None)
+            else:
+                results.append(self._record_copy(name, order, item))
+        return results
+
+    def _record_copy(self, name, order, placed):
+        metrics.copies.inc(self.broker_name, 'success')
+        if order.get('received_at'):
+            metrics.signal_to_order_seconds.observe(self.broker_name, value=time.time() - order['received_at'])
+        self._bump('successful_copies')
+        self._bump('total_volume', order['size'])
+        realized_pnl = 0.0
+        filled = filled_size(order, placed)
+        if self.risk is not None and filled < order['size']:
+            # The resting remainder still counts against the limits until a resync finds it gone
+            self.risk.hold(name, placed.get('id'), order, order['size'] - filled)
+        if self.exposure is not None and filled:
+            realized_pnl = self.exposure.apply_fill(
+                name, order['symbol'], filled if order['side'] == 'buy' else -filled,
+                placed.get('average_fill_price') or order.get('broker_price')
+            )
+        if self.balances is not None:
+            # Realized PnL needs the entry prices the exposure matrix keeps; without one only fees apply
+            self.balances.apply_fill(name, commission=placed.get('paid_commission'), realized_pnl=realized_pnl)
+        self.emit('trade_copied', {
+            'follower': name,
+            'symbol': order['symbol'],
+            'side': order['side'],
+            'size': order['size'],
+            'order_id': placed.get('id'),
+            'timestamp': time.time(),
+            'broker_order_id': order['broker_order_id'],
+            'broker_size': order['broker_size'],
+            'broker_price': order['broker_price'],
+            'signal_age': order.get('signal_age'),
+            'stale': order.get('stale', False)
+        })
+        return placed
+
+    def get_follower_positions(self, name):
+        """Return {symbol: size} for a follower, or {} on error"""
+        try:
+            response = self.followers[name]['client'].get_positions()
+            self.breakers.record_response(name, response.status_code, response.text)
+            data = response.json()
+        except Exception as e:
+            print(f"Failed to get positions for {name}: {str(e)}")
+            return {}
+        return {
+            position['product_symbol']: float(position['size'])
+            for position in data.get('result') or []
+        }
+
+    def resync_exposure(self, names=None):
+        """Reload followers' positions into the exposure matrix at maintenance priority; returns the futures
+
+        Each read runs on the follower's lane after its queued orders, and
+        only when no close or opening order is waiting for a worker.
+        """
+        if self.exposure is None:
+            return []
+        followers = self.followers
+        return [
+            self.pool.submit_at(MAINTENANCE, self.lane_key(name, None), self._resync_follower, name)
+            for name in (followers if names is None else names)
+            if name in followers
+        ]
+
+    def _run_resync(self):
+        while not self._stop.wait(self.exposure_resync_interval):
+            try:
+                self.resync_exposure()
+            except Exception as e:
+                print(f"⚠️ Exposure resync failed: {str(e)}")
+
+    def _resync_follower(self, name):
+        client = self.followers[name]['client']
+        # Open orders first: one that fills in between is counted twice for a moment rather than missed
+        open_orders = as_of = None
+        if self.risk is not None and self.risk.holds(name):
+            as_of = time.time()
+            response = client.get_open_orders()
+            if response.status_code == 200:
+                open_orders = {
+                    str(order['id']): float(order.get('unfilled_size') or order.get('size') or 0)
+                    for order in response.json().get('result') or []
+                }
+        response = client.get_positions()
+        self.breakers.record_response(name, response.status_code, response.text)
+        if response.status_code != 200:
+            return None
+        result = response.json().get('result') or []
+        positions = {position['product_symbol']: float(position['size']) for position in result}
+        entry_prices = {position['product_symbol']: position.get('entry_price') for position in result}
+        self.exposure.load_positions(name, positions, entry_prices)
+        if open_orders is not None:
+            self.risk.settle_open_orders(name, open_orders, as_of)
+        return positions
+
+    def process_position_change(self, position_data):
+        """Close follower positions when the broker's position in a symbol goes flat"""
+        return self.process_position_changes([position_data])
+
+    def process_position_changes(self, changes):
+        """Handle several broker position updates at once, e.g. an exit across symbols
+
+        Each follower lane reads positions once for all the symbols that went
+        flat instead of once per symbol.
+        """
+        with self.state_lock:
+            return self._fan_out_closes(changes)
+
+    def _fan_out_closes(self, changes):
+        closed = {}  # follower name -> symbols to close
+        for position_data in changes:
+            master_id = position_data.get('master_id') or self.master_id
+            symbol = position_data['symbol']
+            new_size = float(position_data['size'])
+            with self.state_lock:
+                positions = self.broker_positions.setdefault(master_id, {})
+                old_size = positions.get(symbol, 0)
+                positions[symbol] = new_size
+            if new_size == 0 and old_size != 0:
+                print(f"🔄 Position closed detected: {symbol} (was {old_size})")
+                for name in self.relationships.followers_of(master_id):
+                    symbols = closed.setdefault(name, [])
+                    if symbol not in symbols:
+                        symbols.append(symbol)
+
+        futures = []
+        for name, symbols in closed.items():
+            if name not in self.followers:
+                continue
+            if not self.breakers.allow(name):
+                self._bump('skipped_quarantined')
+                continue
+            lanes = {}
+            for symbol in symbols:
+                lanes.setdefault(self.lane_key(name, symbol), []).append(symbol)
+            for key, symbols in lanes.items():
+                futures.append(self.pool.submit_at(CLOSE, key, self._close_follower_positions, name, symbols))
+        return futures
+
+    def _close_follower_positions(self, name, symbols):
+        positions = self.get_follower_positions(name)
+        results = []
+        for symbol in symbols:
+            size = positions.get(symbol, 0)
+            if size == 0:
+                results.append(None)
+                continue
+            # Closes are market orders on different products, so they cannot share a batch
+            results.append(self.copy_order(name, {
+                'symbol': symbol,
+                'side': 'sell' if size > 0 else 'buy',
+                'size': abs(size),
+                'order_type': 'market_order',
+                'limit_price': None,
+                'reduce_only': True,
+                'broker_order_id': None,
+                'broker_size': 0,
+                'broker_price': None
+            }))
+        return results[0] if len(results) == 1 else results
+
+    def pending_work(self):
+        """Follower work still queued in lanes, as plain data"""
+        work = []
+        for _, fn, args, _ in self.pool.queued():
+            if fn == self.copy_order:
+                work.append(('copy', args[0], [args[1]]))
+            elif fn == self.copy_orders:
+                work.append(('copy', args[0], list(args[1])))
+            elif fn == self._close_follower_positions:
+                work.append(('close', args[0], list(args[1])))
+        return work
+
+    def export_state(self):
+        """Plain-data copy of the state a restart would otherwise lose"""
+        with self.state_lock:
+            state = {
+                'broker_positions': {master_id: dict(symbols) for master_id, symbols in self.broker_positions.items()},
+                'processed_orders': list(self.processed_orders),
+                'pending': self.pending_work()
+            }
+        if self.risk is not None:
+            state['risk'] = self.risk.export_state()
+        return state
+
+    def restore_state(self, state, resubmit=False):
+        """Load exported state; with resubmit, queued work goes back out for followers still loaded
+
+        Resubmitted orders keep their original received_at, so the staleness
+        budget still applies to them. Without a budget nothing is resubmitted.
+        """
+        with self.state_lock:
+            self.broker_positions = {master_id: dict(symbols)
+                                     for master_id, symbols in state.get('broker_positions', {}).items()}
+            self.processed_orders = dict.fromkeys(tuple(key) for key in state.get('processed_orders', []))
+        if self.risk is not None and state.get('risk'):
+            self.risk.restore_state(state['risk'])
+        futures = []
+        if resubmit and self.staleness is None and state.get('pending'):
+            print(f"⚠️ Not resubmitting {len(state['pending'])} queued tasks without a staleness budget")
+            resubmit = False
+        if not resubmit:
+            return futures
+        for kind, name, items in state.get('pending', []):
+            follower = self.followers.get(name)
+            if follower is None:
+                continue
+            if kind == 'close':
+                futures.append(self.pool.submit_at(CLOSE, self.lane_key(name, items[0]),
+                                                   self._close_follower_positions, name, items))
+                continue
+            for item in items:
+                item.pop('risk_reserved', None)  # the reservation belonged to the previous process
+            priority, key = self.order_priority(name, items), self.lane_key(name, items[0]['symbol'])
+            if len(items) == 1:
+                futures.append(self.pool.submit_at(priority, key, self.copy_order, name, items[0], follower['client']))
+            else:
+                futures.append(self.pool.submit_at(priority, key, self.copy_orders, name, items, follower['client']))
+        return futures
+
+    def reconcile_positions(self):
+        """Check tracked broker positions with one REST read per master; returns the corrections
+
+        Each correction is (master id, symbol, tracked size, exchange size).
+        Masters without credentials, or whose read fails, are left as they are.
+        """
+        corrections = []
+        for master_id, client in list(self.master_clients.items()):
+            try:
+                response = client.get_positions()
+                response.raise_for_status()
+                live = {
+                    position['product_symbol']: float(position['size'])
+                    for position in response.json().get('result') or []
+                }
+            except Exception as e:
+                print(f"⚠️ Could not reconcile positions for {self.masters.get(master_id)}: {str(e)}")
+                continue
+            with self.state_lock:
+                tracked = self.broker_positions.setdefault(master_id, {})
+                for symbol in set(tracked) | set(live):
+                    if tracked.get(symbol, 0) != live.get(symbol, 0):
+                        corrections.append((master_id, symbol, tracked.get(symbol, 0), live.get(symbol, 0)))
+                        tracked[symbol] = live.get(symbol, 0)
+        return corrections
+
+    def start(self, warm=True):
+        if warm:
+            self.warm_up()
+        if self.pinger is not None:
+            self.pinger.start()
+        self.breakers.start()
+        if self.balances is not None:
+            self.balances.start()
+        if self.coalescer is not None:
+            self.coalescer.start()
+        if self.exposure is not None and self.exposure_resync_interval and self._resync_thread is None:
+            self._stop.clear()
+            self._resync_thread = threading.Thread(target=self._run_resync, name='exposure-resync', daemon=True)
+            self._resync_thread.start()
+
+    def stop(self):
+        if self.coalescer is not None:
+            self.coalescer.stop()
+        self._stop.set()
+        if self._resync_thread is not None:
+            self._resync_thread.join()
+            self._resync_thread = None
+        metrics.queue_depth.remove(self.broker_name)
+        metrics.followers_active.remove(self.broker_name)
+        if self.pinger is not None:
+            self.pinger.stop()
+        self.breakers.stop()
+        if self.balances is not None:
+            self.balances.stop()
+        self.pool.shutdown(wait=True)
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats['uptime'] = time.time() - stats['start_time']
+        stats['quarantined'] = self.breakers.open_keys()
+        stats['lanes'] = self.pool.get_stats()
+        stats['relationships'] = self.relationships.get_status()
+        if self.staleness is not None:
+            stats['staleness'] = self.staleness.get_stats()
+        if self.exposure is not None:
+            stats['exposure'] = self.exposure.get_status()
+        if self.risk is not None:
+            stats['risk'] = self.risk.get_stats()
+        if self.coalescer is not None:
+            stats['coalescing'] = self.coalescer.get_stats()
+        return stats
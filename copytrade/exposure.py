@@ -0,0 +1,293 @@
+"""In-memory follower x product exposure matrix.
+
+Position questions that span followers ("total BTCUSD notional", "who holds
+the most") otherwise take one positions call per follower. ``ExposureMatrix``
+keeps every follower's signed position in one ``array('d')`` of
+followers x products, row-major. Copied fills update it incrementally, and
+``load_positions`` seeds it from REST.
+
+Aggregates are maintained on every update, not recomputed per query:
+
+- per product: net, long and short size, gross size, and the set of holding rows
+- per follower: the set of products held and the gross notional
+
+Per-symbol totals and per-follower notional are therefore O(1). Top
+exposures scan one value per follower, or only the holders of one symbol.
+A new mark re-prices that product's holders, in O(holders). Notional is
+|size| x contract value x mark. The mark is the last price seen for the
+product (set_mark, or the broker fill price), and the contract value comes
+from the product index when one is given.
+
+Each cell also keeps the position's average entry price, so ``apply_fill``
+returns the PnL realized by the part of a fill that reduces a position.
+Positions loaded without an entry price realize nothing until reopened.
+
+Columns are keyed by symbol, and the product id is recorded alongside when
+the index knows it. Rows and columns grow by doubling. A removed follower's
+row is zeroed and reused.
+"""
+
+import heapq
+import math
+import threading
+from array import array
+
+
+class ExposureMatrix:
+    def __init__(self, products=None, followers=256, symbols=32):
+        self.products = products  # optional ProductIndex for contract values and product ids
+        self.row_capacity = followers
+        self.column_capacity = symbols
+        self.cells = array('d', bytes(8 * followers * symbols))
+        self.entries = array('d', [math.nan]) * (followers * symbols)  # average entry price per cell
+        self.rows = {}  # follower name -> row
+        self.names = {}  # row -> follower name
+        self.free_rows = []
+        self.columns = {}  # symbol -> column
+        self.symbols = []  # column -> symbol
+        self.product_ids = []  # column -> product id or None
+        self.contract_values = array('d')
+        self.marks = array('d')
+        self.net = array('d')
+        self.long = array('d')
+        self.short = array('d')
+        self.holders = []  # column -> set of rows with a non-zero position
+        self.held = {}  # row -> set of columns with a non-zero position
+        self.row_notional = array('d')  # row -> gross notional at current marks
+        self.lock = threading.Lock()
+
+    # Layout
+
+    def _grow_rows(self):
+        old, old_entries = self.cells, self.entries
+        self.row_capacity *= 2
+        self.cells = array('d', bytes(8 * self.row_capacity * self.column_capacity))
+        self.cells[:len(old)] = old
+        self.entries = array('d', [math.nan]) * (self.row_capacity * self.column_capacity)
+        self.entries[:len(old_entries)] = old_entries
+
+    def _grow_columns(self):
+        old, old_entries, old_width = self.cells, self.entries, self.column_capacity
+        self.column_capacity *= 2
+        self.cells = array('d', bytes(8 * self.row_capacity * self.column_capacity))
+        self.entries = array('d', [math.nan]) * (self.row_capacity * self.column_capacity)
+        for row in range(len(self.rows) + len(self.free_rows)):
+            start = row * self.column_capacity
+            self.cells[start:start + old_width] = old[row * old_width:(row + 1) * old_width]
+            self.entries[start:start + old_width] = old_entries[row * old_width:(row + 1) * old_width]
+
+    def _row(self, name):
+        row = self.rows.get(name)
+        if row is not None:
+            return row
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            row = len(self.rows)
+            if row >= self.row_capacity:
+                self._grow_rows()
+        if row == len(self.row_notional):
+            self.row_notional.append(0.0)
+        self.rows[name] = row
+        self.names[row] = name
+        self.held[row] = set()
+        return row
+
+    def _column(self, symbol):
+        column = self.columns.get(symbol)
+        if column is not None:
+            return column
+        column = len(self.symbols)
+        if column >= self.column_capacity:
+            self._grow_columns()
+        contract_value = 1.0
+        product_id = None
+        if self.products is not None and symbol in self.products:
+            product_id = self.products.get_product_id(symbol)
+            value = self.products.get_contract_value(symbol)
+            if not math.isnan(value):
+                contract_value = value
+        self.columns[symbol] = column
+        self.symbols.append(symbol)
+        self.product_ids.append(product_id)
+        self.contract_values.append(contract_value)
+        self.marks.append(math.nan)
+        for column_array in (self.net, self.long, self.short):
+            column_array.append(0.0)
+        self.holders.append(set())
+        return column
+
+    def _set(self, row, column, size):
+        index = row * self.column_capacity + column
+        old = self.cells[index]
+        if old == size:
+            return
+        self.cells[index] = size
+        if not size or (old and (size > 0) != (old > 0)):
+            self.entries[index] = math.nan
+        mark = self.marks[column]
+        if not math.isnan(mark):
+            self.row_notional[row] += (abs(size) - abs(old)) * self.contract_values[column] * mark
+        self.net[column] += size - old
+        self.long[column] += max(size, 0.0) - max(old, 0.0)
+        self.short[column] += max(-size, 0.0) - max(-old, 0.0)
+        if size:
+            self.holders[column].add(row)
+            self.held[row].add(column)
+        else:
+            self.holders[column].discard(row)
+            self.held[row].discard(column)
+
+    # Updates
+
+    def apply_fill(self, name, symbol, size, price=None):
+        """Add a signed fill (buy > 0, sell < 0) to a follower's position; returns the realized PnL
+
+        PnL is in the settling currency (size x contract value x price move),
+        and 0.0 when the fill only opens or the entry price is unknown.
+        """
+        with self.lock:
+            row, column = self._row(name), self._column(symbol)
+            index = row * self.column_capacity + column
+            current = self.cells[index]
+            entry = self.entries[index]
+            updated = current + size
+            # Round away float dust so a full close leaves exactly zero
+            updated = 0.0 if abs(updated) < 1e-12 else updated
+            realized = 0.0
+            price = float(price) if price else None
+            if current and (size > 0) != (current > 0):
+                closed = min(abs(size), abs(current))
+                if price is not None and not math.isnan(entry):
+                    direction = 1.0 if current > 0 else -1.0
+                    realized = closed * (price - entry) * direction * self.contract_values[column]
+            self._set(row, column, updated)
+            if price is not None and updated:
+                if not current or (updated > 0) != (current > 0):
+                    self.entries[index] = price  # opened, or flipped through zero
+                elif abs(updated) > abs(current) and not math.isnan(entry):
+                    self.entries[index] = (entry * abs(current) + price * abs(size)) / abs(updated)
+            if price is not None:
+                self._set_mark(column, price)
+            return realized
+
+    def set_position(self, name, symbol, size):
+        with self.lock:
+            self._set(self._row(name), self._column(symbol), float(size))
+
+    def load_positions(self, name, positions, entry_prices=None):
+        """Replace a follower's row with {symbol: size}, e.g. from get_follower_positions
+
+        ``entry_prices`` ({symbol: price}) sets the entry used for realized PnL.
+        """
+        with self.lock:
+            row = self._row(name)
+            for column in list(self.held[row]):
+                if self.symbols[column] not in positions:
+                    self._set(row, column, 0.0)
+            for symbol, size in positions.items():
+                column = self._column(symbol)
+                self._set(row, column, float(size))
+                entry = (entry_prices or {}).get(symbol)
+                if entry and float(size):
+                    self.entries[row * self.column_capacity + column] = float(entry)
+
+    def set_mark(self, symbol, price):
+        with self.lock:
+            self._set_mark(self._column(symbol), float(price))
+
+    def _set_mark(self, column, price):
+        old = self.marks[column]
+        if old == price:
+            return
+        self.marks[column] = price
+        step = self.contract_values[column] * (price - (0.0 if math.isnan(old) else old))
+        for row in self.holders[column]:
+            self.row_notional[row] += abs(self.cells[row * self.column_capacity + column]) * step
+
+    def remove_follower(self, name):
+        with self.lock:
+            row = self.rows.pop(name, None)
+            if row is None:
+                return
+            for column in list(self.held[row]):
+                self._set(row, column, 0.0)
+            del self.names[row]
+            del self.held[row]
+            self.row_notional[row] = 0.0
+            self.free_rows.append(row)
+
+    # Queries
+
+    def _notional(self, column, size):
+        mark = self.marks[column]
+        if math.isnan(mark):
+            return math.nan
+        return abs(size) * self.contract_values[column] * mark
+
+    def position(self, name, symbol):
+        row, column = self.rows.get(name), self.columns.get(symbol)
+        if row is None or column is None:
+            return 0.0
+        return self.cells[row * self.column_capacity + column]
+
+    def positions(self, name):
+        """{symbol: size} for one follower"""
+        with self.lock:
+            row = self.rows.get(name)
+            if row is None:
+                return {}
+            base = row * self.column_capacity
+            return {self.symbols[column]: self.cells[base + column] for column in self.held[row]}
+
+    def symbol_totals(self, symbol):
+        """Net, long, short and gross size, notional and holder count across all followers"""
+        with self.lock:
+            column = self.columns.get(symbol)
+            if column is None:
+                return None
+            gross = self.long[column] + self.short[column]
+            return {
+                'symbol': symbol,
+                'product_id': self.product_ids[column],
+                'net': self.net[column],
+                'long': self.long[column],
+                'short': self.short[column],
+                'gross': gross,
+                'notional': self._notional(column, gross),
+                'mark': self.marks[column],
+                'holders': len(self.holders[column])
+            }
+
+    def totals(self):
+        """symbol_totals for every product anyone holds"""
+        return [self.symbol_totals(symbol) for column, symbol in enumerate(self.symbols) if self.holders[column]]
+
+    def follower_notional(self, name):
+        """Gross notional across a follower's positions; products without a mark are skipped"""
+        row = self.rows.get(name)
+        return 0.0 if row is None else self.row_notional[row]
+
+    def top_exposures(self, n=10, symbol=None):
+        """Largest (follower, notional) pairs, overall or for one symbol"""
+        with self.lock:
+            if symbol is None:
+                top = heapq.nlargest(n, self.names, key=self.row_notional.__getitem__)
+                return [(self.names[row], self.row_notional[row]) for row in top if self.row_notional[row] > 0]
+            else:
+                column = self.columns.get(symbol)
+                if column is None:
+                    return []
+                rows = (
+                    (self.names[row], self._notional(column, self.cells[row * self.column_capacity + column]))
+                    for row in self.holders[column]
+                )
+            return heapq.nlargest(n, rows, key=lambda item: item[1] if not math.isnan(item[1]) else -1.0)
+
+    def get_status(self):
+        return {
+            'followers': len(self.rows),
+            'products': len(self.symbols),
+            'positions': sum(len(columns) for columns in self.held.values()),
+            'bytes': self.cells.itemsize * len(self.cells)
+        }
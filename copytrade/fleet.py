@@ -0,0 +1,117 @@
+"""Validate every broker and follower credential stored in the database."""
+
+from . import metrics
+from .api import DeltaExchangeAPITester
+
+
+def mask_key(api_key):
+    """Shorten an API key for display"""
+    return f"{api_key[:8]}...{api_key[-4:]}"
+
+
+def validate_account(account, name_field, environment='production', transport='http1', hedger=None,
+                     history=None, group='keys', base_url=None):
+    """Run the API tests for a single broker or follower row"""
+    name = account.get(name_field, 'Unknown')
+
+    if not account.get('api_key') or not account.get('api_secret'):
+        print(f"   ❌ No API credentials for {name}")
+        return {
+            'status': 'NO_CREDENTIALS',
+            'working': False,
+            'error': 'API credentials not set'
+        }
+
+    print(f"   API Key: {mask_key(account['api_key'])}")
+    print(f"   API Secret: {'***SET***' if account['api_secret'] else 'NOT SET'}")
+
+    tester = DeltaExchangeAPITester(account['api_key'], account['api_secret'], environment, transport,
+                                    base_url=base_url, hedger=hedger, history=history)
+    results = tester.run_all_tests()
+    if history is not None:
+        # Keyed like validate-key, so one key's results line up whichever command checked it
+        history.record_results(mask_key(account['api_key']), results, environment, group)
+    return {
+        'status': 'TESTED',
+        'working': results.get('authentication', False),
+        'results': results
+    }
+
+
+def validate_fleet(credentials, environment='production', transport='http1', hedger=None, history=None):
+    """Test all broker and follower credentials and print a summary"""
+    all_results = {'brokers': {}, 'followers': {}}
+
+    print("\n" + "=" * 60)
+    print("TESTING BROKER ACCOUNTS")
+    print("=" * 60)
+
+    for i, broker in enumerate(credentials['brokers']):
+        name = broker.get('account_name', f"broker_{i+1}")
+        print(f"\n🔍 Testing Broker {i+1}: {name}")
+        all_results['brokers'][name] = validate_account(broker, 'account_name', environment, transport, hedger,
+                                                        history, 'brokers')
+
+    if credentials['followers']:
+        print("\n" + "=" * 60)
+        print("TESTING FOLLOWERS")
+        print("=" * 60)
+
+        for i, follower in enumerate(credentials['followers']):
+            name = follower.get('follower_name', f"follower_{i+1}")
+            print(f"\n🔍 Testing Follower {i+1}: {name}")
+            print(f"   Copy Mode: {follower.get('copy_mode', 'N/A')}")
+            print(f"   Multiplier: {follower.get('multiplier', 'N/A')}")
+            all_results['followers'][name] = validate_account(follower, 'follower_name', environment, transport,
+                                                              hedger, history, 'followers')
+
+    record_outcomes(all_results)
+    print_fleet_summary(all_results)
+    return all_results
+
+
+def record_outcomes(all_results):
+    """Count each account's outcome in the validations metric"""
+    for group, results in all_results.items():
+        for result in results.values():
+            outcome = 'no_credentials' if result['status'] == 'NO_CREDENTIALS' else ('working' if result['working'] else 'failed')
+            metrics.validations.inc(group, outcome)
+
+
+def print_fleet_summary(all_results):
+    """Print the final pass/fail summary for a fleet run"""
+    print("\n" + "=" * 60)
+    print("FINAL SUMMARY")
+    print("=" * 60)
+
+    total_brokers = len(all_results['brokers'])
+    total_followers = len(all_results['followers'])
+    working_brokers = sum(1 for r in all_results['brokers'].values() if r['working'])
+    working_followers = sum(1 for r in all_results['followers'].values() if r['working'])
+
+    print(f"Working Broker APIs: {working_brokers}/{total_brokers}")
+    print(f"Working Follower APIs: {working_followers}/{total_followers}")
+
+    print(f"\n📋 DETAILED RESULTS:")
+    for group in ('brokers', 'followers'):
+        for name, result in all_results[group].items():
+            if result['status'] == 'NO_CREDENTIALS':
+                print(f"   {name}: ❌ NO CREDENTIALS")
+            elif result['working']:
+                print(f"   {name}: ✅ WORKING")
+            else:
+                print(f"   {name}: ❌ FAILED")
+
+    if working_brokers == 0 and working_followers == 0:
+        print("\n🚨 CRITICAL: No working API credentials found!")
+        print("You need to update your API credentials with valid Delta Exchange India API keys.")
+        print("\nTo fix this:")
+        print("1. Go to https://www.delta.exchange/app/account/manageapikeys")
+        print("2. Create new API keys for India environment")
+        print("3. Update the credentials in your database")
+    elif working_followers < total_followers:
+        print(f"\n⚠️  PARTIAL ISSUE: {working_followers}/{total_followers} followers working")
+        print("   • Copy trading will work with reduced capacity")
+    else:
+        print("\n🎉 ALL SYSTEMS GO: All followers working!")
+        print("   • Copy trading should work perfectly")
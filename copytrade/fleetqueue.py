@@ -0,0 +1,296 @@
+"""Resumable multi-process fleet validation over a local SQLite work queue.
+
+``validate_fleet`` checks one account after another in one process, and a
+crash part-way through means starting over. Here every broker and follower
+goes into a queue file as one item. Worker processes claim the next pending
+item whenever they are free, so a slow account holds up only one worker, and
+they mark each item done with its result. Completed items are never
+revalidated, so an interrupted run picks up where it stopped.
+
+Only account keys and names are written to the queue, never API secrets.
+Each worker loads the credentials once when it starts. A claim is a lease:
+if a worker dies, its item goes back to pending when the lease runs out, or
+at once when a coordinator on the same host sees that the worker's process
+is gone.
+
+The queue is for workers on one host. It uses WAL journaling, which needs
+shared memory between the processes, so it must not live on a network file
+system such as NFS or SMB. Claims use ``UPDATE ... RETURNING``, which needs
+SQLite 3.35 or later.
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import time
+
+DEFAULT_QUEUE_PATH = 'fleet-queue.db'
+DEFAULT_LEASE = 300.0
+MIN_SQLITE_VERSION = (3, 35)  # UPDATE ... RETURNING
+
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DONE = 'done'
+
+GROUPS = {'brokers': 'account_name', 'followers': 'follower_name'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    environment TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS items (
+    run_id INTEGER NOT NULL,
+    item_key TEXT NOT NULL,
+    account_group TEXT NOT NULL,
+    name TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    claimed_at REAL,
+    finished_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    PRIMARY KEY (run_id, item_key)
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (run_id, state);
+"""
+
+
+def account_key(group, account):
+    """Stable queue key for a credential row"""
+    return f"{group}:{account.get('id') or account.get(GROUPS[group])}"
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FleetQueue:
+    def __init__(self, path=DEFAULT_QUEUE_PATH, lease=DEFAULT_LEASE):
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise RuntimeError(f"the fleet queue needs SQLite {'.'.join(map(str, MIN_SQLITE_VERSION))} or later "
+                               f"for UPDATE ... RETURNING; this Python links SQLite {sqlite3.sqlite_version}")
+        self.path = path
+        self.lease = lease
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def create_run(self, environment, credentials):
+        """Queue every broker and follower row; returns the run id"""
+        self.db.execute('BEGIN IMMEDIATE')
+        run_id = self.db.execute('INSERT INTO runs (environment, created_at) VALUES (?, ?)',
+                                 (environment, time.time())).lastrowid
+        self.db.executemany(
+            'INSERT OR IGNORE INTO items (run_id, item_key, account_group, name) VALUES (?, ?, ?, ?)',
+            [
+                (run_id, account_key(group, account), group, account.get(name_field) or account_key(group, account))
+                for group, name_field in GROUPS.items()
+                for account in credentials.get(group) or []
+            ]
+        )
+        self.db.execute('COMMIT')
+        return run_id
+
+    def open_run(self, environment):
+        """Latest unfinished run for this environment, or None"""
+        row = self.db.execute(
+            'SELECT run_id FROM runs WHERE environment = ? AND finished_at IS NULL ORDER BY run_id DESC LIMIT 1',
+            (environment,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def claim(self, run_id, worker):
+        """Take the next pending (or lease-expired) item; returns (item key, group, name) or None"""
+        row = self.db.execute(
+            """
+            UPDATE items SET state = 'claimed', worker = ?, claimed_at = ?, attempts = attempts + 1
+            WHERE run_id = ? AND item_key = (
+                SELECT item_key FROM items
+                WHERE run_id = ? AND (state = 'pending' OR (state = 'claimed' AND claimed_at < ?))
+                ORDER BY state DESC, rowid LIMIT 1
+            )
+            RETURNING item_key, account_group, name
+            """,
+            (worker, time.time(), run_id, run_id, time.time() - self.lease)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def complete(self, run_id, item_key, worker, result):
+        """Store an item's result; False if the lease was lost to another worker meanwhile"""
+        return self.db.execute(
+            "UPDATE items SET state = 'done', finished_at = ?, result = ? "
+            "WHERE run_id = ? AND item_key = ? AND worker = ? AND state = 'claimed'",
+            (time.time(), json.dumps(result), run_id, item_key, worker)
+        ).rowcount == 1
+
+    def release_dead(self, run_id):
+        """Return items claimed by workers on this host that are no longer running"""
+        host = socket.gethostname()
+        rows = self.db.execute(
+            "SELECT item_key, worker FROM items WHERE run_id = ? AND state = 'claimed'", (run_id,)
+        ).fetchall()
+        released = 0
+        for item_key, worker in rows:
+            worker_host, _, pid = worker.rpartition(':')
+            if worker_host == host and not _pid_alive(int(pid)):
+                released += self.db.execute(
+                    "UPDATE items SET state = 'pending', worker = NULL "
+                    "WHERE run_id = ? AND item_key = ? AND worker = ? AND state = 'claimed'",
+                    (run_id, item_key, worker)
+                ).rowcount
+        return released
+
+    def progress(self, run_id):
+        counts = dict(self.db.execute(
+            'SELECT state, COUNT(*) FROM items WHERE run_id = ? GROUP BY state', (run_id,)
+        ).fetchall())
+        return {state: counts.get(state, 0) for state in (PENDING, CLAIMED, DONE)}
+
+    def finish_run(self, run_id):
+        self.db.execute('UPDATE runs SET finished_at = ? WHERE run_id = ?', (time.time(), run_id))
+
+    def results(self, run_id):
+        """validate_fleet-shaped results for every completed item"""
+        all_results = {group: {} for group in GROUPS}
+        for group, name, result in self.db.execute(
+            "SELECT account_group, name, result FROM items WHERE run_id = ? AND state = 'done' ORDER BY rowid",
+            (run_id,)
+        ):
+            all_results[group][name] = json.loads(result)
+        return all_results
+
+
+def load_db_credentials():
+    """Default credential loader for workers"""
+    from .db import get_credentials_from_db
+    return get_credentials_from_db()
+
+
+def worker_main(path, run_id, environment='production', transport='http1', lease=DEFAULT_LEASE,
+                load_credentials=load_db_credentials, history_path=None, quiet=True, base_url=None):
+    """Claim and validate items until the run has none left; returns the number completed"""
+    from .fleet import validate_account
+
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    credentials = load_credentials() or {}
+    accounts = {
+        account_key(group, account): account
+        for group in GROUPS
+        for account in credentials.get(group) or []
+    }
+    history = None
+    if history_path:
+        from .history import HistoryStore
+        from .timeouts import SHARED
+        history = HistoryStore(history_path)
+        SHARED.seed(history)
+
+    queue = FleetQueue(path, lease)
+    me = worker_id()
+    completed = 0
+    try:
+        while True:
+            item = queue.claim(run_id, me)
+            if item is None:
+                break
+            item_key, group, name = item
+            account = accounts.get(item_key)
+            if account is None:
+                result = {'status': 'NOT_FOUND', 'working': False, 'error': 'No longer in the database'}
+            else:
+                try:
+                    result = validate_account(account, GROUPS[group], environment, transport,
+                                              history=history, group=group, base_url=base_url)
+                except Exception as e:
+                    result = {'status': 'ERROR', 'working': False, 'error': str(e)}
+            if queue.complete(run_id, item_key, me, result):
+                completed += 1
+    except KeyboardInterrupt:
+        # Ctrl-C reaches every worker too; the parent reports it, and the claim is released on resume
+        pass
+    finally:
+        queue.close()
+        if history is not None:
+            history.close()
+    return completed
+
+
+def run_fleet_queue(path=DEFAULT_QUEUE_PATH, environment='production', transport='http1', workers=None,
+                    fresh=False, lease=DEFAULT_LEASE, load_credentials=load_db_credentials,
+                    history_path=None, quiet=True, base_url=None):
+    """Validate the fleet with worker processes, resuming an unfinished run; returns validate_fleet-style results"""
+    workers = workers or os.cpu_count() or 1
+    queue = FleetQueue(path, lease)
+    run_id = None if fresh else queue.open_run(environment)
+    if run_id is None:
+        credentials = load_credentials()
+        if not credentials:
+            queue.close()
+            return None
+        run_id = queue.create_run(environment, credentials)
+        print(f"📋 Queued run {run_id} in {path}")
+    else:
+        released = queue.release_dead(run_id)
+        print(f"🔄 Resuming run {run_id} from {path}" + (f" ({released} abandoned claim(s) released)" if released else ''))
+
+    progress = queue.progress(run_id)
+    total = sum(progress.values())
+    print(f"   {progress[DONE]}/{total} already done, {workers} worker process(es)")
+
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(
+            target=worker_main,
+            args=(path, run_id, environment, transport, lease, load_credentials, history_path, quiet, base_url),
+            name=f"fleet-worker-{i}"
+        )
+        for i in range(min(workers, max(1, total - progress[DONE])))
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    try:
+        while any(process.is_alive() for process in processes):
+            for process in processes:
+                process.join(timeout=1.0 / len(processes))
+            progress = queue.progress(run_id)
+            print(f"\r   {progress[DONE]}/{total} done, {progress[CLAIMED]} in flight", end='', flush=True)
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        print(f"\n⚠️ Interrupted; rerun to resume run {run_id}")
+        queue.close()
+        raise
+    print(f"\n⏱️ {time.perf_counter() - started:.1f}s for this session")
+
+    progress = queue.progress(run_id)
+    if progress[PENDING] == 0 and progress[CLAIMED] == 0:
+        queue.finish_run(run_id)
+    else:
+        print(f"⚠️ {progress[PENDING] + progress[CLAIMED]} item(s) left; rerun to resume run {run_id}")
+    all_results = queue.results(run_id)
+    queue.close()
+    return all_results
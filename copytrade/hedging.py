@@ -0,0 +1,137 @@
+"""Hedged idempotent reads.
+
+Balance, position and open-order reads occasionally stall for seconds. A
+``Hedger`` learns each endpoint's latency distribution; when a read has not
+answered by that endpoint's ``percentile`` (p95 by default) it sends one
+duplicate and returns whichever answers first. Only GETs go through it - order
+placement is never hedged.
+
+Extra load is bounded by ``max_hedge_ratio`` (hedges per request) and reported
+by ``get_stats()``.
+
+A hedged request is recorded as the time from its first attempt until an
+answer arrived. That is a lower bound on the first attempt's own latency,
+and never below the hedge delay, so hedging does not pull the learned
+percentile down. The losing attempt's response is closed when it finishes,
+which returns a streamed response's connection to the pool.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies per key"""
+
+    def __init__(self, window=256):
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self.lock:
+            self.samples[key].append(seconds)
+
+    def count(self, key):
+        return len(self.samples.get(key, ()))
+
+    def percentile(self, key, pct):
+        """Nearest-rank percentile in seconds, or None without samples"""
+        with self.lock:
+            values = sorted(self.samples.get(key, ()))
+        if not values:
+            return None
+        rank = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+        return values[rank]
+
+
+class Hedger:
+    def __init__(self, tracker=None, percentile=95, min_samples=20, default_delay=1.0,
+                 min_delay=0.05, max_hedge_ratio=0.1, max_workers=32):
+        self.tracker = tracker or LatencyTracker()
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'hedges_sent': 0,
+            'hedge_wins': 0,
+            'budget_skips': 0
+        }
+
+    def _bump(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def hedge_delay(self, key):
+        """How long to wait on the first attempt before sending a duplicate"""
+        if self.tracker.count(key) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self.tracker.percentile(key, self.percentile))
+
+    def _within_budget(self):
+        with self.lock:
+            return self.stats['hedges_sent'] < self.max_hedge_ratio * self.stats['requests']
+
+    def _attempt(self, fn):
+        started = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - started
+
+    @staticmethod
+    def _discard(future):
+        """Close the losing attempt's response once it finishes"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        close = getattr(future.result()[0], 'close', None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def call(self, key, fn):
+        """Run an idempotent fn, hedging it once if it is slower than usual"""
+        self._bump('requests')
+        started = time.perf_counter()
+        primary = self.pool.submit(self._attempt, fn)
+        done, _ = wait([primary], timeout=self.hedge_delay(key))
+        if done or not self._within_budget():
+            if not done:
+                self._bump('budget_skips')
+            result, elapsed = primary.result()
+            self.tracker.record(key, elapsed)
+            return result
+
+        self._bump('hedges_sent')
+        hedge = self.pool.submit(self._attempt, fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._bump('hedge_wins')
+                    # Censored: the first attempt took at least this long
+                    self.tracker.record(key, time.perf_counter() - started)
+                    for loser in pending | (done - {future}):
+                        loser.add_done_callback(self._discard)
+                    return future.result()[0]
+                error = future.exception()
+        raise error
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats['extra_load'] = stats['hedges_sent'] / stats['requests'] if stats['requests'] else 0.0
+        return stats
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,370 @@
+"""Local SQLite history of validation results and request latency.
+
+``run_all_tests()`` results and per-request latencies otherwise live only in
+stdout and in-memory windows, so "which keys started failing this week" meant
+rerunning the whole fleet. ``HistoryStore`` appends both to one SQLite file,
+indexed by account, check and time.
+
+Writes are buffered and inserted in batches of ``batch_size``, one
+transaction each. They are flushed when a batch fills, every
+``flush_interval`` seconds once ``start()`` is called, and on ``close()``.
+
+``compact()`` rolls raw latency samples up into hourly count/sum/percentile
+rows, drops whole hours of samples older than ``raw_retention``, and thins
+check results older than ``check_retention`` down to the rows where a result
+changed. The trend queries read only the rollups and the indexes, so they stay
+fast over months of history.
+
+Samples can arrive late, e.g. from a buffer flushed after a rollup. An hour
+whose raw sample count no longer matches its rollup is summarized again. A
+late sample for an hour whose raw samples are already pruned is folded into
+its rollup's count, errors, sum and max; the percentiles stay as they were.
+
+Check results are keyed by the masked API key, whichever command ran them.
+"""
+
+import sqlite3
+import threading
+import time
+
+DEFAULT_HISTORY_PATH = 'copytrade-history.db'
+HOUR = 3600
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    ts REAL NOT NULL,
+    environment TEXT NOT NULL,
+    account_group TEXT NOT NULL,
+    account TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    passed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS checks_account ON checks (account, check_name, passed, ts);
+CREATE INDEX IF NOT EXISTS checks_ts ON checks (ts);
+CREATE INDEX IF NOT EXISTS checks_check ON checks (check_name, ts);
+
+CREATE TABLE IF NOT EXISTS latency (
+    ts REAL NOT NULL,
+    endpoint TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    status INTEGER
+);
+CREATE INDEX IF NOT EXISTS latency_endpoint ON latency (endpoint, ts);
+CREATE INDEX IF NOT EXISTS latency_ts ON latency (ts);
+
+CREATE TABLE IF NOT EXISTS latency_hourly (
+    hour INTEGER NOT NULL,
+    endpoint TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    p50 REAL NOT NULL,
+    p95 REAL NOT NULL,
+    p99 REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (endpoint, hour)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS latency_hourly_hour ON latency_hourly (hour);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+ROLLUP_PERCENTILES = (50, 95, 99)
+
+
+def nearest_rank(values, pct):
+    """Nearest-rank percentile of sorted values, as LatencyTracker computes it"""
+    rank = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+class HistoryStore:
+    def __init__(self, path=DEFAULT_HISTORY_PATH, batch_size=500, flush_interval=2.0,
+                 raw_retention=7 * DAY, check_retention=90 * DAY):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.raw_retention = raw_retention
+        self.check_retention = check_retention
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self.db_lock = threading.Lock()  # one writer/reader on the connection at a time
+        self.lock = threading.Lock()  # guards the buffers
+        self.pending_checks = []
+        self.pending_latency = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Recording
+
+    def record_results(self, account, results, environment='production', group='keys', ts=None):
+        """Buffer one run_all_tests()-style {check: passed} dict for an account"""
+        ts = ts or time.time()
+        rows = [(ts, environment, group, account, check, int(bool(passed))) for check, passed in results.items()]
+        with self.lock:
+            self.pending_checks.extend(rows)
+            full = len(self.pending_checks) >= self.batch_size
+        if full:
+            self.flush()
+
+    def record_latency(self, endpoint, seconds, status=None, ts=None):
+        with self.lock:
+            self.pending_latency.append((ts or time.time(), endpoint, seconds, status))
+            full = len(self.pending_latency) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Insert everything buffered; returns the number of rows written"""
+        with self.lock:
+            checks, self.pending_checks = self.pending_checks, []
+            latency, self.pending_latency = self.pending_latency, []
+        if not checks and not latency:
+            return 0
+        with self.db_lock:
+            self.db.execute('BEGIN')
+            try:
+                if checks:
+                    self.db.executemany('INSERT INTO checks VALUES (?, ?, ?, ?, ?, ?)', checks)
+                if latency:
+                    self.db.executemany('INSERT INTO latency VALUES (?, ?, ?, ?)', latency)
+                self.db.execute('COMMIT')
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+        return len(checks) + len(latency)
+
+    # Compaction
+
+    def rollup(self, until=None):
+        """Summarize raw latency into hourly rows for every complete hour before until
+
+        Hours already rolled up are summarized again when samples arrived for
+        them since; returns the number of endpoint-hours written.
+        """
+        until = int(until or time.time()) // HOUR * HOUR
+        with self.db_lock:
+            pruned_before = self._meta('latency_pruned_before', 0)
+            self.db.execute('BEGIN')
+            try:
+                folded = self._fold_late(pruned_before)
+                stale = self.db.execute(
+                    """
+                    SELECT r.endpoint, r.hour FROM (
+                        SELECT endpoint, CAST(ts / ? AS INTEGER) * ? AS hour, COUNT(*) AS count FROM latency
+                        WHERE ts >= ? AND ts < ? GROUP BY endpoint, hour
+                    ) r LEFT JOIN latency_hourly h ON h.endpoint = r.endpoint AND h.hour = r.hour
+                    WHERE h.count IS NULL OR h.count != r.count
+                    """,
+                    (HOUR, HOUR, pruned_before, until)
+                ).fetchall()
+                rows = []
+                for endpoint, hour in stale:
+                    samples = self.db.execute(
+                        'SELECT seconds, status FROM latency WHERE endpoint = ? AND ts >= ? AND ts < ?',
+                        (endpoint, hour, hour + HOUR)
+                    ).fetchall()
+                    values = sorted(seconds for seconds, _ in samples)
+                    errors = sum(1 for _, status in samples if status is None or status >= 500)
+                    rows.append((hour, endpoint, len(values), errors, sum(values),
+                                 *(nearest_rank(values, pct) for pct in ROLLUP_PERCENTILES), values[-1]))
+                self.db.executemany('INSERT OR REPLACE INTO latency_hourly VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                self.db.execute('COMMIT')
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+        return folded + len(rows)
+
+    def _fold_late(self, pruned_before):
+        """Merge samples for already-pruned hours into their rollups and drop them; caller holds the lock"""
+        late = self.db.execute(
+            'SELECT endpoint, CAST(ts / ? AS INTEGER) * ? AS hour, COUNT(*), '
+            'SUM(status IS NULL OR status >= 500), SUM(seconds), MAX(seconds) FROM latency '
+            'WHERE ts < ? GROUP BY endpoint, hour',
+            (HOUR, HOUR, pruned_before)
+        ).fetchall()
+        for endpoint, hour, count, errors, total, longest in late:
+            merged = self.db.execute(
+                'UPDATE latency_hourly SET count = count + ?, errors = errors + ?, sum = sum + ?, max = MAX(max, ?) '
+                'WHERE endpoint = ? AND hour = ?',
+                (count, errors, total, longest, endpoint, hour)
+            ).rowcount
+            if not merged:
+                # No rollup to merge into; the late samples are all this hour has
+                samples = sorted(seconds for (seconds,) in self.db.execute(
+                    'SELECT seconds FROM latency WHERE endpoint = ? AND ts >= ? AND ts < ?',
+                    (endpoint, hour, hour + HOUR)
+                ))
+                self.db.execute('INSERT INTO latency_hourly VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                (hour, endpoint, count, errors, total,
+                                 *(nearest_rank(samples, pct) for pct in ROLLUP_PERCENTILES), longest))
+        if late:
+            self.db.execute('DELETE FROM latency WHERE ts < ?', (pruned_before,))
+        return len(late)
+
+    def _meta(self, key, default=None):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def compact(self, now=None):
+        """Roll up latency, then apply retention; returns counts of what changed"""
+        now = now or time.time()
+        self.flush()
+        rolled = self.rollup(now)
+        # Whole hours only, so an hour with raw samples left still has all of them
+        cutoff = int(now - self.raw_retention) // HOUR * HOUR
+        with self.db_lock:
+            self.db.execute('BEGIN')
+            raw = 0
+            if cutoff > self._meta('latency_pruned_before', 0):
+                raw = self.db.execute('DELETE FROM latency WHERE ts < ?', (cutoff,)).rowcount
+                self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('latency_pruned_before', cutoff))
+            # Old check rows that repeat the previous result for the same account and check
+            thinned = self.db.execute(
+                """
+                DELETE FROM checks WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ts, passed,
+                               LAG(passed) OVER (PARTITION BY account, check_name ORDER BY ts) AS previous
+                        FROM checks
+                    ) WHERE ts < ? AND previous = passed
+                )
+                """,
+                (now - self.check_retention,)
+            ).rowcount
+            self.db.execute('COMMIT')
+        return {'hours_rolled_up': rolled, 'latency_deleted': raw, 'checks_thinned': thinned}
+
+    def vacuum(self):
+        with self.db_lock:
+            self.db.execute('VACUUM')
+
+    # Trend queries
+
+    def _query(self, sql, params=()):
+        self.flush()
+        with self.db_lock:
+            cursor = self.db.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def newly_failing(self, since):
+        """Account checks failing now whose current failure streak started at or after since"""
+        return self._query(
+            """
+            SELECT account_group, account, check_name, MIN(ts) AS failing_since, COUNT(*) AS failures,
+                   (SELECT MAX(ts) FROM checks p
+                    WHERE p.account = c.account AND p.check_name = c.check_name AND p.passed = 1) AS last_passed
+            FROM checks c
+            WHERE passed = 0 AND ts > COALESCE(
+                (SELECT MAX(ts) FROM checks p
+                 WHERE p.account = c.account AND p.check_name = c.check_name AND p.passed = 1), 0)
+            GROUP BY account_group, account, check_name
+            HAVING failing_since >= ?
+            ORDER BY failing_since DESC
+            """,
+            (since,)
+        )
+
+    def pass_rate(self, since, check_name=None, bucket=DAY):
+        """Share of passing results per check and bucket"""
+        where, params = 'ts >= ?', [bucket, bucket, since]
+        if check_name:
+            where += ' AND check_name = ?'
+            params.append(check_name)
+        return self._query(
+            f"""
+            SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, check_name,
+                   COUNT(*) AS results, AVG(passed) AS pass_rate
+            FROM checks WHERE {where}
+            GROUP BY bucket, check_name ORDER BY bucket, check_name
+            """,
+            params
+        )
+
+    def latency_trend(self, since, endpoint=None, bucket=DAY):
+        """Request count, errors and latency per endpoint and bucket, from the hourly rollups
+
+        Percentiles for buckets longer than an hour are the sample-weighted
+        mean of the hourly values, and max is the true maximum.
+        """
+        where, params = 'hour >= ?', [bucket, bucket, since]
+        if endpoint:
+            where += ' AND endpoint LIKE ?'
+            params.append(f"%{endpoint}%")
+        return self._query(
+            f"""
+            SELECT CAST(hour / ? AS INTEGER) * ? AS bucket, endpoint,
+                   SUM(count) AS requests, SUM(errors) AS errors, SUM(sum) / SUM(count) AS mean,
+                   SUM(p50 * count) / SUM(count) AS p50, SUM(p95 * count) / SUM(count) AS p95,
+                   SUM(p99 * count) / SUM(count) AS p99, MAX(max) AS max
+            FROM latency_hourly WHERE {where}
+            GROUP BY bucket, endpoint ORDER BY endpoint, bucket
+            """,
+            params
+        )
+
+    def recent_latency(self, per_endpoint=256, max_age=7 * DAY):
+        """{endpoint: [seconds]} of the latest raw samples per endpoint, oldest first"""
+        rows = self._query(
+            """
+            SELECT endpoint, seconds FROM (
+                SELECT endpoint, seconds, ts,
+                       ROW_NUMBER() OVER (PARTITION BY endpoint ORDER BY ts DESC) AS n
+                FROM latency WHERE ts >= ?
+            ) WHERE n <= ? ORDER BY endpoint, ts
+            """,
+            (time.time() - max_age, per_endpoint)
+        )
+        recent = {}
+        for row in rows:
+            recent.setdefault(row['endpoint'], []).append(row['seconds'])
+        return recent
+
+    def account_history(self, account, limit=50):
+        """Most recent results for one account, newest first"""
+        return self._query(
+            'SELECT ts, environment, check_name, passed FROM checks WHERE account = ? ORDER BY ts DESC LIMIT ?',
+            (account, limit)
+        )
+
+    def get_status(self):
+        with self.lock:
+            buffered = len(self.pending_checks) + len(self.pending_latency)
+        with self.db_lock:
+            counts = {
+                table: self.db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in ('checks', 'latency', 'latency_hourly')
+            }
+        return dict(counts, buffered=buffered)
+
+    # Lifecycle
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='history', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self.db_lock:
+            self.db.close()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ History flush failed: {str(e)}")
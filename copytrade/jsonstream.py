@@ -0,0 +1,187 @@
+"""Streaming, field-selective decoding of large ``{"result": [...]}`` responses.
+
+``/v2/products`` and fill history pages are by far the largest bodies we
+receive, and most callers need a handful of fields per record (or just a
+count). ``ResultStream`` reads the body in chunks and decodes one array
+element at a time with ``json.JSONDecoder.raw_decode``, keeping only the
+requested fields, converted to the requested types. The full response tree is
+never built: peak memory is one chunk plus one element.
+
+Top-level keys other than the array (``success``, ``meta``) are decoded
+whole and collected in ``extras``; when they follow the array they are
+available once iteration finishes.
+"""
+
+import json
+
+WHITESPACE = ' \t\n\r'
+NUMBER_CHARS = '0123456789.eE+-'
+
+_decoder = json.JSONDecoder()
+
+
+def iter_response_chunks(response, chunk_size=65536):
+    """Raw body chunks from a requests or httpx response"""
+    if hasattr(response, 'iter_content'):
+        return response.iter_content(chunk_size=chunk_size)
+    if hasattr(response, 'iter_bytes'):
+        return response.iter_bytes(chunk_size)
+    return iter([response.content])
+
+
+def _lookup(record, path):
+    value = record
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def select_fields(record, fields):
+    """Project a decoded element onto {output name: (dotted path, converter)}"""
+    selected = {}
+    for name, (path, convert) in fields.items():
+        value = _lookup(record, path)
+        if value is not None and convert is not None:
+            try:
+                value = convert(value)
+            except (TypeError, ValueError):
+                value = None
+        selected[name] = value
+    return selected
+
+
+def normalize_fields(fields):
+    """Accept a list of names, {name: converter} or {name: (path, converter)}"""
+    if fields is None:
+        return None
+    if not isinstance(fields, dict):
+        return {name: (name, None) for name in fields}
+    return {
+        name: spec if isinstance(spec, tuple) else (name, spec)
+        for name, spec in fields.items()
+    }
+
+
+class ResultStream:
+    def __init__(self, chunks, fields=None, key='result'):
+        self.chunks = iter(chunks)
+        self.fields = normalize_fields(fields)  # None keeps whole elements
+        self.key = key
+        self.extras = {}
+        self.count = 0
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._pending = b''
+
+    # Buffering
+
+    def _fill(self):
+        """Read one more chunk; returns False at end of body"""
+        if self._eof:
+            return False
+        for chunk in self.chunks:
+            if not chunk:
+                continue
+            if isinstance(chunk, bytes):
+                # Keep a multi-byte character split across chunks for the next read
+                data = self._pending + chunk
+                try:
+                    text = data.decode('utf-8')
+                    self._pending = b''
+                except UnicodeDecodeError as e:
+                    if e.start < len(data) - 3:
+                        raise
+                    text = data[:e.start].decode('utf-8')
+                    self._pending = data[e.start:]
+            else:
+                text = chunk
+            # Drop what has been consumed so the buffer stays about one chunk long
+            self._buf = self._buf[self._pos:] + text
+            self._pos = 0
+            return True
+        self._eof = True
+        return False
+
+    def _skip_ws(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill():
+                return
+
+    def _peek(self):
+        self._skip_ws()
+        if self._pos >= len(self._buf):
+            raise ValueError('unexpected end of JSON body')
+        return self._buf[self._pos]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self._pos}, got {self._buf[self._pos]!r}")
+        self._pos += 1
+
+    def _value(self):
+        """Decode the next complete JSON value, reading more of the body as needed"""
+        self._skip_ws()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut at the buffer edge ('-4' of '-4.5e2') decodes fine but may continue in the next chunk
+            if isinstance(value, (int, float)) and not self._eof and \
+                    not self._buf[end:].strip(NUMBER_CHARS) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    # Iteration
+
+    def __iter__(self):
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            name = self._value()
+            self._expect(':')
+            if name == self.key and self._peek() == '[':
+                self._pos += 1
+                yield from self._elements()
+            else:
+                self.extras[name] = self._value()
+            if self._peek() == '}':
+                self._pos += 1
+                return
+            self._expect(',')
+
+    def _elements(self):
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            element = self._value()
+            self.count += 1
+            yield element if self.fields is None else select_fields(element, self.fields)
+            if self._peek() == ']':
+                self._pos += 1
+                return
+            self._expect(',')
+
+
+def stream_result(response, fields=None, key='result', chunk_size=65536):
+    """ResultStream over a response opened with stream=True"""
+    return ResultStream(iter_response_chunks(response, chunk_size), fields, key)
+
+
+def count_results(response, key='result'):
+    """Count array elements without keeping any of them"""
+    stream = stream_result(response, fields={}, key=key)
+    for _ in stream:
+        pass
+    return stream.count
@@ -0,0 +1,162 @@
+"""Keyed serial executor.
+
+Tasks submitted under the same key run one at a time, in submission order.
+Different keys run in parallel, up to ``max_workers`` at once. A follower's
+orders therefore stay in sequence, and a slow account holds up only its own
+lane instead of every follower behind one global queue.
+
+A lane hands its worker back after every task, so a key with a deep backlog
+cannot keep a thread from other keys waiting behind it.
+
+Tasks carry a priority class: ``CLOSE`` (closes and reduce-only orders),
+``OPEN`` (the default) or ``MAINTENANCE`` (background reads). A free worker
+takes the waiting lane with the best class, oldest first within a class, so
+an exit storm's closes go ahead of opening orders queued earlier. Tasks in
+one lane still run in submission order; a lane takes the best class of
+anything waiting in it, so a close also pulls its lane's earlier orders
+forward. A lane that has waited longer than ``starvation_after`` seconds is
+taken next whatever its class, so lower classes keep moving under load.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+CLOSE = 0
+OPEN = 1
+MAINTENANCE = 2
+PRIORITY_NAMES = ('close', 'open', 'maintenance')
+
+
+class KeyedExecutor:
+    def __init__(self, max_workers=8, thread_name_prefix='lane', starvation_after=0.5):
+        self.max_workers = max_workers
+        self.starvation_after = starvation_after
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.lanes = {}  # key -> deque of (future, fn, args, kwargs, priority) waiting to run
+        self.active = set()  # keys with a task scheduled or running
+        self.ready = [deque() for _ in PRIORITY_NAMES]  # per class: (queued at, key) of lanes waiting for a worker
+        self.ready_class = {}  # key -> class of its live entry in ready; older entries are skipped
+        self.stats = {'run': [0] * len(PRIORITY_NAMES), 'starvation_picks': 0}
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self._shutdown = False
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Queue fn on the key's lane at OPEN priority; returns a Future for its result"""
+        return self.submit_at(OPEN, key, fn, *args, **kwargs)
+
+    def submit_at(self, priority, key, fn, *args, **kwargs):
+        """Queue fn on the key's lane in a priority class; returns a Future for its result"""
+        future = Future()
+        with self.lock:
+            if self._shutdown:
+                raise RuntimeError('cannot submit after shutdown')
+            self.lanes.setdefault(key, deque()).append((future, fn, args, kwargs, priority))
+            if key in self.active:
+                if priority < self.ready_class.get(key, priority):
+                    # Waiting lane gains a more urgent task: promote it
+                    self._make_ready(key, priority)
+                return future
+            self.active.add(key)
+            self._make_ready(key, priority)
+        self.pool.submit(self._run_next)
+        return future
+
+    def _make_ready(self, key, priority):
+        self.ready_class[key] = priority
+        self.ready[priority].append((time.monotonic(), key))
+
+    def _live_head(self, priority):
+        ready = self.ready[priority]
+        while ready and self.ready_class.get(ready[0][1]) != priority:
+            ready.popleft()
+        return ready[0] if ready else None
+
+    def _pick(self):
+        """Key of the lane to run next: a starved lane if any, else the best class, oldest first"""
+        heads = [self._live_head(priority) for priority in range(len(self.ready))]
+        waiting = [(head[0], priority) for priority, head in enumerate(heads) if head is not None]
+        oldest, priority = min(waiting)
+        if priority != waiting[0][1] and time.monotonic() - oldest > self.starvation_after:
+            self.stats['starvation_picks'] += 1
+        else:
+            priority = waiting[0][1]
+        key = self.ready[priority].popleft()[1]
+        del self.ready_class[key]
+        return key
+
+    def _run_next(self):
+        with self.lock:
+            key = self._pick()
+            future, fn, args, kwargs, priority = self.lanes[key].popleft()
+            self.stats['run'][priority] += 1
+
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        with self.lock:
+            lane = self.lanes[key]
+            if not lane:
+                del self.lanes[key]
+                self.active.discard(key)
+                if not self.active:
+                    self.idle.notify_all()
+                return
+            # Requeue behind other lanes rather than looping, so one busy key cannot starve the rest
+            self._make_ready(key, min(task[4] for task in lane))
+        try:
+            self.pool.submit(self._run_next)
+        except RuntimeError:
+            # Pool already shut down without waiting; whatever is left was cancelled
+            with self.lock:
+                self.lanes.pop(key, None)
+                self.ready_class.pop(key, None)
+                self.active.discard(key)
+                if not self.active:
+                    self.idle.notify_all()
+
+    def pending(self, key=None):
+        """Tasks waiting (not yet started) on one lane, or on all lanes"""
+        with self.lock:
+            if key is not None:
+                return len(self.lanes.get(key, ()))
+            return sum(len(lane) for lane in self.lanes.values())
+
+    def queued(self):
+        """(key, fn, args, kwargs) for every task not yet started, lane by lane in order"""
+        with self.lock:
+            return [
+                (key, fn, args, kwargs)
+                for key, lane in self.lanes.items()
+                for future, fn, args, kwargs, _ in lane
+                if not future.cancelled()
+            ]
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'lanes': len(self.lanes),
+                'active_lanes': len(self.active),
+                'queued': sum(len(lane) for lane in self.lanes.values()),
+                'max_workers': self.max_workers,
+                'run_by_priority': dict(zip(PRIORITY_NAMES, self.stats['run'])),
+                'starvation_picks': self.stats['starvation_picks']
+            }
+
+    def shutdown(self, wait=True):
+        """Stop accepting work; with wait, drain every lane first, otherwise cancel what has not started"""
+        with self.lock:
+            self._shutdown = True
+            if wait:
+                while self.active:
+                    self.idle.wait()
+            else:
+                for lane in self.lanes.values():
+                    for future, *_ in lane:
+                        future.cancel()
+        self.pool.shutdown(wait=wait)
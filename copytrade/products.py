@@ -0,0 +1,406 @@
+"""Memory-mapped product metadata index.
+
+``product-ids.json`` only maps symbol -> product id. This index also carries
+contract value, tick size, minimum lot and position limit in a fixed, columnar file that
+is ``mmap``-ed at startup. Each column is exposed as a typed ``memoryview`` so
+a lookup is one dict probe plus an array read; nothing is parsed on the order
+path.
+
+File layout (little endian)::
+
+    header  (64 bytes)  magic, version, count, capacity, updated_at
+    contract_value      float64 x capacity
+    tick_size           float64 x capacity
+    min_lot             float64 x capacity
+    position_limit      float64 x capacity
+    product_id          int64   x capacity
+    status              uint8   x capacity   (1 = live, 0 = delisted)
+    symbol              32 bytes x capacity  (NUL padded ASCII)
+
+``refresh`` applies a ``/v2/products`` response as a diff: changed rows are
+rewritten in place, new products take free slots and products missing from the
+response are marked delisted. The file is only rebuilt (atomically) when it
+runs out of capacity. Indexes open in other processes see rewritten rows at
+once through the mapping, and pick up appended rows or a rebuilt file the
+next time a lookup misses.
+
+``position_limit`` is the exchange's ``position_size_limit``: the largest
+position allowed in a product. It is not an order size limit, though no
+single order can exceed it either.
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b'DPIX'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIId')
+HEADER_SIZE = 64
+SYMBOL_SIZE = 32
+
+FLOAT_COLUMNS = ('contract_value', 'tick_size', 'min_lot', 'position_limit')
+DEFAULT_INDEX_PATH = 'product-index.bin'
+DEFAULT_CONTRACT_TYPES = ('perpetual_futures',)
+
+LIVE = 1
+DELISTED = 0
+
+
+def column_offsets(capacity):
+    """Byte offset of each column for a given capacity"""
+    offsets = {}
+    offset = HEADER_SIZE
+    for name in FLOAT_COLUMNS + ('product_id',):
+        offsets[name] = offset
+        offset += 8 * capacity
+    offsets['status'] = offset
+    offset += capacity
+    offsets['symbol'] = offset
+    offset += SYMBOL_SIZE * capacity
+    return offsets, offset
+
+
+def _float(value, default=math.nan):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+PRODUCT_FIELDS = ('id', 'symbol', 'contract_type', 'contract_value', 'tick_size', 'min_size',
+                  'position_size_limit')
+
+
+def product_row(product):
+    """Extract the indexed fields from a /v2/products entry"""
+    return {
+        'product_id': int(product['id']),
+        'symbol': product['symbol'],
+        'contract_value': _float(product.get('contract_value')),
+        'tick_size': _float(product.get('tick_size')),
+        'min_lot': _float(product.get('min_size'), 1.0),
+        'position_limit': _float(product.get('position_size_limit'), math.inf)
+    }
+
+
+def write_index(path, rows, capacity=None):
+    """Write a fresh index file atomically"""
+    capacity = max(capacity or 0, len(rows), 16)
+    offsets, size = column_offsets(capacity)
+    buf = bytearray(size)
+    HEADER.pack_into(buf, 0, MAGIC, VERSION, 0, len(rows), capacity, time.time())
+
+    for slot, row in enumerate(rows):
+        for name in FLOAT_COLUMNS:
+            struct.pack_into('<d', buf, offsets[name] + 8 * slot, row[name])
+        struct.pack_into('<q', buf, offsets['product_id'] + 8 * slot, row['product_id'])
+        buf[offsets['status'] + slot] = row.get('status', LIVE)
+        struct.pack_into(f'{SYMBOL_SIZE}s', buf, offsets['symbol'] + SYMBOL_SIZE * slot,
+                         row['symbol'].encode('ascii'))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(buf)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _file_identity(path):
+    stat = os.stat(path)
+    return stat.st_dev, stat.st_ino
+
+
+class _Mapping:
+    """One mapped file with its columns and slot tables; never changed once built
+
+    The file is only needed to create the mapping (mmap keeps its own
+    descriptor), so it is closed at once. The mapping itself is unmapped when
+    the last reference to this object goes away, which is also when the last
+    reader still using it is done.
+    """
+
+    def __init__(self, path):
+        with open(path, 'r+b') as f:
+            stat = os.fstat(f.fileno())
+            self.identity = stat.st_dev, stat.st_ino
+            self.mm = mmap.mmap(f.fileno(), 0)
+
+        magic, version, _, self.count, self.capacity, self.updated_at = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} product index")
+
+        self.offsets, _ = column_offsets(self.capacity)
+        view = memoryview(self.mm)
+        self.views = [view]
+        for name in FLOAT_COLUMNS:
+            setattr(self, name, self._column(view, self.offsets[name], 8, 'd'))
+        self.product_id = self._column(view, self.offsets['product_id'], 8, 'q')
+        self.status = self._column(view, self.offsets['status'], 1, 'B')
+
+        self.slots = {}  # symbol -> slot
+        self.id_slots = {}  # product id -> slot
+        self._index_slots(range(self.count))
+
+    def _column(self, view, offset, width, fmt):
+        column = view[offset:offset + width * self.capacity].cast(fmt)
+        self.views.append(column)
+        return column
+
+    def _index_slots(self, slots):
+        for slot in slots:
+            symbol = self.symbol_at(slot)
+            self.slots[symbol] = slot
+            self.id_slots[self.product_id[slot]] = slot
+
+    def symbol_at(self, slot):
+        start = self.offsets['symbol'] + SYMBOL_SIZE * slot
+        return bytes(self.mm[start:start + SYMBOL_SIZE]).rstrip(b'\0').decode('ascii')
+
+    def extended(self, count):
+        """A copy that also indexes rows appended up to count, sharing the mapping"""
+        mapping = object.__new__(_Mapping)
+        mapping.__dict__.update(self.__dict__, count=count, slots=dict(self.slots), id_slots=dict(self.id_slots))
+        mapping._index_slots(range(self.count, count))
+        return mapping
+
+    def close(self):
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.mm.close()
+
+
+class ProductIndex:
+    def __init__(self, path, recheck_interval=1.0):
+        self.path = path
+        self.recheck_interval = recheck_interval  # minimum seconds between checks for a newer file
+        self._checked_at = time.monotonic()
+        # Everything read from the file lives in one _Mapping that is replaced, never
+        # modified, so a reader that takes self._map once sees one consistent file
+        self._map = _Mapping(path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        return cls(path)
+
+    def close(self):
+        self._map.close()
+
+    def __len__(self):
+        return self._map.count
+
+    def __getattr__(self, name):
+        # count, capacity, updated_at, slots, id_slots and the columns of the current mapping
+        if name == '_map':
+            raise AttributeError(name)
+        return getattr(self._map, name)
+
+    def __contains__(self, symbol):
+        return symbol in self._map.slots or (self.reload_if_changed() and symbol in self._map.slots)
+
+    def _slot(self, symbol):
+        """(mapping, slot) for a symbol; read columns from the returned mapping, not self"""
+        mapping = self._map
+        slot = mapping.slots.get(symbol)
+        if slot is None:
+            self.reload_if_changed()
+            mapping = self._map
+            slot = mapping.slots[symbol]
+        return mapping, slot
+
+    # Another process may refresh the file: rows it appends only bump the
+    # header count, while a grow replaces the file. Both are picked up on a
+    # lookup miss, so hits never pay for the check.
+
+    def reload_if_changed(self):
+        """Index rows appended since load, or remap a replaced file; True if anything changed"""
+        now = time.monotonic()
+        if now - self._checked_at < self.recheck_interval:
+            return False
+        self._checked_at = now
+        current = self._map
+        try:
+            identity = _file_identity(self.path)
+        except OSError:
+            return False
+        if identity != current.identity:
+            # The old mapping is dropped, not closed: a reader on another thread may
+            # still hold it, and it is unmapped once the last such reference is gone
+            self._map = _Mapping(self.path)
+            return True
+        count = HEADER.unpack_from(current.mm, 0)[3]
+        if count <= current.count:
+            return False
+        self._map = current.extended(count)
+        return True
+
+    # Lookups: one dict probe, then array reads
+
+    def get_product_id(self, symbol):
+        mapping, slot = self._slot(symbol)
+        return mapping.product_id[slot]
+
+    def get_symbol(self, product_id):
+        mapping = self._map
+        slot = mapping.id_slots.get(product_id)
+        if slot is None:
+            self.reload_if_changed()
+            mapping = self._map
+            slot = mapping.id_slots[product_id]
+        return mapping.symbol_at(slot)
+
+    def get_contract_value(self, symbol):
+        mapping, slot = self._slot(symbol)
+        return mapping.contract_value[slot]
+
+    def get_tick_size(self, symbol):
+        mapping, slot = self._slot(symbol)
+        return mapping.tick_size[slot]
+
+    def get_min_lot(self, symbol):
+        mapping, slot = self._slot(symbol)
+        return mapping.min_lot[slot]
+
+    def get_position_limit(self, symbol):
+        """Largest position the exchange allows in the product (position_size_limit), not an order size cap"""
+        mapping, slot = self._slot(symbol)
+        return mapping.position_limit[slot]
+
+    def is_live(self, symbol):
+        if symbol not in self:
+            return False
+        mapping, slot = self._slot(symbol)
+        return mapping.status[slot] == LIVE
+
+    def get(self, symbol):
+        """Return the full row for a symbol as a dict"""
+        mapping, slot = self._slot(symbol)
+        return self._row(mapping, slot, symbol)
+
+    def rows(self):
+        mapping = self._map
+        return [self._row(mapping, slot, symbol) for symbol, slot in mapping.slots.items()]
+
+    @staticmethod
+    def _row(mapping, slot, symbol):
+        row = {name: getattr(mapping, name)[slot] for name in FLOAT_COLUMNS}
+        row.update(product_id=mapping.product_id[slot], symbol=symbol, status=mapping.status[slot])
+        return row
+
+    # Incremental refresh
+
+    @staticmethod
+    def _write_slot(mapping, slot, row):
+        for name in FLOAT_COLUMNS:
+            getattr(mapping, name)[slot] = row[name]
+        mapping.product_id[slot] = row['product_id']
+        mapping.status[slot] = row.get('status', LIVE)
+        start = mapping.offsets['symbol'] + SYMBOL_SIZE * slot
+        mapping.mm[start:start + SYMBOL_SIZE] = row['symbol'].encode('ascii').ljust(SYMBOL_SIZE, b'\0')
+
+    @staticmethod
+    def _changed(mapping, slot, row):
+        if mapping.status[slot] != LIVE or mapping.product_id[slot] != row['product_id']:
+            return True
+        for name in FLOAT_COLUMNS:
+            old, new = getattr(mapping, name)[slot], row[name]
+            if old != new and not (math.isnan(old) and math.isnan(new)):
+                return True
+        return False
+
+    def apply(self, products, contract_types=DEFAULT_CONTRACT_TYPES):
+        """Apply a /v2/products listing as a diff; returns (index, changes)
+
+        The returned index is ``self`` unless the file had to grow, in which
+        case this index is closed and a reloaded one is returned.
+        """
+        rows = [
+            product_row(p) for p in products
+            if not contract_types or p.get('contract_type') in contract_types
+        ]
+        mapping = self._map
+        seen = set()
+        changes = {'added': 0, 'updated': 0, 'delisted': 0}
+        new_rows = []
+        moved_ids = {}  # product id -> slot, for rows whose id changed
+
+        for row in rows:
+            seen.add(row['symbol'])
+            slot = mapping.slots.get(row['symbol'])
+            if slot is None:
+                new_rows.append(row)
+            elif self._changed(mapping, slot, row):
+                self._write_slot(mapping, slot, row)
+                moved_ids[row['product_id']] = slot
+                changes['updated'] += 1
+
+        for symbol, slot in mapping.slots.items():
+            if symbol not in seen and mapping.status[slot] == LIVE:
+                mapping.status[slot] = DELISTED
+                changes['delisted'] += 1
+
+        changes['added'] = len(new_rows)
+        count = mapping.count + len(new_rows)
+        if count > mapping.capacity:
+            all_rows = self.rows() + new_rows
+            self.close()
+            write_index(self.path, all_rows, capacity=2 * len(all_rows))
+            return ProductIndex(self.path, self.recheck_interval), changes
+
+        for slot, row in enumerate(new_rows, mapping.count):
+            self._write_slot(mapping, slot, row)
+
+        updated_at = time.time()
+        HEADER.pack_into(mapping.mm, 0, MAGIC, VERSION, 0, count, mapping.capacity, updated_at)
+        mapping.mm.flush()
+        fresh = mapping.extended(count)
+        fresh.id_slots.update(moved_ids)
+        fresh.updated_at = updated_at
+        self._map = fresh
+        return self, changes
+
+
+def fetch_products(base_url, session=None, contract_types=DEFAULT_CONTRACT_TYPES):
+    """Download the product catalog from /v2/products"""
+    import requests
+
+    from .jsonstream import stream_result
+
+    params = {'contract_types': ','.join(contract_types)} if contract_types else None
+    response = (session or requests).get(f"{base_url}/v2/products", params=params, timeout=10, stream=True)
+    response.raise_for_status()
+    # Each catalog entry carries dozens of fields; keep only what the index stores
+    return list(stream_result(response, PRODUCT_FIELDS))
+
+
+def seed_from_symbol_mapping(path, mapping_path='product-ids.json'):
+    """Create an index from product-ids.json; only ids are known until a refresh"""
+    with open(mapping_path) as f:
+        mapping = json.load(f)['symbolMapping']
+    rows = [
+        {
+            'product_id': int(product_id),
+            'symbol': symbol,
+            'contract_value': math.nan,
+            'tick_size': math.nan,
+            'min_lot': 1.0,
+            'position_limit': math.inf
+        }
+        for symbol, product_id in mapping.items()
+    ]
+    write_index(path, rows, capacity=2 * len(rows))
+
+
+def refresh_index(path, base_url, session=None):
+    """Create or incrementally update the index at path from the live catalog"""
+    products = fetch_products(base_url, session)
+    if not os.path.exists(path):
+        write_index(path, [], capacity=2 * len(products))
+    index = ProductIndex(path)
+    return index.apply(products)
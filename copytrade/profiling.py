@@ -0,0 +1,235 @@
+"""Profiling for validator sweeps and engine runs.
+
+Two whole-run profilers are available through ``profiled()`` (and the CLI's
+``--profile`` flag):
+
+* ``cprofile`` - deterministic; before Python 3.12 every thread started
+  during the run gets its own ``cProfile.Profile`` and the results are merged
+  into one ``.pstats`` file; from 3.12 one profile covers every thread
+* ``sample``   - low overhead; a background thread samples every thread's stack
+  at a fixed interval and writes collapsed stacks (``.folded``) that
+  flamegraph.pl / speedscope read directly
+
+Independently of the profiler, code on the request path wraps its work in
+``phase(name, endpoint)`` so wall time can be broken down by endpoint and by
+phase (``network``, ``signing``, ``json_decode``, ``db_io``). ``phase`` is a
+no-op returning a shared null context unless a profiled run is active.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+PHASES = ('network', 'signing', 'json_decode', 'db_io')
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class PhaseTimer:
+    """Accumulates wall time per (phase, endpoint)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def add(self, phase_name, endpoint, elapsed):
+        key = (phase_name, endpoint or '-')
+        with self.lock:
+            self.totals[key] += elapsed
+            self.counts[key] += 1
+
+    def summary(self):
+        """Rows sorted by total time, slowest first"""
+        with self.lock:
+            rows = [
+                {
+                    'phase': phase_name,
+                    'endpoint': endpoint,
+                    'calls': self.counts[(phase_name, endpoint)],
+                    'total_ms': total * 1000,
+                    'mean_ms': total * 1000 / self.counts[(phase_name, endpoint)]
+                }
+                for (phase_name, endpoint), total in self.totals.items()
+            ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+
+class _Phase:
+    __slots__ = ('timer', 'name', 'endpoint', 'started')
+
+    def __init__(self, timer, name, endpoint):
+        self.timer = timer
+        self.name = name
+        self.endpoint = endpoint
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, self.endpoint, time.perf_counter() - self.started)
+        return False
+
+
+_active_timer = None
+
+
+def phase(name, endpoint=None):
+    """Time a block as one phase of work against an endpoint"""
+    timer = _active_timer
+    if timer is None:
+        return _NULL_PHASE
+    return _Phase(timer, name, endpoint)
+
+
+def is_active():
+    return _active_timer is not None
+
+
+class SamplingProfiler:
+    """Samples all thread stacks every ``interval`` seconds into collapsed stacks"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = defaultdict(int)
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_folded(self, path):
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class ThreadedCProfile:
+    """cProfile for the calling thread plus every thread started while running
+
+    From Python 3.12 cProfile is built on ``sys.monitoring``, which already
+    covers every thread, and a second profile in a thread raises ValueError.
+    """
+
+    def __init__(self):
+        import cProfile
+        self._cprofile = cProfile
+        self.profiles = []
+        self.lock = threading.Lock()
+
+    def _thread_hook(self, *args):
+        sys.setprofile(None)
+        profile = self._cprofile.Profile()
+        try:
+            # Replaces this bootstrap hook with the profiler for the rest of the thread
+            profile.enable()
+        except ValueError:
+            return  # another profiler already covers this thread
+        with self.lock:
+            self.profiles.append(profile)
+
+    def start(self):
+        main_profile = self._cprofile.Profile()
+        self.profiles.append(main_profile)
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._thread_hook)
+        main_profile.enable()
+
+    def stop(self):
+        if sys.version_info < (3, 12):
+            threading.setprofile(None)
+        with self.lock:
+            profiles = list(self.profiles)
+        for profile in profiles:
+            profile.disable()
+
+    def write_pstats(self, path):
+        import pstats
+        stats = pstats.Stats(self.profiles[0])
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return stats
+
+
+def print_phase_summary(rows, limit=20):
+    print("\n" + "=" * 60)
+    print("PROFILE: WALL TIME BY PHASE AND ENDPOINT")
+    print("=" * 60)
+    if not rows:
+        print("No instrumented phases recorded")
+        return
+    print(f"{'phase':<12} {'endpoint':<28} {'calls':>6} {'total ms':>10} {'mean ms':>9}")
+    for row in rows[:limit]:
+        print(f"{row['phase']:<12} {row['endpoint'][:28]:<28} {row['calls']:>6} "
+              f"{row['total_ms']:>10.1f} {row['mean_ms']:>9.2f}")
+
+
+@contextmanager
+def profiled(mode='cprofile', output='copytrade-profile', interval=0.005):
+    """Profile everything inside the block and write <output>.pstats/.folded/.phases.json"""
+    global _active_timer
+
+    timer = PhaseTimer()
+    profiler = ThreadedCProfile() if mode == 'cprofile' else SamplingProfiler(interval)
+    _active_timer = timer
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        yield timer
+    finally:
+        profiler.stop()
+        wall = time.perf_counter() - started
+        _active_timer = None
+
+        if mode == 'cprofile':
+            path = f"{output}.pstats"
+            profiler.write_pstats(path).sort_stats('cumulative').print_stats(15)
+        else:
+            path = f"{output}.folded"
+            profiler.write_folded(path)
+
+        rows = timer.summary()
+        with open(f"{output}.phases.json", 'w') as f:
+            json.dump({'mode': mode, 'wall_ms': wall * 1000, 'phases': rows}, f, indent=2)
+
+        print_phase_summary(rows)
+        print(f"\nTotal wall time: {wall * 1000:.1f} ms")
+        print(f"📄 Profile written to {path} and {output}.phases.json")
@@ -0,0 +1,75 @@
+"""Inverted master -> followers index for trade fan-out.
+
+The JS engine finds a trade's followers by filtering every follower's set of
+masters, which costs O(total followers) per trade. ``RelationshipIndex``
+keeps the inverse mapping as well, maintained on each link and unlink, so a
+trade looks up its master's followers directly and fan-out costs
+O(followers of that master), however many masters share the process.
+
+Each master's followers are stored as an immutable tuple that is replaced on
+change. The fan-out path therefore reads without taking a lock, and a trade
+never sees a follower list that is half updated.
+"""
+
+import threading
+
+EMPTY = ()
+
+
+class RelationshipIndex:
+    def __init__(self):
+        self.by_master = {}  # master id -> tuple of follower names, in link order
+        self.by_follower = {}  # follower name -> frozenset of master ids
+        self.lock = threading.Lock()  # serializes writers only
+
+    def followers_of(self, master_id):
+        return self.by_master.get(master_id, EMPTY)
+
+    def masters_of(self, name):
+        return self.by_follower.get(name, frozenset())
+
+    def link(self, name, master_id):
+        with self.lock:
+            masters = self.by_follower.get(name, frozenset())
+            if master_id in masters:
+                return False
+            self.by_follower[name] = masters | {master_id}
+            self.by_master[master_id] = self.by_master.get(master_id, EMPTY) + (name,)
+            return True
+
+    def unlink(self, name, master_id):
+        with self.lock:
+            masters = self.by_follower.get(name, frozenset())
+            if master_id not in masters:
+                return False
+            masters = masters - {master_id}
+            if masters:
+                self.by_follower[name] = masters
+            else:
+                del self.by_follower[name]
+            followers = tuple(f for f in self.by_master[master_id] if f != name)
+            if followers:
+                self.by_master[master_id] = followers
+            else:
+                del self.by_master[master_id]
+            return True
+
+    def set_masters(self, name, master_ids):
+        """Make a follower's masters exactly master_ids, touching only what changed"""
+        current = self.masters_of(name)
+        wanted = frozenset(master_ids)
+        for master_id in current - wanted:
+            self.unlink(name, master_id)
+        for master_id in wanted - current:
+            self.link(name, master_id)
+
+    def remove_follower(self, name):
+        for master_id in self.masters_of(name):
+            self.unlink(name, master_id)
+
+    def get_status(self):
+        return {
+            'masters': len(self.by_master),
+            'followers': len(self.by_follower),
+            'links': sum(len(followers) for followers in list(self.by_master.values()))
+        }
@@ -0,0 +1,310 @@
+"""Pre-trade risk gate for follower orders.
+
+Before dispatch, ``RiskGate.evaluate`` checks every follower's proposed order
+for a set of broker fills in one pass. Each order gets ``ACCEPT``, ``CLIP``
+(with a smaller size) or ``REJECT``. The limits are:
+
+- ``max_position``: absolute position size per symbol
+- ``max_notional``: gross notional across all of a follower's positions
+- ``max_leverage``: gross notional / equity
+- ``max_daily_loss``: fraction of the day's starting equity; past it, only
+  orders that reduce a position go out
+
+Each follower's limits are resolved from its config once, when the follower
+is set. They fall back to the gate's defaults, and None means no limit.
+Positions and notional come from an ``ExposureMatrix``, and equity from a
+``BalanceService``; both are in memory. A check is therefore a handful of
+dict and array reads per order, with no I/O. Orders that only reduce a
+position, and reduce-only orders, are always accepted.
+
+Orders the gate lets through are reserved until the engine has placed them
+or given up (``reserve``/``release``), so fills still in flight count
+against the limits of the next fan-out. The unfilled part of a placed order
+stays reserved under its exchange order id (``hold``) until a resync finds
+it no longer open (``settle_open_orders``). A clipped size is floored to the
+product's lot step, and an order that ends up below the minimum lot is
+rejected. When a limit applies but a value it needs is unknown (the contract
+value or price for notional and leverage, equity for leverage and daily
+loss), the order is rejected rather than let through on a guess.
+
+The daily-loss baseline is the first equity seen each UTC day. It is part
+of ``export_state`` so a restart does not reset it to the current equity.
+"""
+
+import math
+import threading
+import time
+
+ACCEPT = 'accept'
+CLIP = 'clip'
+REJECT = 'reject'
+
+# Follower config column -> gate limit
+LIMIT_COLUMNS = {
+    'max_position': 'max_position_size',
+    'max_notional': 'max_notional',
+    'max_leverage': 'max_leverage',
+    'max_daily_loss': 'daily_loss_limit'
+}
+
+
+def _limit(value, default):
+    if value is None or value == '':
+        return default
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+class RiskGate:
+    def __init__(self, exposure=None, balances=None, products=None, max_position=None, max_notional=None,
+                 max_leverage=None, max_daily_loss=None, max_balance_age=300):
+        self.exposure = exposure  # ExposureMatrix for positions and notional
+        self.balances = balances  # BalanceService for equity (leverage, daily loss)
+        self.products = products  # ProductIndex for contract values and minimum lots
+        self.defaults = (max_position, max_notional, max_leverage, max_daily_loss)
+        self.max_balance_age = max_balance_age
+        self.limits = {}  # follower name -> (max position, max notional, max leverage, max daily loss, min lot)
+        self.day_start = {}  # follower name -> (UTC day, equity at first sight that day)
+        self.reserved = {}  # (follower name, symbol) -> signed size of orders let through but not yet placed
+        self.reserved_notional = {}  # follower name -> notional those orders add
+        self.open_orders = {}  # (follower name, exchange order id) -> (symbol, signed size, notional, held at)
+        self.stats = {ACCEPT: 0, CLIP: 0, REJECT: 0}
+        self.lock = threading.Lock()
+
+    def set_limits(self, name, config):
+        resolved = tuple(_limit(config.get(column), default)
+                         for column, default in zip(LIMIT_COLUMNS.values(), self.defaults))
+        self.limits[name] = resolved + (_limit(config.get('min_lot_size'), 0.0),)
+
+    def remove(self, name):
+        self.limits.pop(name, None)
+        self.day_start.pop(name, None)
+        with self.lock:
+            for key in [key for key in self.reserved if key[0] == name]:
+                del self.reserved[key]
+            self.reserved_notional.pop(name, None)
+            for key in [key for key in self.open_orders if key[0] == name]:
+                del self.open_orders[key]
+
+    def _adjust(self, name, symbol, signed, notional):
+        """Add to the reserved amounts; caller holds the lock"""
+        key = (name, symbol)
+        reserved = self.reserved.get(key, 0.0) + signed
+        if abs(reserved) < 1e-12:
+            self.reserved.pop(key, None)
+        else:
+            self.reserved[key] = reserved
+        reserved_notional = self.reserved_notional.get(name, 0.0) + notional
+        if reserved_notional <= 1e-9:
+            self.reserved_notional.pop(name, None)
+        else:
+            self.reserved_notional[name] = reserved_notional
+
+    def reserve(self, name, order):
+        """Count an order that was let through until release; the amounts are kept on the order"""
+        symbol = order['symbol']
+        signed = order['size'] if order['side'] == 'buy' else -order['size']
+        key = (name, symbol)
+        with self.lock:
+            position = self.reserved.get(key, 0.0)
+            if self.exposure is not None:
+                position += self.exposure.position(name, symbol)
+            new_position = position + signed
+            growth = abs(new_position) - abs(position) if position * new_position >= 0 else abs(new_position)
+            contract_value = self._contract(symbol)[0]
+            price = order.get('broker_price') or order.get('limit_price')
+            notional = max(growth, 0.0) * contract_value * float(price) if contract_value and price else 0.0
+            self._adjust(name, symbol, signed, notional)
+        order['risk_reserved'] = (signed, notional)
+
+    def release(self, name, order):
+        """Undo reserve once the order is placed or has failed"""
+        reserved = order.pop('risk_reserved', None)
+        if reserved is None:
+            return
+        signed, notional = reserved
+        with self.lock:
+            self._adjust(name, order['symbol'], -signed, -notional)
+
+    def hold(self, name, order_id, order, remaining):
+        """Keep the unfilled part of a placed order reserved until a resync settles it"""
+        reserved = order.get('risk_reserved')
+        if reserved is None or order_id is None or remaining <= 0 or not order['size']:
+            return
+        share = min(remaining / order['size'], 1.0)
+        signed, notional = reserved[0] * share, reserved[1] * share
+        with self.lock:
+            self._adjust(name, order['symbol'], signed, notional)
+            self.open_orders[(name, str(order_id))] = (order['symbol'], signed, notional, time.time())
+
+    def holds(self, name):
+        """Number of a follower's placed orders still held open"""
+        with self.lock:
+            return sum(1 for key in self.open_orders if key[0] == name)
+
+    def settle_open_orders(self, name, open_orders, as_of):
+        """Drop or shrink holds from a follower's open orders {order id: unfilled size} read at as_of
+
+        Holds taken after the read are left alone.
+        """
+        with self.lock:
+            for key in [key for key in self.open_orders if key[0] == name]:
+                symbol, signed, notional, held_at = self.open_orders[key]
+                if held_at >= as_of:
+                    continue
+                unfilled = open_orders.get(key[1])
+                if unfilled is None:
+                    del self.open_orders[key]
+                    self._adjust(name, symbol, -signed, -notional)
+                elif abs(unfilled) < abs(signed):
+                    share = abs(unfilled) / abs(signed)
+                    self.open_orders[key] = (symbol, signed * share, notional * share, held_at)
+                    self._adjust(name, symbol, signed * (share - 1), notional * (share - 1))
+
+    def export_state(self):
+        """Plain-data copy of the daily-loss baselines"""
+        return {'day_start': {name: list(start) for name, start in self.day_start.items()}}
+
+    def restore_state(self, state):
+        today = int(time.time() // 86400)
+        for name, (day, equity) in (state.get('day_start') or {}).items():
+            if day == today and name not in self.day_start:
+                self.day_start[name] = (day, equity)
+
+    def _equity(self, name, today):
+        if self.balances is None:
+            return None
+        equity = self.balances.get_equity(name, self.max_balance_age)
+        if equity is not None:
+            start = self.day_start.get(name)
+            if start is None or start[0] != today:
+                self.day_start[name] = (today, equity)
+        return equity
+
+    def _contract(self, symbol):
+        """(contract value or None when unknown, minimum lot)"""
+        if self.products is not None and symbol in self.products:
+            value = self.products.get_contract_value(symbol)
+            min_lot = self.products.get_min_lot(symbol)
+            return (None if math.isnan(value) else value), (0.0 if math.isnan(min_lot) else min_lot)
+        return None, 0.0
+
+    def evaluate(self, proposed):
+        """[(name, order)] -> [(decision, size, reason)] in the same order
+
+        Orders for the same follower within one call are checked against
+        the running position they build up together.
+        """
+        today = int(time.time() // 86400)
+        exposure = self.exposure
+        limits = self.limits
+        no_limits = self.defaults + (0.0,)
+        running = {}  # (name, symbol) -> position including earlier orders in this call
+        running_notional = {}  # name -> notional including earlier orders in this call
+        with self.lock:
+            reserved = dict(self.reserved)
+            reserved_notional = dict(self.reserved_notional)
+        contracts = {}
+        decisions = []
+        counts = {ACCEPT: 0, CLIP: 0, REJECT: 0}
+
+        for name, order in proposed:
+            symbol = order['symbol']
+            size = order['size']
+            signed = size if order['side'] == 'buy' else -size
+            key = (name, symbol)
+            position = running.get(key)
+            if position is None:
+                position = reserved.get(key, 0.0)
+                if exposure is not None:
+                    position += exposure.position(name, symbol)
+            new_position = position + signed
+
+            # Anything that only shrinks the position is always allowed out
+            if order.get('reduce_only') or (abs(new_position) <= abs(position) and position * new_position >= 0):
+                running[key] = new_position
+                decisions.append((ACCEPT, size, None))
+                counts[ACCEPT] += 1
+                continue
+
+            max_position, max_notional, max_leverage, max_daily_loss, min_lot = limits.get(name, no_limits)
+            if symbol not in contracts:
+                contracts[symbol] = self._contract(symbol)
+            contract_value, product_min_lot = contracts[symbol]
+            lot_step = product_min_lot or min_lot
+            min_lot = max(min_lot, product_min_lot)
+            # Only the part of the order that grows the position is limited
+            growth = abs(new_position) - abs(position) if position * new_position >= 0 else abs(new_position)
+            allowed = growth
+            reason = None
+
+            equity = None
+            if max_leverage is not None or max_daily_loss is not None:
+                equity = self._equity(name, today)
+                if equity is None:
+                    allowed, reason = 0.0, 'unknown_equity'
+            if max_daily_loss is not None and equity is not None:
+                start_equity = self.day_start[name][1]
+                if start_equity > 0 and (start_equity - equity) / start_equity >= max_daily_loss:
+                    allowed, reason = 0.0, 'daily_loss'
+
+            if max_position is not None and allowed > 0:
+                room = max_position - (abs(new_position) - growth)
+                if room < allowed:
+                    allowed, reason = max(room, 0.0), 'max_position'
+
+            price = order.get('broker_price') or order.get('limit_price')
+            unit = None
+            if (max_notional is not None or max_leverage is not None) and allowed > 0:
+                if contract_value is None:
+                    allowed, reason = 0.0, 'unknown_contract_value'
+                elif not price:
+                    allowed, reason = 0.0, 'unknown_price'
+            if price and (max_notional is not None or max_leverage is not None) and allowed > 0:
+                notional = running_notional.get(name)
+                if notional is None:
+                    notional = reserved_notional.get(name, 0.0)
+                    if exposure is not None:
+                        notional += exposure.follower_notional(name)
+                unit = contract_value * float(price)
+                cap = max_notional
+                if max_leverage is not None and equity is not None:
+                    leverage_cap = max_leverage * equity
+                    if cap is None or leverage_cap < cap:
+                        cap, cap_reason = leverage_cap, 'max_leverage'
+                    else:
+                        cap_reason = 'max_notional'
+                else:
+                    cap_reason = 'max_notional'
+                if cap is not None and notional + allowed * unit > cap:
+                    allowed, reason = max((cap - notional) / unit, 0.0), cap_reason
+
+            if allowed >= growth:
+                decision, new_size = ACCEPT, size
+            else:
+                if lot_step > 0:
+                    allowed = math.floor(allowed / lot_step + 1e-9) * lot_step
+                # Keep whatever part of the order reduces first, plus the allowed growth
+                new_size = size - (growth - allowed)
+                decision = CLIP if allowed > 0 and new_size >= min_lot else REJECT
+                if decision == REJECT and size - growth > 0:
+                    decision, new_size, allowed = CLIP, size - growth, 0.0
+            if decision == REJECT:
+                new_size, allowed = 0.0, 0.0
+            if unit is not None:
+                running_notional[name] = notional + allowed * unit
+            running[key] = position + (new_size if signed > 0 else -new_size)
+            decisions.append((decision, new_size, reason))
+            counts[decision] += 1
+
+        with self.lock:
+            for decision, count in counts.items():
+                self.stats[decision] += count
+        return decisions
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, followers_with_limits=len(self.limits))
@@ -0,0 +1,360 @@
+"""Shadow (dry-run) copy engine and would-be vs sent comparison.
+
+``ShadowEngine`` is a ``CopyEngine`` whose clients never write. Reads such
+as positions and balances go to the exchange as usual, since sizing needs
+them. Everything else runs as it would in production: dedup, sizing, lot
+bounds, the staleness check, lanes, the order template and signing. Only the
+final POST is caught by ``ShadowSession``, which records the signed payload
+and answers with a synthetic success. A new build can therefore run on live
+fills next to the production engine without placing an order.
+
+Each would-be order is recorded with the time spent in each stage:
+
+- ``dedup``: checking and recording the broker order id
+- ``sizing``: follower size, balance ratio and lot bounds
+- ``risk``: the pre-trade risk gate for the order's fan-out, plus the
+  send-time staleness check
+- ``queue_wait``: from sizing until the follower's lane picks it up
+- ``sign``: from the lane starting the send until the signed request is ready
+- ``end_to_end``: from the fill being received until the request is ready
+
+A replay of past fills starts from the followers' positions at the start of
+the replay, not their live ones: ``rewind_exposure`` subtracts each follower's
+own fills since then from the positions ``resync_exposure`` loaded.
+
+``SentOrderLog`` writes the production engine's ``trade_copied`` events as
+JSON lines. ``compare`` then matches the would-be orders against them.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from .engine import CopyEngine
+from .fills import iter_fills
+from .hedging import LatencyTracker
+from .lanes import MAINTENANCE
+from .timeouts import AdaptiveTimeouts
+
+STAGES = ('dedup', 'sizing', 'risk', 'queue_wait', 'sign', 'end_to_end')
+REWIND_FIELDS = ('product_symbol', 'product', 'side', 'size')
+
+
+class ShadowResponse:
+    """Just enough of a requests.Response for the engine's order path"""
+
+    status_code = 200
+
+    def __init__(self, body):
+        self.text = json.dumps(body)
+        self.content = self.text.encode()
+        self._body = body
+
+    def json(self, **kwargs):
+        return self._body
+
+    def raise_for_status(self):
+        pass
+
+
+class ShadowSession:
+    """Passes reads to the real session and answers writes itself"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+    def _next_id(self):
+        with self.lock:
+            self.sequence += 1
+            return f"shadow-{id(self):x}-{self.sequence}"
+
+    def request(self, method, url, *args, **kwargs):
+        if method == 'GET':
+            return self.inner.request(method, url, *args, **kwargs)
+        captured_at = time.perf_counter()
+        data = kwargs.get('data')
+        payload = json.loads(data) if data else {}
+        if urlsplit(url).path.endswith('/orders/batch'):
+            result = [{'id': self._next_id(), 'captured_at': captured_at, 'payload': order}
+                      for order in payload.get('orders', [])]
+        else:
+            result = {'id': self._next_id(), 'captured_at': captured_at, 'payload': payload}
+        return ShadowResponse({'success': True, 'result': result})
+
+    def close(self):
+        close = getattr(self.inner, 'close', None)
+        if close is not None:
+            close()
+
+
+class ShadowEngine(CopyEngine):
+    def __init__(self, *args, record_path=None, max_records=100000, **kwargs):
+        # Set before CopyEngine.__init__, which creates the clients
+        self.records = deque(maxlen=max_records)
+        self.records_lock = threading.Lock()
+        self.stage_latency = LatencyTracker(window=max_records)
+        self.shadow_timeouts = AdaptiveTimeouts()  # keep synthetic writes out of the shared deadlines
+        self.record_file = open(record_path, 'a') if record_path else None
+        super().__init__(*args, **kwargs)
+
+    def make_client(self, config):
+        client = super().make_client(config)
+        client.timeouts = self.shadow_timeouts
+        client.session = ShadowSession(client.session)
+        return client
+
+    def _timed(self, stage, started):
+        elapsed = time.perf_counter() - started
+        self.stage_latency.record(stage, elapsed)
+        return elapsed
+
+    def _mark_processed(self, key):
+        started = time.perf_counter()
+        fresh = super()._mark_processed(key)
+        self._timed('dedup', started)
+        return fresh
+
+    def build_follower_order(self, name, config, trade_data):
+        started = time.perf_counter()
+        order = super().build_follower_order(name, config, trade_data)
+        order['timings'] = {'sizing': self._timed('sizing', started)}
+        order['built_at'] = time.perf_counter()
+        return order
+
+    def apply_risk(self, proposed):
+        started = time.perf_counter()
+        allowed = super().apply_risk(proposed)
+        # Every order in the fan-out waits for the whole gate pass
+        elapsed = time.perf_counter() - started
+        for _, order in allowed:
+            order.setdefault('timings', {})['risk'] = elapsed
+        return allowed
+
+    def check_staleness(self, name, order):
+        started = time.perf_counter()
+        checked = super().check_staleness(name, order)
+        elapsed = time.perf_counter() - started + (order.get('timings') or {}).get('risk', 0)
+        self.stage_latency.record('risk', elapsed)
+        if checked is not None:
+            checked.setdefault('timings', {})['risk'] = elapsed
+        return checked
+
+    def _start_send(self, order):
+        now = time.perf_counter()
+        timings = order.setdefault('timings', {})
+        if order.get('built_at'):
+            timings['queue_wait'] = now - order['built_at']
+            self.stage_latency.record('queue_wait', timings['queue_wait'])
+        order['send_started'] = now
+
+    def _send_order(self, name, order, client):
+        self._start_send(order)
+        return super()._send_order(name, order, client)
+
+    def _place_batch(self, name, client, symbol, product_id, orders):
+        for order in orders:
+            self._start_send(order)
+        return super()._place_batch(name, client, symbol, product_id, orders)
+
+    def _record_copy(self, name, order, placed):
+        timings = dict(order.get('timings') or {})
+        captured_at = placed.get('captured_at') or time.perf_counter()
+        timings['sign'] = captured_at - order.get('send_started', captured_at)
+        self.stage_latency.record('sign', timings['sign'])
+        if order.get('received_at'):
+            # received_at is wall-clock; convert the capture to wall-clock to compare
+            timings['end_to_end'] = time.time() - (time.perf_counter() - captured_at) - order['received_at']
+            self.stage_latency.record('end_to_end', timings['end_to_end'])
+        record = {
+            'follower': name,
+            'master_id': order.get('master_id'),
+            'broker_order_id': order.get('broker_order_id'),
+            'symbol': order['symbol'],
+            'side': order['side'],
+            'size': order['size'],
+            'order_type': order['order_type'],
+            'limit_price': order.get('limit_price'),
+            'reduce_only': order.get('reduce_only', False),
+            'stale': order.get('stale', False),
+            'payload': placed.get('payload'),
+            'timestamp': time.time(),
+            'timings': timings
+        }
+        if self.exposure is not None:
+            # Nothing rests on the exchange, so the risk gate sees each would-be order as filled
+            self.exposure.apply_fill(name, order['symbol'], order['size'] if order['side'] == 'buy' else -order['size'],
+                                     order.get('limit_price') or order.get('broker_price'))
+        with self.records_lock:
+            self.records.append(record)
+            if self.record_file is not None:
+                self.record_file.write(json.dumps(record) + '\n')
+        self._bump('successful_copies')
+        self._bump('total_volume', order['size'])
+        self.emit('shadow_order', record)
+        return placed
+
+    def rewind_exposure(self, start_time):
+        """Take followers' exposure back to start_time (microseconds) at maintenance priority; returns the futures
+
+        Call after ``resync_exposure``. Live positions already include what the
+        followers traded since start_time, so a replay from then would count
+        those fills twice; subtracting them sizes the replay against the
+        positions the followers held when the replayed fills happened.
+        """
+        if self.exposure is None:
+            return []
+        followers = self.followers
+        return [
+            self.pool.submit_at(MAINTENANCE, self.lane_key(name, None), self._rewind_follower, name, start_time)
+            for name, follower in followers.items()
+            if follower['client'] is not None
+        ]
+
+    def _rewind_follower(self, name, start_time):
+        client = self.followers[name]['client']
+        rewound = 0
+        for fill in iter_fills(client, start_time=start_time, fields=REWIND_FIELDS):
+            symbol = fill.get('product_symbol') or (fill.get('product') or {}).get('symbol')
+            size = float(fill.get('size') or 0)
+            if not symbol or not size:
+                continue
+            # No price: undoing a fill must not move the entry price or the mark
+            self.exposure.apply_fill(name, symbol, -size if fill.get('side') == 'buy' else size)
+            rewound += 1
+        return rewound
+
+    def stage_summary(self):
+        """{stage: {'count', 'p50', 'p95', 'p99'}} in seconds"""
+        return {
+            stage: {
+                'count': self.stage_latency.count(stage),
+                'p50': self.stage_latency.percentile(stage, 50),
+                'p95': self.stage_latency.percentile(stage, 95),
+                'p99': self.stage_latency.percentile(stage, 99)
+            }
+            for stage in STAGES
+            if self.stage_latency.count(stage)
+        }
+
+    def stop(self):
+        super().stop()
+        if self.record_file is not None:
+            self.record_file.close()
+            self.record_file = None
+
+
+class SentOrderLog:
+    """JSON-lines log of the orders a production engine actually placed"""
+
+    def __init__(self, path):
+        self.file = open(path, 'a')
+        self.lock = threading.Lock()
+
+    def attach(self, engine):
+        engine.on('trade_copied', self.write)
+        return self
+
+    def write(self, event):
+        with self.lock:
+            self.file.write(json.dumps(event, default=str) + '\n')
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def load_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _match_keys(records):
+    """(follower, broker order id), or (follower, symbol, side, n) for closes without one"""
+    keyed = {}
+    occurrences = {}
+    for record in records:
+        if record.get('broker_order_id') is not None:
+            key = (record['follower'], str(record['broker_order_id']), record['symbol'])
+        else:
+            base = (record['follower'], record['symbol'], record['side'])
+            occurrences[base] = occurrences.get(base, 0) + 1
+            key = base + (occurrences[base],)
+        keyed[key] = record
+    return keyed
+
+
+def compare(shadow_records, sent_records, size_tolerance=1e-9):
+    """Match would-be orders with sent ones; returns a report dict"""
+    shadow = _match_keys(shadow_records)
+    sent = _match_keys(sent_records)
+    report = {'matched': 0, 'size_mismatches': [], 'side_mismatches': [],
+              'missing_in_shadow': [], 'extra_in_shadow': []}
+    for key, actual in sent.items():
+        would_be = shadow.get(key)
+        if would_be is None:
+            report['missing_in_shadow'].append(actual)
+            continue
+        if would_be['side'] != actual['side']:
+            report['side_mismatches'].append({'key': list(key), 'shadow': would_be['side'], 'sent': actual['side']})
+        elif abs(float(would_be['size']) - float(actual['size'])) > size_tolerance:
+            report['size_mismatches'].append({'key': list(key), 'shadow': would_be['size'], 'sent': actual['size']})
+        else:
+            report['matched'] += 1
+    report['extra_in_shadow'] = [record for key, record in shadow.items() if key not in sent]
+    report['shadow_orders'] = len(shadow)
+    report['sent_orders'] = len(sent)
+    return report
+
+
+def print_report(report, stages=None):
+    print("\n" + "=" * 60)
+    print("SHADOW VS SENT")
+    print("=" * 60)
+    print(f"Shadow orders: {report['shadow_orders']}, sent orders: {report['sent_orders']}")
+    print(f"✅ Matched: {report['matched']}")
+    for label, field in (('Size mismatches', 'size_mismatches'), ('Side mismatches', 'side_mismatches')):
+        if report[field]:
+            print(f"❌ {label}: {len(report[field])}")
+            for item in report[field][:10]:
+                print(f"   {' '.join(map(str, item['key']))}: shadow {item['shadow']}, sent {item['sent']}")
+    for label, field in (('Sent but not in shadow', 'missing_in_shadow'), ('Shadow only', 'extra_in_shadow')):
+        if report[field]:
+            print(f"⚠️ {label}: {len(report[field])}")
+            for record in report[field][:10]:
+                print(f"   {record['follower']} {record['symbol']} {record['side']} {record['size']} "
+                      f"(broker order {record.get('broker_order_id')})")
+    if stages:
+        print("\n📈 Stage latency (ms):")
+        for stage, summary in stages.items():
+            print(f"   {stage:<11} n={summary['count']:<6} p50 {summary['p50'] * 1000:.3f}  "
+                  f"p95 {summary['p95'] * 1000:.3f}  p99 {summary['p99'] * 1000:.3f}")
+
+
+def fills_to_trades(fills, master_id=None):
+    """Collapse /v2/fills entries into one engine trade per broker order, in fill order"""
+    trades = {}
+    for fill in fills:
+        order_id = fill.get('order_id')
+        size = float(fill.get('size') or 0)
+        price = float(fill.get('price') or 0)
+        trade = trades.get(order_id)
+        if trade is None:
+            trades[order_id] = {
+                'order_id': order_id,
+                'master_id': master_id,
+                'symbol': fill.get('product_symbol') or (fill.get('product') or {}).get('symbol'),
+                'side': fill.get('side'),
+                'size': size,
+                'average_fill_price': price,
+                'created_at': fill.get('created_at')
+            }
+            continue
+        total = trade['size'] + size
+        if total:
+            trade['average_fill_price'] = (trade['average_fill_price'] * trade['size'] + price * size) / total
+        trade['size'] = total
+    return list(trades.values())
@@ -0,0 +1,154 @@
+"""Warm-restart snapshots of copy-engine state.
+
+A restarted engine otherwise starts with empty broker positions and an empty
+dedup window, so it misreads the next position update and can copy a fill it
+already copied before the restart. ``EngineSnapshotter`` writes
+``engine.export_state()`` every ``interval`` seconds, and once more on stop.
+``restore`` loads the file at startup and then checks the positions with one
+REST read per master.
+
+The file is a fixed header followed by zlib-compressed ``marshal`` data. It is
+written atomically (temp file, fsync, rename), like the product index. Loading
+refuses a file whose magic, version, Python version or CRC does not match, and
+the engine then cold-starts. Follower configs are not stored because they
+carry API secrets; they are reloaded from the database as usual. With a
+``FollowerSync``, its watermark is stored too, so it resumes incremental
+polling instead of starting with a full load.
+
+Work that was still queued is only resubmitted when asked, and only with a
+staleness budget on the engine, so a fill from before a long outage is not
+copied late. Orders a lane had already taken off its queue are not in the
+snapshot; the position reconcile is what catches those.
+"""
+
+import marshal
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+MAGIC = b'CESN'
+VERSION = 1
+# magic, version, python major, python minor, payload length, crc32, created at
+HEADER = struct.Struct('<4sHBBIId')
+DEFAULT_SNAPSHOT_PATH = 'engine-snapshot.bin'
+
+
+def write_snapshot(path, state):
+    """Write state atomically; returns the file size in bytes"""
+    payload = zlib.compress(marshal.dumps(state), 1)
+    header = HEADER.pack(MAGIC, VERSION, sys.version_info[0], sys.version_info[1],
+                         len(payload), zlib.crc32(payload), time.time())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(header) + len(payload)
+
+
+def read_snapshot(path):
+    """Returns (state, created_at); raises ValueError for a file that cannot be trusted"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is truncated")
+    magic, version, major, minor, length, crc, created_at = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} engine snapshot")
+    if (major, minor) != sys.version_info[:2]:
+        raise ValueError(f"{path} was written by Python {major}.{minor}")
+    payload = data[HEADER.size:]
+    if len(payload) != length or zlib.crc32(payload) != crc:
+        raise ValueError(f"{path} failed its checksum")
+    return marshal.loads(zlib.decompress(payload)), created_at
+
+
+def restore(engine, path=DEFAULT_SNAPSHOT_PATH, reconcile=True, resubmit=False, sync=None):
+    """Warm-start engine from path; returns a report, or None for a cold start
+
+    Call after followers are loaded, so queued work can find its follower.
+    """
+    started = time.perf_counter()
+    try:
+        state, created_at = read_snapshot(path)
+    except FileNotFoundError:
+        return None
+    except (ValueError, EOFError, TypeError, zlib.error) as e:
+        print(f"⚠️ Ignoring engine snapshot: {str(e)}")
+        return None
+    futures = engine.restore_state(state, resubmit=resubmit)
+    if sync is not None and state.get('follower_sync'):
+        sync.restore_state(state['follower_sync'], [follower['config'] for follower in engine.followers.values()])
+    report = {
+        'age': time.time() - created_at,
+        'load_ms': (time.perf_counter() - started) * 1000,
+        'processed_orders': len(engine.processed_orders),
+        'resubmitted': len(futures),
+        'corrections': []
+    }
+    if reconcile:
+        report['corrections'] = engine.reconcile_positions()
+        for master_id, symbol, tracked, live in report['corrections']:
+            print(f"🔄 Position for {engine.masters.get(master_id, master_id)} {symbol}: "
+                  f"snapshot {tracked}, exchange {live}")
+    return report
+
+
+class EngineSnapshotter:
+    def __init__(self, engine, path=DEFAULT_SNAPSHOT_PATH, interval=5.0, sync=None):
+        self.engine = engine
+        self.sync = sync  # optional FollowerSync whose watermark is stored alongside
+        self.path = path
+        self.interval = interval
+        self.stats = {'snapshots': 0, 'failures': 0, 'last_bytes': 0, 'last_ms': 0.0, 'last_at': None}
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def save(self):
+        started = time.perf_counter()
+        try:
+            state = self.engine.export_state()
+            if self.sync is not None:
+                state['follower_sync'] = self.sync.export_state()
+            size = write_snapshot(self.path, state)
+        except Exception as e:
+            with self.lock:
+                self.stats['failures'] += 1
+            print(f"⚠️ Engine snapshot failed: {str(e)}")
+            return False
+        with self.lock:
+            self.stats['snapshots'] += 1
+            self.stats['last_bytes'] = size
+            self.stats['last_ms'] = (time.perf_counter() - started) * 1000
+            self.stats['last_at'] = time.time()
+        return True
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='snapshot', daemon=True)
+        self._thread.start()
+
+    def stop(self, save=True):
+        """Stop the thread; with save, write a final snapshot (stop the engine first)"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if save:
+            self.save()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
@@ -0,0 +1,142 @@
+"""Age budget for broker signals.
+
+After a reconnect the feed can replay a backlog of fills that are seconds or
+minutes old; copying those as market orders trades at prices the broker never
+got. Each broker event carries ``received_at`` (when we saw it) and, when the
+exchange supplied one, ``exchange_ts``. ``StalenessBudget.check`` runs right
+before an order is sent - after any queueing - and applies ``action`` to
+orders older than ``max_age`` seconds:
+
+* ``drop``  - do not send the order
+* ``limit`` - send it as a limit order at the broker's fill price, widened by
+  ``limit_slippage_bps``, so it only fills near the price being copied
+* ``flag``  - send it unchanged but mark it stale
+
+Reduce-only orders are never dropped or converted - a close that is skipped
+or rests unfilled leaves the follower exposed - so they are only flagged. Age is measured from the
+exchange timestamp when there is one (that is what the price refers to),
+otherwise from arrival.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime
+
+ACTIONS = ('drop', 'limit', 'flag')
+
+
+def parse_timestamp(value):
+    """Seconds since epoch from Delta's microsecond ints or ISO-8601 strings; None if unparseable"""
+    if value is None or value == '':
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except (AttributeError, ValueError):
+            return None
+    if value > 1e17:  # nanoseconds
+        return value / 1e9
+    if value > 1e14:  # microseconds
+        return value / 1e6
+    if value > 1e11:  # milliseconds
+        return value / 1e3
+    return value
+
+
+def event_timestamp(trade_data):
+    """Exchange time of a broker fill, from whichever field the source provides"""
+    for field in ('exchange_ts', 'timestamp', 'created_at'):
+        ts = parse_timestamp(trade_data.get(field))
+        if ts is not None:
+            return ts
+    return None
+
+
+class StalenessBudget:
+    def __init__(self, max_age=2.0, action='drop', limit_slippage_bps=10, products=None):
+        if action not in ACTIONS:
+            raise ValueError(f"action must be one of {ACTIONS}, got {action!r}")
+        self.max_age = max_age
+        self.action = action
+        self.limit_slippage_bps = limit_slippage_bps
+        self.products = products  # optional ProductIndex for tick rounding
+        self.lock = threading.Lock()
+        self.stats = {'checked': 0, 'stale': 0, 'dropped': 0, 'converted': 0, 'flagged': 0, 'max_age_seen': 0.0}
+
+    def age(self, order, now=None):
+        """Seconds since the exchange (or, failing that, we) saw the signal"""
+        origin = order.get('exchange_ts') or order.get('received_at')
+        if origin is None:
+            return 0.0
+        # Clock skew can put the exchange a little ahead of us
+        return max(0.0, (now or time.time()) - origin)
+
+    def _bump(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def expired(self, event, now=None):
+        """True when an event is already too old to be worth queueing under 'drop'"""
+        if self.action != 'drop' or self.max_age is None or event.get('reduce_only'):
+            return False
+        if self.age(event, now) <= self.max_age:
+            return False
+        self._bump('stale')
+        self._bump('dropped')
+        return True
+
+    def check(self, order, now=None):
+        """Return the order to send (possibly converted), or None to drop it"""
+        age = self.age(order, now)
+        order['signal_age'] = age
+        with self.lock:
+            self.stats['checked'] += 1
+            self.stats['max_age_seen'] = max(self.stats['max_age_seen'], age)
+        if self.max_age is None or age <= self.max_age:
+            return order
+
+        self._bump('stale')
+        if self.action == 'flag' or order.get('reduce_only'):
+            self._bump('flagged')
+            return dict(order, stale=True)
+
+        if self.action == 'limit' and order.get('order_type') == 'market_order':
+            limit_price = self.limit_price(order)
+            if limit_price is not None:
+                self._bump('converted')
+                return dict(order, stale=True, order_type='limit_order', limit_price=limit_price)
+        elif self.action == 'limit':
+            # Already a limit order; its price is still the one being copied
+            self._bump('flagged')
+            return dict(order, stale=True)
+
+        # drop, or a market order with no price to convert at
+        self._bump('dropped')
+        return None
+
+    def limit_price(self, order):
+        price = order.get('broker_price')
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return None
+        if not price > 0:
+            return None
+
+        slippage = self.limit_slippage_bps / 10000
+        price = price * (1 + slippage) if order['side'] == 'buy' else price * (1 - slippage)
+        symbol = order.get('symbol')
+        if self.products is not None and symbol in self.products:
+            tick = self.products.get_tick_size(symbol)
+            if tick and not math.isnan(tick):
+                # Round towards the broker price so the tolerance is never exceeded
+                ticks = math.floor(price / tick) if order['side'] == 'buy' else math.ceil(price / tick)
+                price = round(ticks * tick, 12)
+        return price
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, max_age=self.max_age, action=self.action)
@@ -0,0 +1,254 @@
+"""Local stand-in for the Delta Exchange REST API, used by benchmarks.
+
+Serves canned responses for the endpoints the tester and engine call, over
+HTTP/1.1 keep-alive and cleartext HTTP/2 (h2c, prior knowledge) on the same
+port. Each response is delayed by ``latency`` seconds to stand in for exchange
+processing time, and the server counts connections and requests so transports
+can be compared by sockets opened as well as latency.
+
+HTTP/2 support needs the ``h2`` package (installed with ``httpx[http2]``).
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+H2_PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+
+PRIVATE_PREFIXES = ('/v2/wallet', '/v2/positions', '/v2/orders', '/v2/profile', '/v2/fills')
+
+
+class StandInExchange:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, products=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.products = products or [
+            {'id': 27, 'symbol': 'BTCUSD', 'contract_type': 'perpetual_futures',
+             'contract_value': '0.001', 'tick_size': '0.5', 'position_size_limit': 100000},
+            {'id': 3136, 'symbol': 'ETHUSD', 'contract_type': 'perpetual_futures',
+             'contract_value': '0.01', 'tick_size': '0.05', 'position_size_limit': 100000}
+        ]
+        self.stats = {'connections': 0, 'requests': 0, 'http1_requests': 0, 'http2_requests': 0}
+        self.orders = []
+        self._order_ids = itertools.count(1)
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    # Routing
+
+    def handle(self, method, target, headers, body):
+        """Return (status, payload) for one request"""
+        parts = urlsplit(target)
+        path = parts.path
+        query = parse_qs(parts.query)
+        self.stats['requests'] += 1
+
+        if path.startswith(PRIVATE_PREFIXES) and not headers.get('api-key'):
+            return 401, {'success': False, 'error': {'code': 'InvalidApiKey'}}
+
+        if path == '/v2/products':
+            return 200, {'success': True, 'result': self.products}
+        if path == '/v2/wallet/balances':
+            return 200, {'success': True, 'result': [
+                {'asset_symbol': 'USD', 'balance': '1000.0', 'available_balance': '900.0'}
+            ]}
+        if path.startswith('/v2/positions'):
+            return 200, {'success': True, 'result': []}
+        if path == '/v2/profile':
+            return 200, {'success': True, 'result': {'id': 1}}
+        if path == '/v2/fills':
+            return 200, {'success': True, 'result': [], 'meta': {'after': None}}
+        if path == '/v2/orders' and method == 'GET':
+            state = query.get('state', ['open'])[0]
+            return 200, {'success': True, 'result': [o for o in self.orders if o['state'] == state]}
+        if path == '/v2/orders' and method == 'POST':
+            return 200, {'success': True, 'result': self._accept_order(json.loads(body or b'{}'))}
+        if path == '/v2/orders/batch' and method == 'POST':
+            batch = json.loads(body or b'{}')
+            orders = [self._accept_order(dict(order, product_id=batch.get('product_id')))
+                      for order in batch.get('orders', [])]
+            return 200, {'success': True, 'result': orders}
+        return 404, {'success': False, 'error': {'code': 'not_found'}}
+
+    def _accept_order(self, order):
+        order = dict(order, id=next(self._order_ids), state='closed')
+        self.orders.append(order)
+        return order
+
+    async def _respond(self, method, target, headers, body):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        status, payload = self.handle(method, target, headers, body)
+        return status, json.dumps(payload).encode()
+
+    # HTTP/1.1
+
+    async def _serve_http1(self, reader, writer, buffered):
+        while True:
+            while b'\r\n\r\n' not in buffered:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                buffered += chunk
+            head, _, buffered = buffered.partition(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            method, target, _ = lines[0].split(' ', 2)
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get('content-length', 0))
+            while len(buffered) < length:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                buffered += chunk
+            body, buffered = buffered[:length], buffered[length:]
+
+            self.stats['http1_requests'] += 1
+            status, payload = await self._respond(method, target, headers, body)
+            writer.write(
+                f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: keep-alive\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+            if headers.get('connection', '').lower() == 'close':
+                return
+
+    # HTTP/2 (h2c prior knowledge)
+
+    async def _serve_http2(self, reader, writer, buffered):
+        import h2.config
+        import h2.connection
+        import h2.events
+
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding='utf-8'))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+
+        streams = {}
+        window_open = asyncio.Event()
+        window_open.set()
+        tasks = set()
+
+        async def send_response(stream_id, request):
+            status, payload = await self._respond(request['method'], request['path'], request['headers'], bytes(request['body']))
+            conn.send_headers(stream_id, [
+                (':status', str(status)),
+                ('content-type', 'application/json'),
+                ('content-length', str(len(payload)))
+            ])
+            view = memoryview(payload)
+            while view:
+                size = min(conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size, len(view))
+                if size <= 0:
+                    window_open.clear()
+                    await window_open.wait()
+                    continue
+                conn.send_data(stream_id, view[:size].tobytes())
+                view = view[size:]
+                writer.write(conn.data_to_send())
+            conn.end_stream(stream_id)
+            writer.write(conn.data_to_send())
+
+        data = buffered
+        try:
+            while True:
+                if data:
+                    for event in conn.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            headers = dict(event.headers)
+                            streams[event.stream_id] = {
+                                'method': headers[':method'],
+                                'path': headers[':path'],
+                                'headers': headers,
+                                'body': bytearray()
+                            }
+                        elif isinstance(event, h2.events.DataReceived):
+                            streams[event.stream_id]['body'] += event.data
+                            conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                        elif isinstance(event, h2.events.StreamEnded):
+                            self.stats['http2_requests'] += 1
+                            task = asyncio.ensure_future(send_response(event.stream_id, streams.pop(event.stream_id)))
+                            tasks.add(task)
+                            task.add_done_callback(tasks.discard)
+                        elif isinstance(event, h2.events.WindowUpdated):
+                            window_open.set()
+                        elif isinstance(event, h2.events.ConnectionTerminated):
+                            return
+                    writer.write(conn.data_to_send())
+                data = await reader.read(65536)
+                if not data:
+                    return
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _serve(self, reader, writer):
+        self.stats['connections'] += 1
+        try:
+            buffered = b''
+            while len(buffered) < len(H2_PREFACE) and b'\r\n\r\n' not in buffered:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                buffered += chunk
+            if buffered.startswith(H2_PREFACE):
+                await self._serve_http2(reader, writer, buffered)
+            else:
+                await self._serve_http1(reader, writer, buffered)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    # Lifecycle
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._serve, self.host, self.port, backlog=1024)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._server.close()
+        pending = asyncio.all_tasks(self._loop)
+        for task in pending:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self._loop.run_until_complete(self._server.wait_closed())
+        self._loop.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='standin-exchange', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def reset_stats(self):
+        for key in self.stats:
+            self.stats[key] = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
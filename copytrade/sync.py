@@ -0,0 +1,157 @@
+"""Incremental follower-config sync.
+
+``FollowerSync`` loads the active followers once, then polls only the rows
+whose ``updated_at`` is at or past the last watermark. Each poll builds a new
+follower dict and swaps it in as one assignment, so readers see either the old
+set or the new one, never a half-applied diff. Changes are passed to
+``on_change(added, updated, removed)`` so an engine can apply them in place.
+
+Hard deletes leave no ``updated_at`` behind, so every ``reconcile_every`` polls
+the full active set is reread and diffed as well. ``followers.updated_at``
+needs its trigger (scripts/add-followers-updated-at.sql).
+"""
+
+import threading
+
+from .profiling import phase
+
+
+def row_key(row):
+    return row.get('id') or row.get('follower_name')
+
+
+class FollowerSync:
+    def __init__(self, client, on_change=None, interval=5.0, reconcile_every=60, table='followers'):
+        self.client = client  # supabase client
+        self.on_change = on_change
+        self.interval = interval
+        self.reconcile_every = reconcile_every
+        self.table = table
+        self.followers = {}  # row key -> active follower row
+        self.versions = {}  # row key -> updated_at last applied
+        self.watermark = None
+        self.polls = 0
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _select_active(self):
+        with phase('db_io', self.table):
+            response = self.client.table(self.table).select('*').eq('account_status', 'active').execute()
+        return response.data or []
+
+    def _select_changed(self):
+        query = self.client.table(self.table).select('*')
+        if self.watermark is not None:
+            # gte, not gt: rows sharing the watermark timestamp may not have been seen yet
+            query = query.gte('updated_at', self.watermark)
+        with phase('db_io', self.table):
+            response = query.order('updated_at').execute()
+        return response.data or []
+
+    def full_load(self):
+        """Replace the follower set with every active row; returns the diff"""
+        rows = self._select_active()
+        with self.lock:
+            current = {row_key(row): row for row in rows}
+            added = [row for key, row in current.items() if key not in self.followers]
+            updated = [row for key, row in current.items()
+                       if key in self.followers and row != self.followers[key]]
+            removed = [row for key, row in self.followers.items() if key not in current]
+            self.followers = current
+            self.versions = {key: row.get('updated_at') for key, row in current.items()}
+            stamps = [row['updated_at'] for row in rows if row.get('updated_at')]
+            if self.watermark:
+                stamps.append(self.watermark)
+            if stamps:
+                self.watermark = max(stamps)
+        self._notify(added, updated, removed)
+        return added, updated, removed
+
+    def poll(self):
+        """Apply rows changed since the watermark; returns the diff"""
+        self.polls += 1
+        if self.watermark is None or (self.reconcile_every and self.polls % self.reconcile_every == 0):
+            return self.full_load()
+
+        rows = self._select_changed()
+        with self.lock:
+            current = dict(self.followers)
+            versions = dict(self.versions)
+            added, updated, removed = [], [], []
+            for row in rows:
+                key = row_key(row)
+                stamp = row.get('updated_at')
+                if versions.get(key) == stamp:
+                    continue
+                versions[key] = stamp
+                if stamp and stamp > self.watermark:
+                    self.watermark = stamp
+
+                if row.get('account_status') == 'active':
+                    if key in current:
+                        updated.append(row)
+                    else:
+                        added.append(row)
+                    current[key] = row
+                elif key in current:
+                    removed.append(current.pop(key))
+            self.followers = current
+            self.versions = versions
+        self._notify(added, updated, removed)
+        return added, updated, removed
+
+    def _notify(self, added, updated, removed):
+        if self.on_change and (added or updated or removed):
+            try:
+                self.on_change(added, updated, removed)
+            except Exception as e:
+                print(f"⚠️ Follower change handler failed: {str(e)}")
+
+    def get_followers(self):
+        return list(self.followers.values())
+
+    def export_state(self):
+        """Watermark and row versions, for an engine snapshot"""
+        with self.lock:
+            return {'watermark': self.watermark, 'versions': dict(self.versions)}
+
+    def restore_state(self, state, rows=()):
+        """Resume polling from a snapshot instead of a full load
+
+        rows are the follower rows the engine was started with; rows changed
+        while the engine was down come back from the first poll as updates.
+        """
+        with self.lock:
+            self.followers = {row_key(row): row for row in rows}
+            self.versions = dict(state.get('versions') or {})
+            self.watermark = state.get('watermark')
+
+    def get_status(self):
+        return {
+            'followers': len(self.followers),
+            'watermark': self.watermark,
+            'polls': self.polls
+        }
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='follower-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️ Follower sync failed: {str(e)}")
+            if self._stop.wait(self.interval):
+                return
@@ -0,0 +1,80 @@
+"""Adaptive per-endpoint request deadlines.
+
+A fixed ``timeout=10`` holds a worker for ten seconds on a dead endpoint and
+is still too short now and then for a slow, heavy one. ``AdaptiveTimeouts``
+keeps a rolling latency window per host and endpoint (a ``LatencyTracker``)
+and sets each deadline to ``multiplier`` x its ``percentile`` latency, clamped
+to ``[floor, ceiling]``. Until an endpoint has ``min_samples`` samples, the
+old fixed default applies; callers with a tighter fixed default of their own
+(the validator's 5 s probes) pass it instead. ``seed`` loads recent samples
+from a ``HistoryStore``, so one-shot CLI runs start from what earlier runs
+learned rather than from the defaults.
+
+A request that fails after using up its deadline is recorded at the deadline,
+so a run of timeouts pushes the deadline up instead of being invisible to it.
+Writes get a higher floor than reads: a timed-out order is ambiguous, since it
+may still have been placed.
+"""
+
+from urllib.parse import urlsplit
+
+from .hedging import LatencyTracker
+
+
+def timeout_key(method, url):
+    """Host, method and path; queries are left out so they share a window"""
+    parts = urlsplit(url)
+    return f"{parts.netloc} {method} {parts.path}"
+
+
+class AdaptiveTimeouts:
+    def __init__(self, tracker=None, percentile=99, multiplier=3.0, floor=1.0, ceiling=10.0,
+                 write_floor=5.0, min_samples=20, default=10.0):
+        self.tracker = tracker or LatencyTracker()
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = ceiling
+        self.write_floor = write_floor
+        self.min_samples = min_samples
+        self.default = default
+
+    def timeout_for(self, key, method='GET', default=None):
+        if self.tracker.count(key) < self.min_samples:
+            return self.default if default is None else default
+        floor = self.floor if method == 'GET' else max(self.floor, self.write_floor)
+        return max(floor, min(self.ceiling, self.tracker.percentile(key, self.percentile) * self.multiplier))
+
+    def record(self, key, seconds):
+        self.tracker.record(key, seconds)
+
+    def seed(self, history, max_age=7 * 86400):
+        """Load each endpoint's recent latency from a HistoryStore; returns the number of samples"""
+        loaded = 0
+        for key, samples in history.recent_latency(self.tracker.window, max_age).items():
+            for seconds in samples:
+                self.tracker.record(key, seconds)
+            loaded += len(samples)
+        return loaded
+
+    def record_failure(self, key, seconds, timeout):
+        """Record a failed request; only ones that used up the deadline say anything about latency"""
+        if timeout and seconds >= 0.9 * timeout:
+            self.tracker.record(key, timeout)
+
+    def get_status(self):
+        with self.tracker.lock:
+            keys = list(self.tracker.samples)
+        return {
+            key: {
+                'samples': self.tracker.count(key),
+                'p50': self.tracker.percentile(key, 50),
+                'p99': self.tracker.percentile(key, 99),
+                'timeout': self.timeout_for(key, key.split(' ')[1])
+            }
+            for key in keys
+        }
+
+
+# Process-wide instance, so validators and engines learn from each other's traffic
+SHARED = AdaptiveTimeouts()
@@ -0,0 +1,130 @@
+"""HTTP transports for DeltaExchangeAPITester.
+
+``http1`` (the default) gives every tester its own ``requests`` session, so N
+accounts validated or traded in parallel open N connections to the same host.
+``http2`` routes all testers through one shared ``httpx`` client per host;
+requests for different API keys become streams multiplexed over a handful of
+HTTP/2 connections instead of separate sockets and TLS handshakes.
+
+The HTTP/2 transport needs ``httpx[http2]``, which is imported on first use.
+``stream=True`` is honoured on both: HTTP/2 responses are then read chunk by
+chunk through ``iter_content`` like a streamed ``requests`` response, so the
+streaming JSON decoder never holds the whole body.
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+from .profiling import is_active, phase
+
+TRANSPORTS = ('http1', 'http2')
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_shared_client(base_url, max_connections=4, prior_knowledge=None):
+    """Return the process-wide HTTP/2 client for a host, creating it once
+
+    ``prior_knowledge`` (h2c without upgrade) defaults to True for http://
+    URLs such as a local stand-in server; https uses ALPN negotiation.
+    """
+    try:
+        import httpx
+    except ImportError:
+        raise RuntimeError("HTTP/2 transport requires httpx: pip install 'httpx[http2]'")
+
+    parts = urlsplit(base_url)
+    key = (parts.scheme, parts.netloc)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    if prior_knowledge is None:
+        prior_knowledge = parts.scheme == 'http'
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = httpx.Client(
+                http2=True,
+                http1=not prior_knowledge,
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            )
+            _clients[key] = client
+    return client
+
+
+def close_shared_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+class StreamedResponse:
+    """requests-style view of a streamed httpx response; .text, .content and .json() read the rest first"""
+
+    def __init__(self, response):
+        self._response = response
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def iter_content(self, chunk_size=None, decode_unicode=False):
+        return self._response.iter_bytes(chunk_size)
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    @property
+    def text(self):
+        self._response.read()
+        return self._response.text
+
+    def json(self, **kwargs):
+        self._response.read()
+        return self._response.json(**kwargs)
+
+    def close(self):
+        self._response.close()
+
+
+class Http2Session:
+    """The subset of requests.Session the tester uses, backed by a shared httpx client"""
+
+    def __init__(self, base_url, max_connections=4):
+        self.client = get_shared_client(base_url, max_connections)
+
+    def request(self, method, url, headers=None, data=None, params=None, timeout=None, stream=False, **kwargs):
+        if not is_active():
+            return self._send(method, url, headers, data, params, timeout, stream)
+
+        endpoint = f"{method} {urlsplit(url).path}"
+        with phase('network', endpoint):
+            response = self._send(method, url, headers, data, params, timeout, stream)
+        decode = response.json
+
+        def timed_json(**json_kwargs):
+            with phase('json_decode', endpoint):
+                return decode(**json_kwargs)
+        response.json = timed_json
+        return response
+
+    def _send(self, method, url, headers, data, params, timeout, stream):
+        if not stream:
+            return self.client.request(method, url, headers=headers, content=data, params=params, timeout=timeout)
+        request = self.client.build_request(method, url, headers=headers, content=data, params=params,
+                                            timeout=timeout)
+        return StreamedResponse(self.client.send(request, stream=True))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        # The client is shared; close_shared_clients() tears it down
+        pass
@@ -0,0 +1,148 @@
+"""Connection pre-warming and keep-alive pings for follower sessions.
+
+Every tester starts with a cold session, so the first order after startup -
+or after a quiet spell long enough for the exchange to drop idle sockets -
+pays DNS, TCP and TLS setup on the critical path. ``warm_clients`` sends one
+cheap signed GET per session at startup, which opens the connection and
+checks the key at the same time. ``KeepAlivePinger`` then re-pings any session
+that has been idle for ``interval`` seconds, on a jittered schedule so a large
+fleet does not ping in lockstep.
+
+Testers that share a session (HTTP/2, or a pooled HTTP/1.1 session) are pinged
+once per session, not once per account.
+"""
+
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PING_PATH = '/v2/profile'
+
+
+def session_key(session):
+    """What actually holds the connections: an Http2Session wraps the shared httpx client"""
+    return id(getattr(session, 'client', None) or session)
+
+
+def unique_sessions(clients):
+    """One client per distinct session, keyed by client name"""
+    seen = set()
+    unique = {}
+    for name, client in clients.items():
+        if client is None or session_key(client.session) in seen:
+            continue
+        seen.add(session_key(client.session))
+        unique[name] = client
+    return unique
+
+
+def ping(client, path=PING_PATH, timeout=None):
+    """One signed GET; returns (response or None on a network error, seconds)"""
+    started = time.perf_counter()
+    try:
+        response = client.request('GET', path, timeout=timeout)
+    except Exception:
+        response = None
+    return response, time.perf_counter() - started
+
+
+def warm_clients(clients, path=PING_PATH, max_workers=16, on_response=None):
+    """Open and authenticate every session concurrently; returns {name: (response, seconds)}"""
+    targets = unique_sessions(clients)
+    if not targets:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets)), thread_name_prefix='warmup') as pool:
+        futures = {name: pool.submit(ping, client, path) for name, client in targets.items()}
+    results = {name: future.result() for name, future in futures.items()}
+    if on_response is not None:
+        for name, (response, _) in results.items():
+            if response is not None:
+                on_response(name, response)
+    return results
+
+
+class KeepAlivePinger:
+    def __init__(self, get_clients, interval=30.0, jitter=0.2, path=PING_PATH, max_workers=8,
+                 on_response=None):
+        self.get_clients = get_clients  # callable returning {name: client}; re-read every round
+        self.interval = interval
+        self.jitter = jitter
+        self.path = path
+        self.on_response = on_response
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='keepalive')
+        self.stats = {'pings': 0, 'failures': 0, 'skipped_busy': 0}
+        self.lock = threading.Lock()
+        self._schedule = []  # heap of (due, name)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _next_due(self, now):
+        return now + self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _ping(self, name, client):
+        response, _ = ping(client, self.path)
+        with self.lock:
+            self.stats['pings'] += 1
+            if response is None or response.status_code >= 500:
+                self.stats['failures'] += 1
+        if response is not None and self.on_response is not None:
+            self.on_response(name, response)
+
+    def tick(self, now=None):
+        """Ping every session that is due and idle; returns the number pinged"""
+        now = now or time.monotonic()
+        clients = unique_sessions(self.get_clients())
+        scheduled = {name for _, name in self._schedule}
+        for name in clients.keys() - scheduled:
+            # Spread first pings over a whole interval instead of bunching them at startup
+            heapq.heappush(self._schedule, (now + random.uniform(0, self.interval), name))
+
+        pinged = 0
+        while self._schedule and self._schedule[0][0] <= now:
+            _, name = heapq.heappop(self._schedule)
+            client = clients.get(name)
+            if client is None:
+                continue  # follower removed; drop it from the schedule
+            idle = now - client.last_request_at
+            if idle < self.interval / 2:
+                # Real traffic is keeping this connection warm (our own pings are older than this)
+                with self.lock:
+                    self.stats['skipped_busy'] += 1
+                heapq.heappush(self._schedule, (client.last_request_at + self.interval, name))
+                continue
+            self.pool.submit(self._ping, name, client)
+            heapq.heappush(self._schedule, (self._next_due(now), name))
+            pinged += 1
+        return pinged
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, sessions=len(self._schedule))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='keepalive', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.pool.shutdown(wait=False)
+
+    def _run(self):
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"⚠️ Keep-alive round failed: {str(e)}")
+            wait = min(1.0, self.interval / 4)
+            if self._schedule:
+                wait = min(wait, max(0.05, self._schedule[0][0] - time.monotonic()))
+            if self._stop.wait(wait):
+                return
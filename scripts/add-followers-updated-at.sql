@@ -0,0 +1,33 @@
+-- Add updated_at to followers so config changes can be synced incrementally
+ALTER TABLE followers ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+-- Backfill rows created before the column existed
+UPDATE followers
+SET updated_at = COALESCE(created_at, NOW())
+WHERE updated_at IS NULL;
+
+-- Function to update updated_at timestamp
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = NOW();
+  RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Bump updated_at on every change, including status changes that deactivate a follower
+DROP TRIGGER IF EXISTS update_followers_updated_at ON followers;
+CREATE TRIGGER update_followers_updated_at BEFORE UPDATE ON followers
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- The sync loop filters and orders by updated_at
+CREATE INDEX IF NOT EXISTS idx_followers_updated_at ON followers(updated_at);
+
+-- Show the result
+SELECT
+  follower_name,
+  copy_mode,
+  account_status,
+  updated_at
+FROM followers
+ORDER BY updated_at DESC;
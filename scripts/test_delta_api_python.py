@@ -5,7 +5,6 @@ import time
 import json
 import os
 from datetime import datetime
-from supabase import create_client, Client
 
 class DeltaExchangeAPITester:
     def __init__(self, api_key, api_secret, follower_name, environment='production'):
@@ -290,6 +289,8 @@ def test_all_followers():
         print("Please set NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY")
         return
     
+    # Imported here so the tester class can be used without supabase installed
+    from supabase import create_client, Client
     supabase: Client = create_client(supabase_url, supabase_key)
     
     try:
@@ -0,0 +1,113 @@
+import threading
+
+from copytrade.breaker import CLOSED, OPEN, BreakerRegistry, classify_failure
+
+
+def test_classify_failure():
+    assert classify_failure(401) == 'auth'
+    assert classify_failure(400, '{"error": {"code": "InvalidApiKey"}}') == 'auth'
+    assert classify_failure(403, '{"error": {"code": "ip_not_whitelisted"}}') == 'ip_whitelist'
+    assert classify_failure(500, 'internal error') is None
+    assert classify_failure(400, '{"error": {"code": "insufficient_margin"}}') is None
+
+
+def test_trips_after_threshold_consecutive_credential_failures():
+    registry = BreakerRegistry(threshold=3)
+    registry.record_response('a', 401)
+    registry.record_response('a', 401)
+    assert registry.allow('a')
+    registry.record_response('a', 401)
+    assert not registry.allow('a')
+    assert registry.get_status()['a']['state'] == OPEN
+    assert registry.open_keys() == ['a']
+
+
+def test_transient_errors_neither_trip_nor_reset_and_success_resets():
+    registry = BreakerRegistry(threshold=2)
+    registry.record_response('a', 401)
+    for _ in range(5):
+        registry.record_response('a', 503, 'unavailable')
+    assert registry.get_status()['a']['failures'] == 1
+    registry.record_response('a', 200)
+    registry.record_response('a', 401)
+    assert registry.allow('a')
+    assert registry.get_status()['a'] == {'state': CLOSED, 'reason': None, 'failures': 1, 'opened_at': None}
+
+
+def test_concurrent_failures_are_all_counted_and_trip_once(capsys):
+    registry = BreakerRegistry(threshold=400)
+    start = threading.Barrier(8)
+
+    def worker():
+        start.wait()
+        for _ in range(50):
+            registry.record_response('a', 401)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.get_status()['a']['failures'] == 400
+    assert not registry.allow('a')
+    assert capsys.readouterr().out.count('Quarantined a') == 1
+
+
+def test_seed_from_validation_and_probe_releases_recovered_keys():
+    healthy = {'b'}
+    registry = BreakerRegistry(probe=lambda key: key in healthy)
+    registry.seed_from_validation({
+        'a': {'status': 'NO_CREDENTIALS', 'working': False},
+        'b': {'status': 'FAILED', 'working': False},
+        'c': {'status': 'FAILED', 'working': False},
+        'd': {'status': 'OK', 'working': True}
+    })
+    assert sorted(registry.open_keys()) == ['a', 'b', 'c']
+    assert registry.probe_open() == ['b']
+    # Missing credentials are never probed; 'c' still fails
+    assert sorted(registry.open_keys()) == ['a', 'c']
+    assert registry.breakers['a'].last_probe is None
+
+
+def test_engine_skips_quarantined_follower_until_probe_passes():
+    from copytrade.engine import CopyEngine
+    from copytrade.standin import StandInExchange
+
+    class RevokingExchange(StandInExchange):
+        revoked = {'revoked'}
+
+        def handle(self, method, target, headers, body):
+            if headers.get('api-key') in self.revoked:
+                return 401, {'success': False, 'error': {'code': 'InvalidApiKey'}}
+            return super().handle(method, target, headers, body)
+
+    with RevokingExchange() as exchange:
+        class Engine(CopyEngine):
+            def make_client(self, config):
+                client = super().make_client(config)
+                client.base_url = exchange.url
+                return client
+
+        followers = [
+            {'follower_name': name, 'api_key': key, 'api_secret': 's', 'copy_mode': 'multiplier', 'multiplier': 1,
+             'max_lot_size': 10}
+            for name, key in (('good', 'ok'), ('bad', 'revoked'))
+        ]
+        registry = BreakerRegistry(threshold=2)
+        engine = Engine({'id': 'm', 'name': 'broker'}, followers, breakers=registry)
+        registry.probe = engine.probe_follower
+        try:
+            for order_id in range(1, 5):
+                trade = {'order_id': order_id, 'symbol': 'BTCUSD', 'side': 'buy', 'size': 1,
+                         'order_type': 'market_order'}
+                for future in engine.process_broker_trades([trade]):
+                    future.result()
+            assert len(exchange.orders) == 4  # every order from 'good'; 'bad' was rejected each time
+            assert registry.open_keys() == ['bad']
+            assert engine.get_stats()['skipped_quarantined'] == 2
+            assert registry.probe_open() == []
+            exchange.revoked.clear()
+            assert registry.probe_open() == ['bad']
+            assert registry.allow('bad')
+        finally:
+            engine.stop()
@@ -0,0 +1,183 @@
+import threading
+import time
+
+from copytrade.coalesce import FillCoalescer
+from copytrade.engine import CopyEngine
+
+
+class Sink:
+    def __init__(self):
+        self.calls = []
+        self.event = threading.Event()
+
+    def __call__(self, trades):
+        self.calls.append([dict(trade) for trade in trades])
+        self.event.set()
+
+    @property
+    def trades(self):
+        return [trade for call in self.calls for trade in call]
+
+
+def fill(order_id, size, price, **extra):
+    return dict(master_id='m', order_id=order_id, symbol='BTCUSD', side='buy', size=size, price=price, **extra)
+
+
+def test_partials_merge_into_one_trade_at_the_average_price():
+    sink = Sink()
+    coalescer = FillCoalescer(sink, window=60)
+    coalescer.add(fill(1, 1, 100, received_at=20.0))
+    coalescer.add(fill(1, 3, 200, received_at=10.0))
+    assert sink.calls == []
+    assert coalescer.flush() == 1
+    [trade] = sink.trades
+    assert trade['size'] == 4
+    assert trade['average_fill_price'] == 175
+    assert trade['received_at'] == 10.0
+    assert trade['fill_count'] == 2
+
+
+def test_orders_get_separate_windows_flushed_together():
+    sink = Sink()
+    coalescer = FillCoalescer(sink, window=60)
+    coalescer.add(fill(1, 1, 100))
+    coalescer.add(fill(2, 2, 100))
+    coalescer.add(fill(1, 1, 100))
+    coalescer.flush()
+    assert len(sink.calls) == 1
+    assert sorted((trade['order_id'], trade['size']) for trade in sink.trades) == [(1, 2), (2, 2)]
+
+
+def test_fully_filled_order_flushes_at_once():
+    sink = Sink()
+    coalescer = FillCoalescer(sink, window=60)
+    coalescer.add(fill(1, 1, 100, unfilled_size=2))
+    coalescer.add(fill(1, 2, 100, unfilled_size=0))
+    [trade] = sink.trades
+    assert trade['size'] == 3 and trade['unfilled_size'] == 0
+    assert coalescer.get_stats()['pending'] == 0
+
+
+def test_max_fills_flushes_without_waiting():
+    sink = Sink()
+    coalescer = FillCoalescer(sink, window=60, max_fills=3)
+    for _ in range(3):
+        coalescer.add(fill(1, 1, 100))
+    assert [trade['size'] for trade in sink.trades] == [3]
+
+
+def test_fill_without_order_id_passes_straight_through():
+    sink = Sink()
+    coalescer = FillCoalescer(sink, window=60)
+    coalescer.add(fill(None, 1, 100))
+    assert sink.trades[0]['order_id'] is None
+
+
+def test_window_closes_after_its_deadline():
+    sink = Sink()
+    coalescer = FillCoalescer(sink, window=0.02)
+    coalescer.start()
+    try:
+        coalescer.add(fill(1, 1, 100))
+        coalescer.add(fill(1, 1, 100))
+        assert sink.event.wait(2)
+        assert [trade['size'] for trade in sink.trades] == [2]
+    finally:
+        coalescer.stop()
+
+
+def test_early_close_does_not_cut_the_next_window_short():
+    sink = Sink()
+    coalescer = FillCoalescer(sink, window=0.3)
+    coalescer.add(fill(1, 1, 100))
+    coalescer.add(fill(1, 1, 100, unfilled_size=0))  # closes the first window early
+    time.sleep(0.05)
+    coalescer.add(fill(1, 1, 100))  # opens a second window for the same order
+    stale_due = coalescer.deadlines[0][0]
+    due = coalescer.pending[('m', 1)][0]
+    assert stale_due < due
+    # The first window's deadline has passed here but must not flush the second window
+    assert coalescer._due(stale_due) == []
+    assert [trade['size'] for trade in coalescer._due(due)] == [1]
+
+
+def window(coalescer, sink, *partials):
+    for partial in partials:
+        coalescer.add(partial)
+    coalescer.flush()
+    return sink.trades[-1]['fill_id']
+
+
+def test_window_id_is_derived_from_its_partials():
+    sink = Sink()
+    coalescer = FillCoalescer(sink, window=60)
+    assert window(coalescer, sink, fill(1, 1, 100, fill_id='f1')) == 'f1'
+    both = window(coalescer, sink, fill(1, 1, 100, fill_id='f2'), fill(1, 1, 100, fill_id='f3'))
+    assert both.startswith('window-')
+    restarted = FillCoalescer(Sink(), window=60)
+    assert window(restarted, restarted.sink, fill(1, 1, 100, fill_id='f3'), fill(1, 1, 100, fill_id='f2')) == both
+
+
+def test_window_id_without_fill_ids_uses_time_size_and_price():
+    first, second = Sink(), Sink()
+    one, other = FillCoalescer(first, window=60), FillCoalescer(second, window=60)
+    partials = [fill(1, 1, 100, created_at='t1'), fill(1, 2, 101, created_at='t2')]
+    assert window(one, first, *partials) == window(other, second, *partials)
+    assert window(one, first, fill(1, 1, 100, created_at='t3'), fill(1, 2, 101, created_at='t4')) != \
+        first.trades[0]['fill_id']
+
+
+def test_redelivered_partials_are_dropped():
+    sink = Sink()
+    coalescer = FillCoalescer(sink, window=60)
+    window(coalescer, sink, *(fill(1, 1, 100, fill_id=f'f{i}') for i in range(3)))
+    coalescer.add(fill(1, 1, 100, fill_id='f1'))
+    coalescer.add(fill(1, 1, 100, fill_id='f2'))
+    assert coalescer.flush() == 0
+    assert coalescer.get_stats()['duplicates'] == 2
+
+
+def test_windows_of_one_order_reach_the_sink_in_order():
+    entered, release = threading.Event(), threading.Event()
+    seen = []
+
+    def sink(trades):
+        seen.extend(trade['fill_id'] for trade in trades)
+        if len(seen) == 1:
+            entered.set()
+            release.wait(2)
+
+    coalescer = FillCoalescer(sink, window=60)
+    first = threading.Thread(target=coalescer.add, args=(fill(1, 1, 100, fill_id='a', unfilled_size=0),))
+    first.start()
+    assert entered.wait(2)
+    second = threading.Thread(target=coalescer.add, args=(fill(1, 1, 100, fill_id='b', unfilled_size=0),))
+    second.start()
+    time.sleep(0.05)
+    assert seen == ['a']
+    release.set()
+    first.join()
+    second.join()
+    assert seen == ['a', 'b']
+
+
+def test_engine_copies_each_fill_once_however_windows_are_grouped():
+    engine = CopyEngine({'id': 'm', 'name': 'broker'}, [], coalesce_window=60)
+    try:
+        for start in range(0, 6, 2):
+            engine.process_broker_fill(fill(1, 1, 100, fill_id=f'f{start}'))
+            engine.process_broker_fill(fill(1, 1, 100, fill_id=f'f{start + 1}'))
+            engine.coalescer.flush()
+        assert engine.get_stats()['total_trades'] == 3
+        # A replay after a reconnect, grouped differently
+        engine.process_broker_fill(fill(1, 1, 100, fill_id='f0'))
+        engine.coalescer.flush()
+        for i in range(1, 6):
+            engine.process_broker_fill(fill(1, 1, 100, fill_id=f'f{i}'))
+        engine.coalescer.flush()
+        assert engine.get_stats()['total_trades'] == 3
+        # The same merged trade arriving again is still a duplicate
+        engine.process_broker_trades([dict(fill(1, 2, 100), fill_id='f9')] * 2)
+        assert engine.get_stats()['total_trades'] == 4
+    finally:
+        engine.stop()
@@ -0,0 +1,40 @@
+import argparse
+
+from copytrade import fleet, fleetqueue
+from copytrade.fleetqueue import CLAIMED, DONE, PENDING, FleetQueue, worker_main
+
+CREDENTIALS = {
+    'brokers': [{'id': 1, 'account_name': 'broker'}],
+    'followers': [{'id': 2, 'follower_name': 'a'}, {'id': 3, 'follower_name': 'b'}]
+}
+
+
+def test_worker_stops_quietly_on_ctrl_c_and_leaves_the_rest_queued(tmp_path, monkeypatch):
+    path = str(tmp_path / 'fleet-queue.db')
+    queue = FleetQueue(path)
+    run_id = queue.create_run('testnet', CREDENTIALS)
+    calls = []
+
+    def validate(account, name_field, *args, **kwargs):
+        calls.append(account[name_field])
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return {'status': 'SUCCESS', 'working': True}
+
+    monkeypatch.setattr(fleet, 'validate_account', validate)
+    assert worker_main(path, run_id, 'testnet', load_credentials=lambda: CREDENTIALS, quiet=False) == 1
+    progress = queue.progress(run_id)
+    assert (progress[DONE], progress[CLAIMED], progress[PENDING]) == (1, 1, 1)
+    queue.close()
+
+
+def test_cli_exits_130_without_a_traceback_on_ctrl_c(monkeypatch):
+    from copytrade.__main__ import cmd_validate_fleet_queue
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(fleetqueue, 'run_fleet_queue', interrupted)
+    args = argparse.Namespace(queue='fleet-queue.db', environment='testnet', transport='http1', workers=1,
+                              fresh=False, history=None, verbose=False)
+    assert cmd_validate_fleet_queue(args) == 130
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from copytrade.jsonstream import ResultStream, count_results
+
+BODY = {
+    'success': True,
+    'result': [
+        {'id': 1, 'symbol': 'BTCUSD', 'contract_value': '0.001', 'product': {'tick_size': '0.5'}, 'note': 'ünï'},
+        {'id': 2, 'symbol': 'ETHUSD', 'contract_value': '0.01', 'product': {'tick_size': '0.05'}, 'size': -4.5e2},
+        {'id': 3, 'symbol': 'XRPUSD', 'contract_value': None, 'product': None, 'flags': [True, False, None]}
+    ],
+    'meta': {'after': 'cursor-2', 'total': 3}
+}
+
+
+def chunked(text, size, as_bytes=True):
+    data = text.encode('utf-8') if as_bytes else text
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 100000])
+def test_whole_elements_match_json_loads_at_every_chunk_size(size):
+    text = json.dumps(BODY, ensure_ascii=False)
+    stream = ResultStream(chunked(text, size))
+    assert list(stream) == BODY['result']
+    assert stream.count == 3
+    assert stream.extras == {'success': True, 'meta': BODY['meta']}
+
+
+def test_text_chunks_and_pretty_printed_body():
+    text = json.dumps(BODY, indent=2)
+    assert list(ResultStream(chunked(text, 5, as_bytes=False))) == BODY['result']
+
+
+def test_selected_fields_with_paths_and_converters():
+    stream = ResultStream(chunked(json.dumps(BODY), 11), fields={
+        'symbol': None,
+        'contract_value': float,
+        'tick_size': ('product.tick_size', float)
+    })
+    assert list(stream) == [
+        {'symbol': 'BTCUSD', 'contract_value': 0.001, 'tick_size': 0.5},
+        {'symbol': 'ETHUSD', 'contract_value': 0.01, 'tick_size': 0.05},
+        {'symbol': 'XRPUSD', 'contract_value': None, 'tick_size': None}
+    ]
+
+
+def test_field_list_and_bad_conversion():
+    body = json.dumps({'result': [{'id': 'x', 'symbol': 'BTCUSD', 'other': 1}]})
+    assert list(ResultStream([body], fields=['symbol', 'missing'])) == [{'symbol': 'BTCUSD', 'missing': None}]
+    assert list(ResultStream([body], fields={'id': int})) == [{'id': None}]
+
+
+def test_empty_result_and_empty_object():
+    stream = ResultStream([b'{"result": [], "success": true}'])
+    assert list(stream) == []
+    assert stream.count == 0
+    assert stream.extras == {'success': True}
+    assert list(ResultStream([b'{}'])) == []
+
+
+def test_other_array_keys_are_kept_in_extras():
+    stream = ResultStream([b'{"items": [1, 2], "result": [3]}'])
+    assert list(stream) == [3]
+    assert stream.extras == {'items': [1, 2]}
+
+
+def test_count_results_keeps_nothing():
+    class Response:
+        def iter_content(self, chunk_size):
+            return iter(chunked(json.dumps(BODY), 4))
+
+    assert count_results(Response()) == 3
+
+
+@pytest.mark.parametrize('body', [b'{"result": [{"id": 1}, ', b'{"result": [{"id": 1}', b'[1, 2]'])
+def test_truncated_or_malformed_body_raises(body):
+    with pytest.raises(ValueError):
+        list(ResultStream(chunked(body.decode(), 3)))
@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from copytrade.lanes import CLOSE, MAINTENANCE, KeyedExecutor
+
+
+def test_tasks_on_one_key_run_in_submission_order():
+    executor = KeyedExecutor(max_workers=4)
+    ran = []
+
+    def task(n):
+        time.sleep(0.001 * (n % 3))  # uneven durations would reorder a plain pool
+        ran.append(n)
+
+    futures = [executor.submit('acct-1', task, n) for n in range(30)]
+    executor.shutdown()
+    assert ran == list(range(30))
+    assert all(f.done() for f in futures)
+
+
+def test_one_key_never_runs_two_tasks_at_once():
+    executor = KeyedExecutor(max_workers=4)
+    running = {'acct-1': 0, 'acct-2': 0}
+    overlap = []
+    lock = threading.Lock()
+
+    def task(key):
+        with lock:
+            running[key] += 1
+            overlap.append(running[key])
+        time.sleep(0.002)
+        with lock:
+            running[key] -= 1
+
+    for _ in range(10):
+        executor.submit('acct-1', task, 'acct-1')
+        executor.submit('acct-2', task, 'acct-2')
+    executor.shutdown()
+    assert max(overlap) == 1
+
+
+def test_slow_key_does_not_hold_up_other_keys():
+    executor = KeyedExecutor(max_workers=2)
+    gate = threading.Event()
+    slow = executor.submit('slow', gate.wait, 5)
+    fast = [executor.submit(f"acct-{n}", lambda n=n: n) for n in range(5)]
+    try:
+        assert [f.result(timeout=2) for f in fast] == list(range(5))
+        assert not slow.done()
+    finally:
+        gate.set()
+        executor.shutdown()
+    assert slow.result() is True
+
+
+def test_errors_reach_the_future_and_the_lane_keeps_going():
+    executor = KeyedExecutor(max_workers=2)
+
+    def fail():
+        raise ValueError('rejected')
+
+    failed = executor.submit('acct-1', fail)
+    after = executor.submit('acct-1', lambda: 'placed')
+    executor.shutdown()
+    with pytest.raises(ValueError):
+        failed.result()
+    assert after.result() == 'placed'
+
+
+def test_shutdown_without_wait_cancels_queued_tasks():
+    executor = KeyedExecutor(max_workers=1)
+    gate = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        gate.wait(5)
+
+    running = executor.submit('acct-1', block)
+    queued = executor.submit('acct-1', lambda: 'late')
+    started.wait(2)
+    assert executor.pending('acct-1') == 1
+    executor.shutdown(wait=False)
+    gate.set()
+    running.result(timeout=2)
+    assert queued.cancelled()
+    with pytest.raises(RuntimeError):
+        executor.submit('acct-1', lambda: None)
+
+
+def blocked_executor(starvation_after):
+    """A one-worker executor whose worker is held until the returned event is set"""
+    executor = KeyedExecutor(max_workers=1, starvation_after=starvation_after)
+    gate = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        gate.wait(5)
+
+    executor.submit('busy', block)
+    started.wait(2)
+    return executor, gate
+
+
+def test_closes_run_before_earlier_opens_and_maintenance_runs_last():
+    executor, gate = blocked_executor(starvation_after=10)
+    ran = []
+    executor.submit_at(MAINTENANCE, 'sync', ran.append, 'maintenance')
+    executor.submit('acct-1', ran.append, 'open-1')
+    executor.submit('acct-2', ran.append, 'open-2')
+    executor.submit_at(CLOSE, 'acct-3', ran.append, 'close')
+    gate.set()
+    executor.shutdown()
+    assert ran == ['close', 'open-1', 'open-2', 'maintenance']
+    assert executor.get_stats()['run_by_priority'] == {'close': 1, 'open': 3, 'maintenance': 1}
+
+
+def test_close_pulls_its_lane_forward_without_reordering_it():
+    executor, gate = blocked_executor(starvation_after=10)
+    ran = []
+    executor.submit('acct-1', ran.append, 'acct-1 open')
+    executor.submit('acct-2', ran.append, 'acct-2 open')
+    executor.submit_at(CLOSE, 'acct-1', ran.append, 'acct-1 close')
+    gate.set()
+    executor.shutdown()
+    assert ran == ['acct-1 open', 'acct-1 close', 'acct-2 open']
+
+
+def test_lane_waiting_past_starvation_after_runs_ahead_of_closes():
+    executor, gate = blocked_executor(starvation_after=0.05)
+    ran = []
+    executor.submit_at(MAINTENANCE, 'sync', ran.append, 'maintenance')
+    time.sleep(0.1)
+    executor.submit_at(CLOSE, 'acct-1', ran.append, 'close-1')
+    executor.submit_at(CLOSE, 'acct-2', ran.append, 'close-2')
+    gate.set()
+    executor.shutdown()
+    assert ran == ['maintenance', 'close-1', 'close-2']
+    assert executor.get_stats()['starvation_picks'] == 1
+
+
+def test_waiting_shutdown_after_cancelling_one_returns():
+    executor = KeyedExecutor(max_workers=1)
+    gate = threading.Event()
+    executor.submit('acct-1', gate.wait, 5)
+    executor.submit('acct-1', lambda: 'late')
+    executor.shutdown(wait=False)
+    done = threading.Thread(target=executor.shutdown, daemon=True)
+    done.start()
+    time.sleep(0.05)  # let the second shutdown start waiting on the lane
+    gate.set()
+    done.join(2)
+    assert not done.is_alive()
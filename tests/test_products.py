@@ -0,0 +1,89 @@
+import gc
+import math
+import weakref
+
+import pytest
+
+from copytrade.products import LIVE, DELISTED, ProductIndex, write_index
+
+
+def product(product_id, symbol, contract_value='0.001', limit='1000'):
+    return {'id': product_id, 'symbol': symbol, 'contract_type': 'perpetual_futures',
+            'contract_value': contract_value, 'tick_size': '0.5', 'min_size': '1',
+            'position_size_limit': limit}
+
+
+def row(product_id, symbol, contract_value=0.001):
+    return {'product_id': product_id, 'symbol': symbol, 'contract_value': contract_value,
+            'tick_size': 0.5, 'min_lot': 1.0, 'position_limit': 1000.0}
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'product-index.bin')
+    write_index(path, [row(27, 'BTCUSD'), row(3136, 'ETHUSD', 0.01)], capacity=16)
+    return path
+
+
+def test_lookups_and_position_limit(path):
+    index = ProductIndex(path)
+    try:
+        assert len(index) == 2
+        assert index.get_product_id('ETHUSD') == 3136
+        assert index.get_symbol(27) == 'BTCUSD'
+        assert index.get_contract_value('ETHUSD') == 0.01
+        assert index.get_position_limit('BTCUSD') == 1000.0
+        assert index.get('BTCUSD')['status'] == LIVE
+        with pytest.raises(KeyError):
+            index.get_product_id('SOLUSD')
+    finally:
+        index.close()
+
+
+def test_apply_updates_adds_and_delists(path):
+    index = ProductIndex(path)
+    index, changes = index.apply([product(27, 'BTCUSD', '0.002'), product(14969, 'SOLUSD', limit=None)])
+    try:
+        assert changes == {'added': 1, 'updated': 1, 'delisted': 1}
+        assert index.get_contract_value('BTCUSD') == 0.002
+        assert index.get_position_limit('SOLUSD') == math.inf
+        assert index.get_symbol(14969) == 'SOLUSD'
+        assert index.get('ETHUSD')['status'] == DELISTED
+        assert not index.is_live('ETHUSD')
+    finally:
+        index.close()
+
+
+def test_reader_picks_up_rows_appended_by_another_index(path):
+    reader = ProductIndex(path, recheck_interval=0)
+    writer = ProductIndex(path)
+    try:
+        assert 'SOLUSD' not in reader
+        writer.apply([product(27, 'BTCUSD'), product(3136, 'ETHUSD', '0.01'), product(14969, 'SOLUSD')])
+        assert reader.get_product_id('SOLUSD') == 14969
+        assert reader.get_symbol(14969) == 'SOLUSD'
+        assert len(reader) == 3
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_replaced_file_is_swapped_in_whole_and_old_mapping_released(path):
+    reader = ProductIndex(path, recheck_interval=0)
+    old = reader._map
+    gone = weakref.ref(old)
+    # A grow rewrites the file with new offsets; SOLUSD only exists in the new file
+    write_index(path, [row(3136, 'ETHUSD', 0.02), row(27, 'BTCUSD', 0.003), row(14969, 'SOLUSD')], capacity=64)
+    try:
+        assert reader.get_contract_value('SOLUSD') == 0.001
+        assert reader._map is not old
+        assert reader.get_contract_value('BTCUSD') == 0.003
+        assert reader.capacity == 64
+        # A reader that took the old mapping before the swap still reads it consistently
+        assert old.contract_value[old.slots['BTCUSD']] == 0.001
+        assert not old.mm.closed
+        del old
+        gc.collect()
+        assert gone() is None
+    finally:
+        reader.close()
@@ -0,0 +1,49 @@
+import pstats
+import threading
+
+from copytrade.profiling import ThreadedCProfile, phase, profiled
+
+
+def busy_worker_function():
+    return sum(i * i for i in range(20000))
+
+
+def function_names(stats):
+    return {name for _, _, name in stats.stats}
+
+
+def test_cprofile_covers_worker_threads(tmp_path):
+    profiler = ThreadedCProfile()
+    profiler.start()
+    try:
+        worker = threading.Thread(target=busy_worker_function)
+        worker.start()
+        worker.join()
+    finally:
+        profiler.stop()
+    stats = profiler.write_pstats(str(tmp_path / 'run.pstats'))
+    assert 'busy_worker_function' in function_names(stats)
+    assert 'busy_worker_function' in function_names(pstats.Stats(str(tmp_path / 'run.pstats')))
+
+
+def test_profiled_run_writes_pstats_and_phases(tmp_path):
+    output = str(tmp_path / 'profile')
+    with profiled('cprofile', output):
+        def work():
+            with phase('network', 'orders'):
+                busy_worker_function()
+
+        threads = [threading.Thread(target=work) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert 'busy_worker_function' in function_names(pstats.Stats(f"{output}.pstats"))
+    assert (tmp_path / 'profile.phases.json').read_text().count('"network"') == 1
+
+
+def test_sampling_profile_writes_folded_stacks(tmp_path):
+    output = str(tmp_path / 'profile')
+    with profiled('sample', output, interval=0.001):
+        busy_worker_function()
+    assert (tmp_path / 'profile.folded').exists()
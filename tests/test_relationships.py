@@ -0,0 +1,100 @@
+import threading
+
+from copytrade.relationships import RelationshipIndex
+
+
+def test_link_and_unlink_keep_both_directions_in_step():
+    index = RelationshipIndex()
+    assert index.link('a', 'm1')
+    assert index.link('b', 'm1')
+    assert index.link('a', 'm2')
+    assert not index.link('a', 'm1')
+    assert index.followers_of('m1') == ('a', 'b')
+    assert index.masters_of('a') == {'m1', 'm2'}
+
+    assert index.unlink('a', 'm1')
+    assert not index.unlink('a', 'm1')
+    assert index.followers_of('m1') == ('b',)
+    assert index.masters_of('a') == {'m2'}
+    index.remove_follower('a')
+    assert index.followers_of('m2') == ()
+    assert 'm2' not in index.by_master and 'a' not in index.by_follower
+    assert index.get_status() == {'masters': 1, 'followers': 1, 'links': 1}
+
+
+def test_set_masters_touches_only_what_changed():
+    index = RelationshipIndex()
+    index.set_masters('a', ['m1', 'm2'])
+    index.set_masters('b', ['m2'])
+    before = index.followers_of('m2')
+    index.set_masters('a', ['m2', 'm3'])
+    assert index.followers_of('m1') == ()
+    assert index.followers_of('m2') is before  # unchanged master keeps its tuple
+    assert index.followers_of('m3') == ('a',)
+
+
+def test_readers_always_see_a_whole_follower_list():
+    index = RelationshipIndex()
+    index.link('anchor', 'm1')
+    stop = threading.Event()
+    seen = []
+
+    def reader():
+        while not stop.is_set():
+            followers = index.followers_of('m1')
+            seen.append(followers[0] == 'anchor' and len(set(followers)) == len(followers))
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for n in range(2000):
+        index.link(f"f{n}", 'm1')
+        if n % 2:
+            index.unlink(f"f{n - 1}", 'm1')
+    stop.set()
+    thread.join()
+    assert seen and all(seen)
+    assert len(index.followers_of('m1')) == 1001
+
+
+def test_engine_fans_out_only_to_followers_of_the_trading_master():
+    from copytrade.engine import CopyEngine
+    from copytrade.standin import StandInExchange
+
+    with StandInExchange() as exchange:
+        class Engine(CopyEngine):
+            def make_client(self, config):
+                client = super().make_client(config)
+                client.base_url = exchange.url
+                return client
+
+        def follower(name, **extra):
+            return dict({'follower_name': name, 'api_key': name, 'api_secret': 's', 'copy_mode': 'multiplier',
+                         'multiplier': 1, 'max_lot_size': 10}, **extra)
+
+        engine = Engine({'id': 'm1', 'name': 'broker-1'}, [
+            follower('a'),
+            follower('b', master_ids=['m1', 'm2']),
+            follower('c', master_broker_account_id='m2')
+        ])
+        engine.add_master({'id': 'm2', 'name': 'broker-2'})
+        try:
+            def copy(order_id, master_id):
+                trade = {'order_id': order_id, 'master_id': master_id, 'symbol': 'BTCUSD', 'side': 'buy',
+                         'size': 1, 'order_type': 'market_order'}
+                futures = engine.process_broker_trades([trade])
+                for future in futures:
+                    future.result()
+                return len(futures)
+
+            assert sorted(engine.relationships.followers_of('m2')) == ['b', 'c']
+            assert copy(1, 'm2') == 2
+            assert copy(2, 'm1') == 2
+            # A follower moved to another master stops receiving the old one's trades at once
+            engine.apply_follower_changes([], [follower('a', master_broker_account_id='m2')], [])
+            assert copy(3, 'm1') == 1
+            engine.remove_follower('b')
+            assert engine.relationships.followers_of('m2') == ('c', 'a')
+            assert copy(4, 'm2') == 2
+            assert len(exchange.orders) == 7
+        finally:
+            engine.stop()
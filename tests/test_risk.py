@@ -0,0 +1,245 @@
+import math
+import time
+
+import pytest
+
+from copytrade.exposure import ExposureMatrix
+from copytrade.risk import ACCEPT, CLIP, REJECT, RiskGate
+
+
+class Products:
+    """The ProductIndex lookups the gate uses"""
+
+    def __init__(self, contracts):
+        self.contracts = contracts  # symbol -> (contract value, min lot)
+
+    def __contains__(self, symbol):
+        return symbol in self.contracts
+
+    def get_contract_value(self, symbol):
+        return self.contracts[symbol][0]
+
+    def get_min_lot(self, symbol):
+        return self.contracts[symbol][1]
+
+
+class Exposure:
+    def __init__(self, positions=None, notional=None):
+        self.positions = positions or {}
+        self.notional = notional or {}
+
+    def position(self, name, symbol):
+        return self.positions.get((name, symbol), 0.0)
+
+    def follower_notional(self, name):
+        return self.notional.get(name, 0.0)
+
+
+class Balances:
+    def __init__(self, equity):
+        self.equity = equity
+
+    def get_equity(self, name, max_age=None):
+        return self.equity.get(name)
+
+
+PRODUCTS = Products({'BTCUSD': (0.001, 1.0), 'ETHUSD': (0.01, 1.0), 'NEWUSD': (math.nan, 1.0)})
+
+
+def order(side, size, symbol='BTCUSD', price=50000.0, **extra):
+    return dict(symbol=symbol, side=side, size=size, broker_price=price, **extra)
+
+
+def gate(config, exposure=None, balances=None, products=PRODUCTS, name='a'):
+    risk = RiskGate(exposure if exposure is not None else ExposureMatrix(), balances, products)
+    risk.set_limits(name, config)
+    return risk
+
+
+def test_within_limits_is_accepted():
+    risk = gate({'max_position_size': 10})
+    assert risk.evaluate([('a', order('buy', 4))]) == [(ACCEPT, 4, None)]
+
+
+def test_clip_to_max_position_floors_to_lot_step():
+    risk = gate({'max_position_size': 5.5})
+    assert risk.evaluate([('a', order('buy', 8))]) == [(CLIP, 5.0, 'max_position')]
+
+
+def test_clip_below_min_lot_is_rejected():
+    risk = gate({'max_position_size': 0.5})
+    assert risk.evaluate([('a', order('buy', 8))]) == [(REJECT, 0.0, 'max_position')]
+
+
+def test_follower_min_lot_applies_with_product_min_lot():
+    risk = gate({'max_position_size': 2, 'min_lot_size': 3})
+    assert risk.evaluate([('a', order('buy', 8))]) == [(REJECT, 0.0, 'max_position')]
+
+
+def test_orders_in_one_call_build_on_each_other():
+    risk = gate({'max_position_size': 5})
+    assert risk.evaluate([('a', order('buy', 3)), ('a', order('buy', 3)), ('a', order('buy', 3))]) == [
+        (ACCEPT, 3, None), (CLIP, 2.0, 'max_position'), (REJECT, 0.0, 'max_position')
+    ]
+
+
+def test_reducing_and_reduce_only_orders_always_pass():
+    risk = gate({'max_position_size': 1}, Exposure({('a', 'BTCUSD'): 5.0}))
+    assert risk.evaluate([('a', order('sell', 3))]) == [(ACCEPT, 3, None)]
+    assert risk.evaluate([('a', order('buy', 3, reduce_only=True))]) == [(ACCEPT, 3, None)]
+
+
+def test_flip_keeps_the_reducing_part():
+    # 5 long selling 9: closing 5 is always allowed, the 4 short is over the limit of 2
+    risk = gate({'max_position_size': 2}, Exposure({('a', 'BTCUSD'): 5.0}))
+    assert risk.evaluate([('a', order('sell', 9))]) == [(CLIP, 7.0, 'max_position')]
+    risk = gate({'max_position_size': 0.5}, Exposure({('a', 'BTCUSD'): 5.0}))
+    assert risk.evaluate([('a', order('sell', 9))]) == [(CLIP, 5.0, 'max_position')]
+
+
+def test_max_notional_clip():
+    # One contract is 0.001 x 50000 = 50; 1000 of room left
+    risk = gate({'max_notional': 3000}, Exposure(notional={'a': 2000.0}))
+    assert risk.evaluate([('a', order('buy', 30))]) == [(CLIP, 20.0, 'max_notional')]
+
+
+def test_max_leverage_uses_equity():
+    risk = gate({'max_leverage': 2}, Exposure(), Balances({'a': 500.0}))
+    assert risk.evaluate([('a', order('buy', 30))]) == [(CLIP, 20.0, 'max_leverage')]
+
+
+@pytest.mark.parametrize('symbol, products', [('NEWUSD', PRODUCTS), ('XRPUSD', PRODUCTS), ('BTCUSD', None)])
+def test_unknown_contract_value_fails_closed(symbol, products):
+    risk = gate({'max_notional': 1000}, products=products)
+    assert risk.evaluate([('a', order('buy', 1, symbol))]) == [(REJECT, 0.0, 'unknown_contract_value')]
+
+
+def test_unknown_contract_value_without_notional_limits_is_accepted():
+    risk = gate({'max_position_size': 10})
+    assert risk.evaluate([('a', order('buy', 1, 'NEWUSD'))]) == [(ACCEPT, 1, None)]
+
+
+def test_daily_loss_blocks_growth_only():
+    balances = Balances({'a': 1000.0})
+    risk = gate({'daily_loss_limit': 0.1}, Exposure({('a', 'BTCUSD'): 2.0}), balances)
+    assert risk.evaluate([('a', order('buy', 1))]) == [(ACCEPT, 1, None)]
+    balances.equity['a'] = 850.0
+    assert risk.evaluate([('a', order('buy', 1))]) == [(REJECT, 0.0, 'daily_loss')]
+    assert risk.evaluate([('a', order('sell', 1))]) == [(ACCEPT, 1, None)]
+
+
+def test_day_start_survives_export_and_restore():
+    risk = gate({'daily_loss_limit': 0.1}, balances=Balances({'a': 1000.0}))
+    risk.evaluate([('a', order('buy', 1))])
+    restarted = gate({'daily_loss_limit': 0.1}, balances=Balances({'a': 850.0}))
+    restarted.restore_state(risk.export_state())
+    assert restarted.evaluate([('a', order('buy', 1))]) == [(REJECT, 0.0, 'daily_loss')]
+
+
+def test_yesterdays_day_start_is_not_restored():
+    risk = RiskGate()
+    risk.restore_state({'day_start': {'a': [int(time.time() // 86400) - 1, 1000.0]}})
+    assert risk.day_start == {}
+
+
+def test_reservations_count_until_released():
+    risk = gate({'max_position_size': 5})
+    first = order('buy', 4)
+    risk.reserve('a', first)
+    assert risk.evaluate([('a', order('buy', 4))]) == [(CLIP, 1.0, 'max_position')]
+    risk.release('a', first)
+    assert risk.evaluate([('a', order('buy', 4))]) == [(ACCEPT, 4, None)]
+    assert risk.reserved == {} and risk.reserved_notional == {}
+
+
+def test_reserved_notional_counts_against_max_notional():
+    risk = gate({'max_notional': 1000})
+    pending = order('buy', 16)
+    risk.reserve('a', pending)
+    assert risk.evaluate([('a', order('buy', 10))]) == [(CLIP, 4.0, 'max_notional')]
+    risk.release('a', pending)
+    risk.release('a', pending)  # a second release is a no-op
+    assert risk.evaluate([('a', order('buy', 10))]) == [(ACCEPT, 10, None)]
+
+
+def test_followers_without_limits_use_defaults():
+    risk = RiskGate(ExposureMatrix(), products=PRODUCTS, max_position=2)
+    assert risk.evaluate([('b', order('buy', 3))]) == [(CLIP, 2.0, 'max_position')]
+    assert RiskGate().evaluate([('b', order('buy', 3))]) == [(ACCEPT, 3, None)]
+
+
+def test_unknown_equity_fails_closed():
+    for config in ({'max_leverage': 2}, {'daily_loss_limit': 0.1}):
+        risk = gate(config, balances=Balances({}))
+        assert risk.evaluate([('a', order('buy', 1))]) == [(REJECT, 0.0, 'unknown_equity')]
+        assert gate(config).evaluate([('a', order('buy', 1))]) == [(REJECT, 0.0, 'unknown_equity')]
+
+
+def test_unknown_price_fails_closed():
+    risk = gate({'max_notional': 1000})
+    assert risk.evaluate([('a', order('buy', 1, price=None))]) == [(REJECT, 0.0, 'unknown_price')]
+    assert gate({'max_position_size': 5}).evaluate([('a', order('buy', 1, price=None))]) == [(ACCEPT, 1, None)]
+
+
+def test_resting_remainder_stays_reserved_until_settled():
+    risk = gate({'max_position_size': 5})
+    resting = order('buy', 4)
+    risk.reserve('a', resting)
+    risk.hold('a', 77, resting, 3)
+    risk.release('a', resting)
+    assert risk.holds('a') == 1
+    assert risk.evaluate([('a', order('buy', 4))]) == [(CLIP, 2.0, 'max_position')]
+    # A read taken before the hold leaves it alone
+    risk.settle_open_orders('a', {}, as_of=0)
+    assert risk.holds('a') == 1
+    # Still open with 1 unfilled, then gone
+    risk.settle_open_orders('a', {'77': 1.0}, as_of=time.time())
+    assert risk.evaluate([('a', order('buy', 5))]) == [(CLIP, 4.0, 'max_position')]
+    risk.settle_open_orders('a', {}, as_of=time.time())
+    assert risk.holds('a') == 0
+    assert risk.reserved == {} and risk.reserved_notional == {}
+
+
+def test_engine_holds_resting_limit_orders_until_resync():
+    from copytrade.engine import CopyEngine
+    from copytrade.standin import StandInExchange
+
+    class RestingExchange(StandInExchange):
+        def _accept_order(self, placed):
+            placed = super()._accept_order(placed)
+            if placed.get('order_type') == 'limit_order':
+                placed.update(state='open', unfilled_size=placed['size'])
+            return placed
+
+    with RestingExchange() as exchange:
+        class Engine(CopyEngine):
+            def make_client(self, config):
+                client = super().make_client(config)
+                client.base_url = exchange.url
+                return client
+
+        exposure = ExposureMatrix()
+        risk = RiskGate(exposure)
+        follower = {'follower_name': 'a', 'api_key': 'k', 'api_secret': 's', 'copy_mode': 'multiplier',
+                    'multiplier': 1, 'max_lot_size': 10, 'max_position_size': 5}
+        engine = Engine({'id': 'm', 'name': 'broker'}, [follower], exposure=exposure, risk=risk)
+        try:
+            def trade(order_id):
+                return {'order_id': order_id, 'symbol': 'BTCUSD', 'side': 'buy', 'size': 4,
+                        'order_type': 'limit_order', 'limit_price': 100, 'average_fill_price': 100}
+
+            for future in engine.process_broker_trades([trade(1)]):
+                future.result()
+            assert exposure.position('a', 'BTCUSD') == 0
+            assert risk.holds('a') == 1
+            for future in engine.process_broker_trades([trade(2)]):
+                future.result()
+            assert [o['size'] for o in exchange.orders] == [4, 1]
+            # The exchange fills and closes both; the resync moves them from holds into positions
+            for placed in exchange.orders:
+                placed['state'] = 'closed'
+            for future in engine.resync_exposure():
+                future.result()
+            assert risk.holds('a') == 0 and risk.reserved == {}
+        finally:
+            engine.stop()
@@ -0,0 +1,73 @@
+from copytrade.exposure import ExposureMatrix
+from copytrade.risk import RiskGate
+from copytrade.shadow import ShadowEngine, compare, fills_to_trades
+from copytrade.standin import StandInExchange
+
+
+class FollowerExchange(StandInExchange):
+    """A follower that holds 5 BTCUSD now, 3 of them bought during the replay window"""
+
+    def handle(self, method, target, headers, body):
+        if target.startswith('/v2/positions'):
+            return 200, {'success': True, 'result': [{'product_symbol': 'BTCUSD', 'size': '5', 'entry_price': '100'}]}
+        if target.startswith('/v2/fills'):
+            self.fill_queries.append(target)
+            return 200, {'success': True, 'result': [{'product_symbol': 'BTCUSD', 'side': 'buy', 'size': '3'}],
+                         'meta': {'after': None}}
+        return super().handle(method, target, headers, body)
+
+
+def test_fills_to_trades_merges_partials_per_order():
+    fills = [
+        {'order_id': 1, 'product_symbol': 'BTCUSD', 'side': 'buy', 'size': '1', 'price': '100'},
+        {'order_id': 2, 'product_symbol': 'ETHUSD', 'side': 'sell', 'size': '2', 'price': '10'},
+        {'order_id': 1, 'product_symbol': 'BTCUSD', 'side': 'buy', 'size': '3', 'price': '104'}
+    ]
+    trades = fills_to_trades(fills, 'm')
+    assert [(t['order_id'], t['size'], t['average_fill_price']) for t in trades] == [(1, 4.0, 103.0), (2, 2.0, 10.0)]
+    assert all(t['master_id'] == 'm' for t in trades)
+
+
+def test_compare_matches_by_follower_and_broker_order():
+    shadow = [{'follower': 'a', 'broker_order_id': 1, 'symbol': 'BTCUSD', 'side': 'buy', 'size': 2},
+              {'follower': 'a', 'broker_order_id': 2, 'symbol': 'BTCUSD', 'side': 'buy', 'size': 1}]
+    sent = [{'follower': 'a', 'broker_order_id': '1', 'symbol': 'BTCUSD', 'side': 'buy', 'size': 3}]
+    report = compare(shadow, sent)
+    assert report['matched'] == 0
+    assert report['size_mismatches'][0]['shadow'] == 2
+    assert [r['broker_order_id'] for r in report['extra_in_shadow']] == [2]
+
+
+def test_replay_is_sized_against_positions_at_the_replay_start():
+    with FollowerExchange() as exchange:
+        exchange.fill_queries = []
+
+        class Engine(ShadowEngine):
+            def make_client(self, config):
+                client = super().make_client(config)
+                client.base_url = exchange.url
+                return client
+
+        exposure = ExposureMatrix()
+        risk = RiskGate(exposure)
+        follower = {'follower_name': 'a', 'api_key': 'k', 'api_secret': 's', 'copy_mode': 'multiplier',
+                    'multiplier': 1, 'max_lot_size': 10, 'max_position_size': 6}
+        engine = Engine({'id': 'm', 'name': 'broker'}, [follower], exposure=exposure, risk=risk)
+        try:
+            for future in engine.resync_exposure():
+                future.result()
+            assert exposure.position('a', 'BTCUSD') == 5
+            for future in engine.rewind_exposure(1700000000000000):
+                assert future.result() == 1
+            assert exposure.position('a', 'BTCUSD') == 2
+            assert 'start_time=1700000000000000' in exchange.fill_queries[0]
+
+            # The broker's replayed buy of 3 is the one the follower copied: 2 + 3 fits under the cap of 6
+            trade = {'order_id': 7, 'master_id': 'm', 'symbol': 'BTCUSD', 'side': 'buy', 'size': 3,
+                     'average_fill_price': 100}
+            for future in engine.process_broker_trades([trade]):
+                future.result()
+            assert [(r['size'], r['side']) for r in engine.records] == [(3, 'buy')]
+            assert exchange.orders == []
+        finally:
+            engine.stop()
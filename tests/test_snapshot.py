@@ -0,0 +1,164 @@
+import threading
+import time
+
+import pytest
+
+from copytrade.engine import CopyEngine
+from copytrade.snapshot import EngineSnapshotter, read_snapshot, restore, write_snapshot
+from copytrade.standin import StandInExchange
+from copytrade.staleness import StalenessBudget
+from copytrade.sync import FollowerSync
+
+FOLLOWER = {'follower_name': 'a', 'api_key': 'k', 'api_secret': 's', 'copy_mode': 'multiplier', 'multiplier': 1,
+            'max_lot_size': 10}
+
+
+def trade(order_id, size=1, **extra):
+    return dict({'order_id': order_id, 'fill_id': f"f{order_id}", 'symbol': 'BTCUSD', 'side': 'buy', 'size': size,
+                 'order_type': 'market_order', 'received_at': time.time()}, **extra)
+
+
+def engine_on(exchange, **kwargs):
+    class Engine(CopyEngine):
+        def make_client(self, config):
+            client = super().make_client(config)
+            client.base_url = exchange.url
+            return client
+
+    return Engine({'id': 'm', 'name': 'broker'}, [dict(FOLLOWER)], **kwargs)
+
+
+def copy(engine, *trades):
+    for future in engine.process_broker_trades(list(trades)):
+        future.result()
+
+
+def test_round_trip_and_rejects_damaged_files(tmp_path):
+    path = str(tmp_path / 'engine-snapshot.bin')
+    state = {'broker_positions': {'m': {'BTCUSD': 2.0}}, 'processed_orders': [('m', 1, 'f1')], 'pending': []}
+    write_snapshot(path, state)
+    loaded, created_at = read_snapshot(path)
+    assert loaded == state
+    assert time.time() - created_at < 60
+
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    data[-1] ^= 0xff
+    with open(path, 'wb') as f:
+        f.write(data)
+    with pytest.raises(ValueError, match='checksum'):
+        read_snapshot(path)
+    with open(path, 'wb') as f:
+        f.write(b'CESN')
+    with pytest.raises(ValueError, match='truncated'):
+        read_snapshot(path)
+
+
+def test_restore_cold_starts_on_missing_or_damaged_file(tmp_path):
+    path = tmp_path / 'engine-snapshot.bin'
+    with StandInExchange() as exchange:
+        engine = engine_on(exchange)
+        try:
+            assert restore(engine, str(path)) is None
+            path.write_bytes(b'not a snapshot' * 10)
+            assert restore(engine, str(path)) is None
+        finally:
+            engine.stop()
+
+
+def test_restored_engine_does_not_copy_a_fill_twice(tmp_path):
+    path = str(tmp_path / 'engine-snapshot.bin')
+    with StandInExchange() as exchange:
+        first = engine_on(exchange)
+        try:
+            copy(first, trade(1))
+            first.broker_positions = {'m': {'BTCUSD': 1.0}}
+            assert EngineSnapshotter(first, path).save()
+        finally:
+            first.stop()
+        assert len(exchange.orders) == 1
+
+        second = engine_on(exchange)
+        try:
+            report = restore(second, path, reconcile=False)
+            assert report['processed_orders'] == len(first.processed_orders)
+            assert second.broker_positions == {'m': {'BTCUSD': 1.0}}
+            copy(second, trade(1))  # redelivered after the restart
+            assert len(exchange.orders) == 1
+            copy(second, trade(2))
+            assert len(exchange.orders) == 2
+        finally:
+            second.stop()
+
+
+def queued_state(exchange, received_at):
+    """Export an engine's state while one copy order is still waiting in its lane"""
+    engine = engine_on(exchange)
+    gate = threading.Event()
+    engine.pool.submit(engine.lane_key('a', 'BTCUSD'), gate.wait, 5)
+    try:
+        engine.process_broker_trades([trade(1, received_at=received_at)])
+        state = engine.export_state()
+        # Drop the queued copy so only the restored engine can send it
+        engine.pool.shutdown(wait=False)
+    finally:
+        gate.set()
+        engine.stop()
+    return state
+
+
+def test_queued_work_is_resubmitted_only_when_asked_and_with_a_budget():
+    with StandInExchange() as exchange:
+        state = queued_state(exchange, time.time())
+        assert [(kind, name, [o['broker_order_id'] for o in orders]) for kind, name, orders in state['pending']] \
+            == [('copy', 'a', [1])]
+        assert exchange.orders == []
+
+        without_budget = engine_on(exchange)
+        try:
+            assert without_budget.restore_state(state) == []
+            assert without_budget.restore_state(state, resubmit=True) == []
+        finally:
+            without_budget.stop()
+
+        with_budget = engine_on(exchange, staleness=StalenessBudget(max_age=60))
+        try:
+            for future in with_budget.restore_state(state, resubmit=True):
+                future.result()
+            assert [o['size'] for o in exchange.orders] == [1]
+        finally:
+            with_budget.stop()
+
+
+def test_resubmitted_work_keeps_its_age_against_the_budget():
+    with StandInExchange() as exchange:
+        state = queued_state(exchange, time.time() - 120)
+        engine = engine_on(exchange, staleness=StalenessBudget(max_age=60))
+        try:
+            for future in engine.restore_state(state, resubmit=True):
+                future.result()
+            assert exchange.orders == []
+        finally:
+            engine.stop()
+
+
+def test_follower_sync_watermark_is_stored_and_restored(tmp_path):
+    path = str(tmp_path / 'engine-snapshot.bin')
+    with StandInExchange() as exchange:
+        sync = FollowerSync(client=None)
+        sync.restore_state({'watermark': '2026-10-01T00:00:00Z', 'versions': {'a': '2026-10-01T00:00:00Z'}})
+        engine = engine_on(exchange)
+        try:
+            EngineSnapshotter(engine, path, sync=sync).save()
+        finally:
+            engine.stop()
+
+        resumed = FollowerSync(client=None)
+        engine = engine_on(exchange)
+        try:
+            restore(engine, path, reconcile=False, sync=resumed)
+        finally:
+            engine.stop()
+        assert resumed.watermark == '2026-10-01T00:00:00Z'
+        assert resumed.versions == {'a': '2026-10-01T00:00:00Z'}
+        assert list(resumed.followers) == ['a']
@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+from copytrade.sync import FollowerSync
+
+
+class Table:
+    """The slice of the supabase query builder FollowerSync uses, over a list of rows"""
+
+    def __init__(self, rows, queries):
+        self.rows = rows
+        self.queries = queries
+        self.filters = []
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(('eq', column, value))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(('gte', column, value))
+        return self
+
+    def order(self, column):
+        return self
+
+    def execute(self):
+        self.queries.append(self.filters)
+        rows = self.rows
+        for op, column, value in self.filters:
+            if op == 'eq':
+                rows = [row for row in rows if row.get(column) == value]
+            else:
+                rows = [row for row in rows if row.get(column) and row[column] >= value]
+        return SimpleNamespace(data=sorted((dict(row) for row in rows), key=lambda row: row.get('updated_at') or ''))
+
+
+class Client:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def table(self, name):
+        return Table(self.rows, self.queries)
+
+
+def row(key, updated_at, status='active', **extra):
+    return dict({'id': key, 'follower_name': key, 'account_status': status, 'updated_at': updated_at}, **extra)
+
+
+def test_first_poll_loads_active_rows_then_polls_from_the_watermark():
+    client = Client([row('a', '2026-10-01T00:00:01'), row('b', '2026-10-01T00:00:02'),
+                     row('c', '2026-10-01T00:00:03', status='inactive')])
+    sync = FollowerSync(client)
+    added, updated, removed = sync.poll()
+    assert [r['id'] for r in added] == ['a', 'b'] and not updated and not removed
+    assert sync.watermark == '2026-10-01T00:00:02'
+
+    client.rows[0] = row('a', '2026-10-01T00:00:05', multiplier=2)
+    client.rows.append(row('d', '2026-10-01T00:00:06'))
+    added, updated, removed = sync.poll()
+    assert client.queries[-1] == [('gte', 'updated_at', '2026-10-01T00:00:02')]
+    assert [r['id'] for r in added] == ['d']
+    assert [r['multiplier'] for r in updated] == [2]
+    assert sync.watermark == '2026-10-01T00:00:06'
+    assert sorted(r['id'] for r in sync.get_followers()) == ['a', 'b', 'd']
+
+
+def test_rows_at_the_watermark_are_applied_once():
+    client = Client([row('a', '2026-10-01T00:00:01')])
+    sync = FollowerSync(client)
+    sync.poll()
+    # Written in the same second as the watermark, after the last poll read it
+    client.rows.append(row('b', '2026-10-01T00:00:01'))
+    assert [r['id'] for r in sync.poll()[0]] == ['b']
+    assert sync.poll() == ([], [], [])
+
+
+def test_deactivated_and_hard_deleted_rows_are_removed():
+    client = Client([row('a', '2026-10-01T00:00:01'), row('b', '2026-10-01T00:00:02')])
+    changes = []
+    sync = FollowerSync(client, on_change=lambda *diff: changes.append(diff), reconcile_every=3)
+    sync.poll()
+    client.rows[0] = row('a', '2026-10-01T00:00:03', status='inactive')
+    assert [r['id'] for r in sync.poll()[2]] == ['a']
+    del client.rows[1]  # a hard delete leaves nothing for the incremental poll to find
+    assert sync.poll()[2][0]['id'] == 'b'  # the third poll rereads the full active set
+    assert sync.get_followers() == []
+    assert [len(diff[2]) for diff in changes] == [0, 1, 1]
+
+
+def test_handler_errors_do_not_stop_the_sync():
+    client = Client([row('a', '2026-10-01T00:00:01')])
+
+    def fail(added, updated, removed):
+        raise RuntimeError('engine busy')
+
+    sync = FollowerSync(client, on_change=fail)
+    sync.poll()
+    assert [r['id'] for r in sync.get_followers()] == ['a']
+    assert sync.get_status() == {'followers': 1, 'watermark': '2026-10-01T00:00:01', 'polls': 1}
+
+
+def test_engine_applies_synced_changes():
+    from copytrade.engine import CopyEngine
+
+    client = Client([row('a', '2026-10-01T00:00:01', copy_mode='multiplier', multiplier=1)])
+    engine = CopyEngine({'id': 'm', 'name': 'broker'}, [])
+    sync = FollowerSync(client, on_change=engine.apply_follower_changes)
+    try:
+        sync.poll()
+        assert list(engine.followers) == ['a']
+        assert engine.relationships.followers_of('m') == ('a',)
+        client.rows[0] = row('a', '2026-10-01T00:00:02', status='inactive')
+        sync.poll()
+        assert engine.followers == {}
+        assert engine.relationships.followers_of('m') == ()
+    finally:
+        engine.stop()
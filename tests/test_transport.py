@@ -0,0 +1,49 @@
+import pytest
+
+from copytrade.api import DeltaExchangeAPITester
+from copytrade.jsonstream import count_results
+from copytrade.standin import StandInExchange
+from copytrade.transport import StreamedResponse, close_shared_clients
+from copytrade.warmup import unique_sessions
+
+pytest.importorskip('h2')
+
+
+@pytest.fixture
+def exchange():
+    products = [{'id': i, 'symbol': f"P{i}USD", 'contract_type': 'perpetual_futures'} for i in range(500)]
+    with StandInExchange(products=products) as exchange:
+        yield exchange
+    close_shared_clients()
+
+
+def test_http2_stream_is_read_in_chunks(exchange):
+    tester = DeltaExchangeAPITester('key', 'secret', transport='http2', base_url=exchange.url)
+    response = tester.send('GET', f"{exchange.url}/v2/products", stream=True)
+    assert isinstance(response, StreamedResponse)
+    assert not response.is_stream_consumed
+    assert count_results(response) == 500
+    assert response.is_stream_consumed
+
+
+def test_http2_streamed_error_body_is_readable(exchange):
+    tester = DeltaExchangeAPITester('key', 'secret', transport='http2', base_url=exchange.url)
+    response = tester.send('GET', f"{exchange.url}/v2/missing", stream=True)
+    assert response.status_code == 404
+    assert response.json()['success'] is False
+    assert 'not_found' in response.text
+
+
+def test_http2_without_stream_is_buffered(exchange):
+    tester = DeltaExchangeAPITester('key', 'secret', transport='http2', base_url=exchange.url)
+    response = tester.send('GET', f"{exchange.url}/v2/products")
+    assert not isinstance(response, StreamedResponse)
+    assert len(response.json()['result']) == 500
+
+
+def test_http2_testers_share_one_warmup_session(exchange):
+    clients = {f"a{i}": DeltaExchangeAPITester('key', 'secret', transport='http2', base_url=exchange.url)
+               for i in range(5)}
+    clients['h1'] = DeltaExchangeAPITester('key', 'secret', base_url=exchange.url)
+    clients['h1b'] = DeltaExchangeAPITester('key', 'secret', base_url=exchange.url)
+    assert sorted(unique_sessions(clients)) == ['a0', 'h1', 'h1b']